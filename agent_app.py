@@ -1,13 +1,51 @@
 from langgraph.graph import StateGraph, END
 from typing import TypedDict, List, Annotated, Dict, Any, Optional
 from langgraph.graph import add_messages
+from langgraph.types import interrupt
+from langgraph.config import get_config
 from tools import ask_user, get_policy_details, get_claim_status
-from llm_utils import run_llm, client   # ✅ CORRECT
-from prompts import *
-from env_loader import tracer
-import re, json
+from llm_utils import (   # ✅ CORRECT
+    run_llm,
+    arun_llm,
+    stream_chat_completion,
+    structured_chat_completion,
+    astructured_chat_completion,
+    astream_chat_completion,
+    emit_answer,
+    create_chat_completion,
+    acreate_chat_completion,
+)
+from prompts import (
+    SUPERVISOR_PROMPT,
+    POLICY_AGENT_PROMPT,
+    BILLING_AGENT_PROMPT,
+    CLAIMS_AGENT_PROMPT,
+    GENERAL_HELP_PROMPT,
+    HUMAN_ESCALATION_PROMPT,
+    FINAL_ANSWER_PROMPT,
+    PREFETCHED_RECORDS_PROMPT,
+    STRUCTURED_SPECIALIST_PROMPT,
+)
+import os, re, json, time, asyncio, threading
 from tracing_utils import trace_agent
+from intent_router import router as intent_router, build_task
+from conversation import (
+    append_turns,
+    assistant_turn,
+    user_turn,
+    render_history,
+    first_user_message,
+    compact_history,
+    record_prompt_tokens,
+)
+from entity_extractor import extract as extract_entities, scan_new_turns
+from checkpointing import build_checkpointer, abuild_checkpointer, new_thread_id, thread_config
+from metrics import record_tool_call, timed
+from prefetch import MISSING, prefetcher
+from finalization import finalizer
+from retrieval import search_faqs, search_faqs_batch, embed_query, embed_queries, faq_versions, get_semantic_cache
 import logging
+from logging_setup import configure_logging, payload, state_summary
 from tools import (
     ask_user,
     get_policy_details,
@@ -15,6 +53,11 @@ from tools import (
     get_billing_info,
     get_payment_history,
     get_auto_policy_details,
+    aget_policy_details,
+    aget_claim_status,
+    aget_billing_info,
+    aget_payment_history,
+    aget_auto_policy_details,
 )
 
 logger = logging.getLogger(__name__)
@@ -27,7 +70,12 @@ logger = logging.getLogger(__name__)
 class GraphState(TypedDict):
     messages: Annotated[List[Any], add_messages]
     user_input: str
-    conversation_history: Optional[str]
+    turns: Annotated[List[Dict[str, str]], append_turns]
+    history_summary: Optional[str]
+    summary_upto: Optional[int]
+    entities: Optional[Dict[str, str]]
+    entity_scan_offset: Optional[int]
+    last_specialist_index: Optional[int]
     n_iteration: Optional[int]
     customer_id: Optional[str]
     policy_number: Optional[str]
@@ -38,6 +86,12 @@ class GraphState(TypedDict):
     end_conversation: Optional[bool]
     requires_human_escalation: bool
     final_answer: Optional[str]
+    # Set by prefetch_faqs for batch runs: {"query", "embedding", "results"}.
+    faq_results: Optional[Dict[str, Any]]
+    # Key of this conversation's prefetched customer context (see prefetch.py).
+    prefetch_key: Optional[str]
+    # Set by a structured-mode specialist whose reply is the final answer.
+    answer_ready: Optional[bool]
 
     # 🔹 REQUIRED FOR STREAMLIT PAUSE
     needs_user_input: Optional[bool]
@@ -51,94 +105,205 @@ class GraphState(TypedDict):
 
 
 
-@trace_agent
-def supervisor_agent(state):
-    print("---SUPERVISOR AGENT---")
-    
-    # ---------------------------
-    # PHASE 1: Handle clarification return
-    # ---------------------------
-    if state.get("needs_clarification"):
-        print("✅ Processing user clarification")
-        user_clarification = state.get("user_clarification", "")
-        clarification_question = state.get("clarification_question", "")
+# Entity types that are also GraphState channels.
+ENTITY_KEYS = ("policy_number", "customer_id", "claim_id")
 
-        # Extract IDs
-        policy_match = re.search(r'POL\d{6}', user_clarification)
-        if policy_match:
-            state["policy_number"] = policy_match.group()
 
-        customer_match = re.search(r'CUST\d{5}', user_clarification)
-        if customer_match:
-            state["customer_id"] = customer_match.group()
+def _absorb_clarification(state):
+    """
+    PHASE 1: fold a returned clarification into the conversation.
+    Mutates the local `state` so later phases see it and returns the state
+    update that records it.
+    """
+    if not state.get("needs_clarification"):
+        return {}
 
-        claim_match = re.search(r'CLM\d{6}', user_clarification)
-        if claim_match:
-            state["claim_id"] = claim_match.group()
+    logger.info("✅ Processing user clarification")
+    user_clarification = state.get("user_clarification", "")
+    clarification_question = state.get("clarification_question", "")
 
-        updated_conversation = (
-            state.get("conversation_history", "")
-            + f"\nAssistant: {clarification_question}\nUser: {user_clarification}"
-        )
+    # Extract IDs; an explicit answer overrides anything seen earlier
+    state.update(extract_entities(user_clarification, ENTITY_KEYS))
 
-        state["conversation_history"] = updated_conversation
-        state["needs_clarification"] = False
-        state.pop("clarification_question", None)
-        state.pop("user_clarification", None)
+    new_turns = [assistant_turn(clarification_question, "supervisor"), user_turn(user_clarification)]
+    state["turns"] = (state.get("turns") or []) + new_turns
+    state["needs_clarification"] = False
+    state.pop("clarification_question", None)
+    state.pop("user_clarification", None)
+
+    return {"turns": new_turns, "needs_clarification": False}
 
-    # ---------------------------
-    # PHASE 2: Extract from history
-    # ---------------------------
-    conversation_history = state.get("conversation_history", "")
 
-    if not state.get("policy_number"):
-        m = re.search(r'POL\d{6}', conversation_history)
-        if m:
-            state["policy_number"] = m.group()
+def _supervisor_prepare(state):
+    """
+    PHASE 1 plus rolling history compaction and incremental entity scanning;
+    returns the update they produce.
+    """
+    clarification = _absorb_clarification(state)
+    compaction = compact_history(state)
+    state.update(compaction)
+    entities = scan_new_turns(state)
+    state.update(entities)
+    # A new input in the same thread starts a fresh answer.
+    reset = {"answer_ready": False} if state.get("answer_ready") else {}
+    return _merge_updates(clarification, compaction, entities, _start_prefetch(state), reset)
 
-    if not state.get("customer_id"):
-        m = re.search(r'CUST\d{5}', conversation_history)
-        if m:
-            state["customer_id"] = m.group()
 
-    if not state.get("claim_id"):
-        m = re.search(r'CLM\d{6}', conversation_history)
-        if m:
-            state["claim_id"] = m.group()
+def _current_thread_id():
+    try:
+        return (get_config().get("configurable") or {}).get("thread_id")
+    except RuntimeError:
+        return None
+
+
+def _start_prefetch(state):
+    """
+    Fire the customer lookups for any ID now known, so they run while the
+    supervisor routes. Keyed by the conversation thread when there is one.
+    """
+    entities = state.get("entities") or {}
+    ids = {key: state.get(key) or entities.get(key) for key in ENTITY_KEYS}
+    if not any(ids.values()):
+        return {}
+    key = prefetcher.prefetch(state.get("prefetch_key") or _current_thread_id(), **ids)
+    if not key or key == state.get("prefetch_key"):
+        return {}
+    state["prefetch_key"] = key
+    return {"prefetch_key": key}
+
+
+def _merge_updates(*updates):
+    """Combine supervisor state updates; turn lists are concatenated in order."""
+    merged = {}
+    for update in updates:
+        for key, value in update.items():
+            if key == "turns":
+                merged["turns"] = merged.get("turns", []) + list(value)
+            else:
+                merged[key] = value
+    return merged
+
+
+# Channels with reducers: a write is an append, never a replacement.
+DELTA_KEYS = ("messages", "turns")
+
+
+def _changed_only(before, update):
+    """
+    Drop the plain channels in `update` that already hold that value in
+    `before`. Rewriting one changes nothing but still bumps its version and
+    stores another checkpoint blob.
+    """
+    return {key: value for key, value in update.items() if key in DELTA_KEYS or before.get(key) != value}
+
+
+def _scalar_channels(state):
+    """Shallow snapshot of the non-log channels, taken before a node mutates its local state."""
+    return {key: value for key, value in state.items() if key not in DELTA_KEYS}
+
+
+def _supervisor_update(state, before, *updates):
+    """The supervisor's state update: its phases' writes plus any IDs it filled in, minus no-op writes."""
+    ids = {key: state[key] for key in ENTITY_KEYS if state.get(key)}
+    return _changed_only(before, _merge_updates(*updates, ids))
+
+
+# IDs a specialist needs before it can look anything up (any one of them
+# will do), and what to ask for when none is known.
+ROUTE_REQUIRED_IDS = {
+    "policy_agent": ("policy_number",),
+    "billing_agent": ("policy_number", "customer_id"),
+    "claims_agent": ("claim_id", "policy_number"),
+}
+MISSING_ID_QUESTIONS = {
+    "policy_agent": ("policy number", "What is your policy number?"),
+    "billing_agent": ("policy number", "What is your policy number?"),
+    "claims_agent": ("claim ID", "What is your claim ID?"),
+}
+
+
+def _has_required_ids(state, agent):
+    return any(state.get(key) for key in ROUTE_REQUIRED_IDS.get(agent, ()))
+
+
+def _ask_user_update(question, missing_info, n_iter, resume_agent=None):
+    """
+    Pause for the user. end_conversation is cleared so decide_next_agent
+    reaches human_input even after a specialist has flagged completion.
+    `resume_agent` is kept in next_agent so the answer goes back to it.
+    """
+    update = {
+        "needs_user_input": True,
+        "question": question,
+        "missing_info": missing_info,
+        "end_conversation": False,
+        "n_iteration": n_iter,
+    }
+    if resume_agent:
+        update["next_agent"] = resume_agent
+    return update
+
+
+def _supervisor_fast_path(state, resuming=False):
+    """
+    Phases 2-8 of the supervisor: everything that can be decided without the LLM.
+    Returns the routing update, or None when the LLM has to decide.
+    `resuming` is set when this pass absorbed the user's answer to a question.
+    """
+    turns = state.get("turns") or []
+
+    # ---------------------------
+    # PHASE 2: Fill IDs from entities seen in history
+    # ---------------------------
+    entities = state.get("entities") or {}
+    for key in ENTITY_KEYS:
+        if not state.get(key) and entities.get(key):
+            state[key] = entities[key]
 
     # ---------------------------
     # PHASE 3: Iteration guard
     # ---------------------------
     n_iter = state.get("n_iteration", 0) + 1
     state["n_iteration"] = n_iter
-    print(f"🔢 Supervisor iteration: {n_iter}")
+    logger.debug("🔢 Supervisor iteration: %d", n_iter)
 
     if n_iter >= 5:
-        print("⚠️ Max iterations → escalating to human")
+        logger.warning("⚠️ Max iterations → escalating to human")
         # ⚠️ CRITICAL: RETURN immediately with escalation routing
         return {
             "requires_human_escalation": True,
             "next_agent": "human_escalation_agent",
             "task": "Escalate to human support",
             "justification": "Maximum iterations reached without resolution",
-            "conversation_history": conversation_history,
+            "n_iteration": n_iter
+        }
+
+    # ---------------------------
+    # PHASE 3b: Resume the specialist that asked for the missing ID
+    # ---------------------------
+    resume_agent = state.get("next_agent")
+    if resuming and resume_agent in ROUTE_REQUIRED_IDS and _has_required_ids(state, resume_agent):
+        logger.info("↩️ Clarification received → back to %s", resume_agent)
+        return {
+            "next_agent": resume_agent,
+            "task": build_task(resume_agent, first_user_message(state)),
+            "justification": "Resuming after clarification",
+            "turns": [assistant_turn(f"Routing to {resume_agent}", "supervisor")],
+            "end_conversation": False,
             "n_iteration": n_iter
         }
 
     # ---------------------------
     # PHASE 4: Check for specialist asking for policy number
     # ---------------------------
-    history_lower = conversation_history.lower()
-    
     # Look at the last specialist message
     last_specialist_msg = ""
-    for marker in ["Billing Agent:", "Policy Agent:", "Claims Agent:", "General Help Agent:"]:
-        if marker in conversation_history:
-            parts = conversation_history.split(marker)
-            if len(parts) > 1:
-                last_specialist_msg = parts[-1].split("\n")[0].strip().lower()
-                print(f"📝 Last specialist message: {last_specialist_msg[:100]}...")
-                break
+    last_specialist = None
+    last_index = state.get("last_specialist_index")
+    if last_index is not None and last_index >= 0:
+        last_specialist = turns[last_index]["agent"]
+        last_specialist_msg = turns[last_index]["content"].split("\n", 1)[0].strip().lower()
+        logger.debug("📝 Last specialist message: %.100s...", last_specialist_msg)
     
     # If specialist is asking for policy number
     if last_specialist_msg and any(phrase in last_specialist_msg for phrase in [
@@ -147,19 +312,11 @@ def supervisor_agent(state):
         "could you provide your policy number",
         "please provide me with your policy number"
     ]):
-        print("🚨 Detected: Specialist asking for policy number")
+        logger.info("🚨 Detected: Specialist asking for policy number")
         
         # If we don't have it, ask the user
         if not state.get("policy_number"):
-            return {
-                "needs_user_input": True,
-                "question": "What is your policy number?",
-                "missing_info": "policy number",
-                "conversation_history": conversation_history,
-                "n_iteration": n_iter,
-                "policy_number": state.get("policy_number", ""),
-                "customer_id": state.get("customer_id", "")
-            }
+            return _ask_user_update("What is your policy number?", "policy number", n_iter, last_specialist)
 
     # ---------------------------
     # PHASE 5: Check for specialist asking for claim ID
@@ -169,19 +326,10 @@ def supervisor_agent(state):
         "provide your claim id",
         "could you provide your claim id"
     ]):
-        print("🚨 Detected: Specialist asking for claim ID")
+        logger.info("🚨 Detected: Specialist asking for claim ID")
         
         if not state.get("claim_id"):
-            return {
-                "needs_user_input": True,
-                "question": "What is your claim ID?",
-                "missing_info": "claim ID",
-                "conversation_history": conversation_history,
-                "n_iteration": n_iter,
-                "policy_number": state.get("policy_number", ""),
-                "customer_id": state.get("customer_id", ""),
-                "claim_id": state.get("claim_id", "")
-            }
+            return _ask_user_update("What is your claim ID?", "claim ID", n_iter, last_specialist)
 
     # ---------------------------
     # PHASE 6: Check if question is already answered
@@ -195,68 +343,86 @@ def supervisor_agent(state):
             "please provide", "could you provide", "can you provide",
             "unable to retrieve", "couldn't find", "couldn't retrieve"
         ]):
-            print("✅ Question appears to be answered → routing to final_answer_agent")
+            logger.info("✅ Question appears to be answered → routing to final_answer_agent")
             return {
                 "next_agent": "final_answer_agent",
                 "task": "Finalize response",
                 "justification": "Specialist provided answer",
-                "conversation_history": conversation_history,
                 "n_iteration": n_iter,
-                "end_conversation": True,
-                "policy_number": state.get("policy_number", ""),
-                "customer_id": state.get("customer_id", "")
+                "end_conversation": True
             }
 
     # ---------------------------
     # PHASE 7: If we have policy number, route directly
     # ---------------------------
     if state.get("policy_number"):
-        print(f"✅ Have policy number: {state['policy_number']} → routing to billing_agent")
+        logger.info("✅ Have policy number: %s → routing to billing_agent", state["policy_number"])
         return {
             "next_agent": "billing_agent",
             "task": "Retrieve premium information",
             "justification": "Policy number available",
-            "conversation_history": conversation_history,
-            "n_iteration": n_iter,
-            "policy_number": state["policy_number"],
-            "customer_id": state.get("customer_id", "")
+            "n_iteration": n_iter
         }
 
     # ---------------------------
-    # PHASE 8: Let LLM decide routing
+    # PHASE 8: Fast-path routing for confidently classifiable intents
     # ---------------------------
-    print("🤖 Calling LLM for initial routing...")
+    user_query = first_user_message(state)
+
+    decision = intent_router.classify(user_query)
+    if decision:
+        next_agent = decision["next_agent"]
+        if next_agent in ROUTE_REQUIRED_IDS and not _has_required_ids(state, next_agent):
+            # The specialist could only ask for it and end the run; ask here and come back.
+            missing_info, question = MISSING_ID_QUESTIONS[next_agent]
+            logger.info("⚡ Intent %s needs a %s → asking the user", next_agent, missing_info)
+            return _ask_user_update(question, missing_info, n_iter, next_agent)
+        stats = intent_router.get_stats()
+        logger.info("⚡ Fast-path routing to: %s (%s, confidence %.2f, hit rate %.0f%%, ~%.2fs saved)",
+                    next_agent, decision["source"], decision["confidence"],
+                    100 * stats["hit_rate"], stats["avg_llm_latency_sec"])
+        return {
+            "next_agent": next_agent,
+            "task": build_task(next_agent, user_query),
+            "justification": f"Intent classified locally ({decision['source']}, confidence {decision['confidence']:.2f})",
+            "turns": [assistant_turn(f"Routing to {next_agent}", "supervisor")],
+            "n_iteration": n_iter,
+            "requires_human_escalation": next_agent == "human_escalation_agent"
+        }
 
-    prompt = SUPERVISOR_PROMPT.format(
-        conversation_history=f"Full Conversation:\n{conversation_history}"
-    )
+    return None
 
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "ask_user",
-                "description": "Ask for missing info",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "question": {"type": "string"},
-                        "missing_info": {"type": "string"}
-                    },
-                    "required": ["question", "missing_info"]
-                }
+
+SUPERVISOR_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "ask_user",
+            "description": "Ask for missing info",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "question": {"type": "string"},
+                    "missing_info": {"type": "string"}
+                },
+                "required": ["question", "missing_info"]
             }
         }
-    ]
+    }
+]
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "system", "content": prompt}],
-        tools=tools,
-        tool_choice="auto"
+
+def _supervisor_messages(state):
+    prompt = SUPERVISOR_PROMPT.format(
+        conversation_history=f"Full Conversation:\n{render_history(state)}"
     )
+    record_prompt_tokens("supervisor_agent", prompt)
+    return [{"role": "system", "content": prompt}]
 
-    message = response.choices[0].message
+
+def _supervisor_llm_decision(state, message):
+    """PHASE 9: turn the LLM routing response into a state update."""
+    n_iter = state["n_iteration"]
 
     # If LLM wants to ask user
     if getattr(message, "tool_calls", None):
@@ -267,10 +433,7 @@ def supervisor_agent(state):
                     "needs_user_input": True,
                     "question": args["question"],
                     "missing_info": args.get("missing_info", ""),
-                    "conversation_history": conversation_history,
-                    "n_iteration": n_iter,
-                    "policy_number": state.get("policy_number", ""),
-                    "customer_id": state.get("customer_id", "")
+                    "n_iteration": n_iter
                 }
 
     # Parse routing decision
@@ -279,323 +442,783 @@ def supervisor_agent(state):
     except:
         parsed = {}
 
-    print(f"➡️ Routing to: {parsed.get('next_agent', 'general_help_agent')}")
+    logger.info("➡️ Routing to: %s", parsed.get("next_agent", "general_help_agent"))
     
     return {
         "next_agent": parsed.get("next_agent", "general_help_agent"),
         "task": parsed.get("task", "Assist the user with their query."),
         "justification": parsed.get("justification", ""),
-        "conversation_history": conversation_history + 
-            f"\nAssistant: Routing to {parsed.get('next_agent', 'general_help_agent')}",
-        "n_iteration": n_iter,
-        "policy_number": state.get("policy_number", ""),
-        "customer_id": state.get("customer_id", "")
+        "turns": [assistant_turn(f"Routing to {parsed.get('next_agent', 'general_help_agent')}", "supervisor")],
+        "n_iteration": n_iter
     }
 
 
 @trace_agent
-def claims_agent_node(state):
-    logger.info("🏥 Claims agent started")
-    logger.debug(f"Claims agent state: { {k: v for k, v in state.items() if k != 'messages'} }")
-    
-    prompt = CLAIMS_AGENT_PROMPT.format(
-        task=state.get("task"),
-        policy_number=state.get("policy_number", "Not provided"),
-        claim_id=state.get("claim_id", "Not provided"),
-        conversation_history=state.get("conversation_history", "")
+def supervisor_agent(state):
+    logger.debug("---SUPERVISOR AGENT---")
+    before = _scalar_channels(state)
+    resuming = bool(state.get("needs_clarification"))
+    pending = _supervisor_prepare(state)
+    routed = _supervisor_fast_path(state, resuming)
+    if routed is not None:
+        return _supervisor_update(state, before, pending, routed)
+
+    # ---------------------------
+    # PHASE 9: Let LLM decide routing
+    # ---------------------------
+    logger.debug("🤖 Calling LLM for initial routing...")
+    llm_start = time.perf_counter()
+    response = create_chat_completion(
+        model="gpt-4o-mini",
+        messages=_supervisor_messages(state),
+        tools=SUPERVISOR_TOOLS,
+        tool_choice="auto"
     )
+    intent_router.record_llm_call(time.perf_counter() - llm_start)
+    return _supervisor_update(state, before, pending, _supervisor_llm_decision(state, response.choices[0].message))
 
-    tools = [
-        {"type": "function", "function": {
-            "name": "get_claim_status",
-            "description": "Retrieve claim details",
-            "parameters": {"type": "object", "properties": {"claim_id": {"type": "string"}, "policy_number": {"type": "string"}}}
-        }}
-    ]
 
-    result = run_llm(prompt, tools, {"get_claim_status": get_claim_status})
-    
-    logger.info("✅ Claims agent completed")
-    
-    # Update state with results
-    updated_state = {"messages": [("assistant", result)]}
-    
-    # Preserve IDs
+@trace_agent
+async def asupervisor_agent(state):
+    logger.debug("---SUPERVISOR AGENT---")
+    before = _scalar_channels(state)
+    resuming = bool(state.get("needs_clarification"))
+    pending = _supervisor_prepare(state)
+    routed = _supervisor_fast_path(state, resuming)
+    if routed is not None:
+        return _supervisor_update(state, before, pending, routed)
+
+    logger.debug("🤖 Calling LLM for initial routing...")
+    llm_start = time.perf_counter()
+    response = await acreate_chat_completion(
+        model="gpt-4o-mini",
+        messages=_supervisor_messages(state),
+        tools=SUPERVISOR_TOOLS,
+        tool_choice="auto"
+    )
+    intent_router.record_llm_call(time.perf_counter() - llm_start)
+    return _supervisor_update(state, before, pending, _supervisor_llm_decision(state, response.choices[0].message))
+
+
+CLAIMS_TOOLS = [
+    {"type": "function", "function": {
+        "name": "get_claim_status",
+        "description": "Retrieve claim details",
+        "parameters": {"type": "object", "properties": {"claim_id": {"type": "string"}, "policy_number": {"type": "string"}}}
+    }}
+]
+
+POLICY_TOOLS = [
+    {"type": "function", "function": {
+        "name": "get_policy_details",
+        "description": "Fetch policy info by policy number",
+        "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}}}
+    }},
+    {"type": "function", "function": {
+        "name": "get_auto_policy_details",
+        "description": "Get auto policy details",
+        "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}}}
+    }}
+]
+
+BILLING_TOOLS = [
+    {"type": "function", "function": {
+        "name": "get_billing_info",
+        "description": "Retrieve billing information",
+        "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}, "customer_id": {"type": "string"}}}
+    }},
+    {"type": "function", "function": {
+        "name": "get_payment_history",
+        "description": "Fetch recent payment history",
+        "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}}}
+    }}
+]
+
+
+def _policy_lookups(state):
+    if state.get("policy_number"):
+        return [("policy_details", get_policy_details, {"policy_number": state["policy_number"]})]
+    return []
+
+
+def _billing_lookups(state):
     if state.get("policy_number"):
-        updated_state["policy_number"] = state["policy_number"]
+        return [("billing_info", get_billing_info, {"policy_number": state["policy_number"]})]
     if state.get("customer_id"):
-        updated_state["customer_id"] = state["customer_id"]
+        return [("billing_info", get_billing_info, {"customer_id": state["customer_id"]})]
+    return []
+
+
+def _claims_lookups(state):
     if state.get("claim_id"):
-        updated_state["claim_id"] = state["claim_id"]
+        return [("claims", get_claim_status, {"claim_id": state["claim_id"]})]
+    if state.get("policy_number"):
+        return [("claims", get_claim_status, {"policy_number": state["policy_number"]})]
+    return []
+
+
+def _prefetched_records(state, lookups):
+    """Prefetched results for a specialist's lookups, by label; empty if none are ready."""
+    records = {}
+    for label, tool, kwargs in lookups:
+        result = prefetcher.take(state.get("prefetch_key"), tool, **kwargs)
+        if result is not MISSING:
+            records[label] = result
+    return records
+
+
+async def _aprefetched_records(state, lookups):
+    records = {}
+    for label, tool, kwargs in lookups:
+        result = await prefetcher.atake(state.get("prefetch_key"), tool, **kwargs)
+        if result is not MISSING:
+            records[label] = result
+    return records
+
+
+def _with_records(prompt, records):
+    """Append prefetched records so the specialist can answer without a tool round trip."""
+    if not records:
+        return prompt
+    logger.info("⚡ Using prefetched %s", ", ".join(records))
+    return prompt + PREFETCHED_RECORDS_PROMPT.format(records=json.dumps(records, indent=2, default=str))
+
+
+def _specialist_update(state, agent, result):
+    """State update shared by the tool-using specialists; the IDs are already in state."""
+    updated_state = {"messages": [("assistant", result)]}
     
     # Update conversation history
-    current_history = state.get("conversation_history", "")
-    updated_state["conversation_history"] = current_history + f"\nClaims Agent: {result}"
+    updated_state["turns"] = [assistant_turn(result, agent)]
     
     # ⚠️ CRITICAL FIX: Signal completion
     updated_state["end_conversation"] = True
     updated_state["next_agent"] = "final_answer_agent"
     
-    return updated_state
+    return _changed_only(state, updated_state)
+
+
+# ---- Structured specialist mode ----
+# SPECIALIST_MODE=tools (default): the specialist asks the model which tools
+# to call, runs them, has the model phrase an answer, and final_answer_agent
+# rewrites that answer (up to three sequential LLM calls). SPECIALIST_MODE=structured:
+# the records are fetched from the IDs already in state and a single
+# JSON-schema call writes the customer-facing answer (or one follow-up
+# question), which ends the run without the supervisor or final answer passes.
+SPECIALIST_MODE = os.getenv("SPECIALIST_MODE", "tools")
+
+SPECIALIST_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "specialist_response",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "answer": {"type": "string"},
+                "needs_follow_up": {"type": "boolean"},
+                "follow_up_question": {"type": "string"},
+            },
+            "required": ["answer", "needs_follow_up", "follow_up_question"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+SPECIALIST_ROLES = {
+    "policy_agent": "Policy Specialist (policy details, coverage, deductibles, vehicles)",
+    "billing_agent": "Billing Specialist (bills, premiums, due dates, payment history)",
+    "claims_agent": "Claims Specialist (claim status, filing, settlements)",
+}
+
+ASYNC_TOOLS = {
+    get_policy_details: aget_policy_details,
+    get_auto_policy_details: aget_auto_policy_details,
+    get_billing_info: aget_billing_info,
+    get_payment_history: aget_payment_history,
+    get_claim_status: aget_claim_status,
+}
+
+
+def _structured_lookups(state, agent):
+    """Everything the specialist's tools could fetch for the IDs in state."""
+    if agent == "policy_agent":
+        lookups = _policy_lookups(state)
+        if lookups:
+            lookups.append(("auto_policy_details", get_auto_policy_details,
+                            {"policy_number": state["policy_number"]}))
+        return lookups
+    if agent == "billing_agent":
+        lookups = _billing_lookups(state)
+        if state.get("policy_number"):
+            lookups.append(("payment_history", get_payment_history, {"policy_number": state["policy_number"]}))
+        return lookups
+    return _claims_lookups(state)
+
+
+def _record_lookup(tool, start, result):
+    record_tool_call(tool.tool_name, time.perf_counter() - start,
+                     ok=not (isinstance(result, dict) and "error" in result))
+
+
+def _fetch_records(state, lookups):
+    """Prefetched results where available, the (cached) tools otherwise."""
+    records = {}
+    with timed("tool"):
+        for label, tool, kwargs in lookups:
+            result = prefetcher.take(state.get("prefetch_key"), tool, **kwargs)
+            if result is MISSING:
+                start = time.perf_counter()
+                result = tool(**kwargs)
+                _record_lookup(tool, start, result)
+            records[label] = result
+    return records
+
+
+async def _afetch_records(state, lookups):
+    async def fetch(tool, kwargs):
+        result = await prefetcher.atake(state.get("prefetch_key"), tool, **kwargs)
+        if result is MISSING:
+            start = time.perf_counter()
+            result = await ASYNC_TOOLS[tool](**kwargs)
+            _record_lookup(tool, start, result)
+        return result
+
+    with timed("tool"):
+        results = await asyncio.gather(*(fetch(tool, kwargs) for _, tool, kwargs in lookups))
+    return {label: result for (label, _, _), result in zip(lookups, results)}
+
+
+def _structured_messages(state, agent, records):
+    prompt = STRUCTURED_SPECIALIST_PROMPT.format(
+        role=SPECIALIST_ROLES[agent],
+        task=state.get("task"),
+        user_query=first_user_message(state) or state.get("user_input"),
+        records=json.dumps(records, indent=2, default=str) if records
+        else "None (no policy number, customer ID or claim ID is known yet).",
+        conversation_history=render_history(state),
+    )
+    record_prompt_tokens(agent, prompt)
+    return [{"role": "system", "content": prompt}]
+
+
+def _missing_info(state, agent):
+    if agent == "claims_agent" and not (state.get("claim_id") or state.get("policy_number")):
+        return "claim ID"
+    return "" if state.get("policy_number") else "policy number"
+
+
+def _structured_update(state, agent, reply):
+    """
+    The answer ends the run; a follow-up question pauses it for the user.
+    next_agent keeps the asking specialist so the supervisor resumes it
+    with the answer; the question reaches `turns` when it is absorbed.
+    """
+    question = reply.get("follow_up_question") if reply.get("needs_follow_up") else None
+    if question:
+        logger.info("❓ %s needs more information: %s", agent, question)
+        return _changed_only(state, {
+            "needs_user_input": True,
+            "question": question,
+            "missing_info": _missing_info(state, agent),
+            "answer_ready": False,
+            "next_agent": agent,
+            "messages": [("assistant", question)],
+        })
+    return _changed_only(state, {**_final_answer_update(reply.get("answer", ""), agent), "answer_ready": True})
+
+
+def _structured_specialist(state, agent):
+    records = _fetch_records(state, _structured_lookups(state, agent))
+    reply = structured_chat_completion(_structured_messages(state, agent, records),
+                                       SPECIALIST_RESPONSE_FORMAT, node=agent)
+    logger.info("✅ %s answered in one structured call", agent)
+    return _structured_update(state, agent, reply)
+
+
+async def _astructured_specialist(state, agent):
+    records = await _afetch_records(state, _structured_lookups(state, agent))
+    reply = await astructured_chat_completion(_structured_messages(state, agent, records),
+                                              SPECIALIST_RESPONSE_FORMAT, node=agent)
+    logger.info("✅ %s answered in one structured call", agent)
+    return _structured_update(state, agent, reply)
+
+
+def after_specialist(state):
+    """Structured replies end the run or pause for the user; tool-loop replies go back to the supervisor."""
+    if state.get("answer_ready"):
+        return END
+    if state.get("needs_user_input"):
+        return "human_input"
+    return "supervisor_agent"
+
+
+def _claims_prompt(state, records=None):
+    prompt = _with_records(CLAIMS_AGENT_PROMPT.format(
+        task=state.get("task"),
+        policy_number=state.get("policy_number", "Not provided"),
+        claim_id=state.get("claim_id", "Not provided"),
+        conversation_history=render_history(state)
+    ), records)
+    record_prompt_tokens("claims_agent", prompt)
+    return prompt
+
+
 @trace_agent
-def final_answer_agent(state):
-    """Generate a clean final summary before ending the conversation"""
-    print("---FINAL ANSWER AGENT---")
-    logger.info("🎯 Final answer agent started")
-    
-    user_query = state["user_input"]
-    conversation_history = state.get("conversation_history", "")
+def claims_agent_node(state):
+    logger.info("🏥 Claims agent started")
+    logger.debug("Claims agent state", extra=payload(lambda: state_summary(state)))
+    if SPECIALIST_MODE == "structured":
+        return _structured_specialist(state, "claims_agent")
+
+    records = _prefetched_records(state, _claims_lookups(state))
+    result = run_llm(_claims_prompt(state, records), CLAIMS_TOOLS, {"get_claim_status": get_claim_status})
     
-    # Extract the most recent specialist response
-    recent_responses = []
+    logger.info("✅ Claims agent completed")
+    return _specialist_update(state, "claims_agent", result)
+
+
+@trace_agent
+async def aclaims_agent_node(state):
+    logger.info("🏥 Claims agent started")
+    if SPECIALIST_MODE == "structured":
+        return await _astructured_specialist(state, "claims_agent")
+
+    records = await _aprefetched_records(state, _claims_lookups(state))
+    result = await arun_llm(_claims_prompt(state, records), CLAIMS_TOOLS, {"get_claim_status": aget_claim_status})
+
+    logger.info("✅ Claims agent completed")
+    return _specialist_update(state, "claims_agent", result)
+
+
+def _specialist_reply(state):
+    """(content, agent) of the latest specialist turn, as indexed by the supervisor's scan."""
+    index = state.get("last_specialist_index")
+    turns = state.get("turns") or []
+    if index is not None and 0 <= index < len(turns):
+        return turns[index]["content"], turns[index]["agent"]
+    # No specialist turn yet (e.g. straight from the supervisor): last non-clarification message.
     for msg in reversed(state.get("messages", [])):
-        if hasattr(msg, 'content') and "clarification" not in msg.content.lower():
-            recent_responses.append(msg.content)
-            if len(recent_responses) >= 2:  # Get last 2 non-clarification responses
-                break
-    
-    specialist_response = recent_responses[0] if recent_responses else "No response available"
-    
+        content = getattr(msg, "content", None)
+        if content and "clarification" not in content.lower():
+            return content, ""
+    return "No response available", ""
+
+
+def _final_answer_messages(state, specialist_response):
     prompt = FINAL_ANSWER_PROMPT.format(
         specialist_response=specialist_response,  
-        user_query=user_query,
-    )
-    
-    print("🤖 Generating final summary...")
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "system", "content": prompt}]
+        user_query=state["user_input"],
     )
-    
-    final_answer = response.choices[0].message.content
-    
-    print(f"✅ Final answer: {final_answer}")
-    
-    # Replace all previous messages with just the final answer
-    clean_messages = [("assistant", final_answer)]
+    record_prompt_tokens("final_answer_agent", prompt)
+    return [{"role": "system", "content": prompt}]
 
-    state["final_answer"] = final_answer
-    state["end_conversation"] = True
-    state["conversation_history"] = conversation_history + f"\nAssistant: {final_answer}"
-    state["messages"] = clean_messages
-    
-    return state
+
+def _template_lookups(state, kind):
+    # The supervisor fills IDs from `entities` without always writing them back.
+    entities = state.get("entities") or {}
+    ids = {key: state.get(key) or entities.get(key) for key in ENTITY_KEYS}
+    return _claims_lookups(ids) if kind == "claim_status" else _billing_lookups(ids)
+
+
+def _template_answer(kind, lookups, results):
+    records = {label: result for (label, _, _), result in zip(lookups, results)}
+    return finalizer.render(kind, records)
 
 
+def _finalize(state):
+    """(specialist reply, strategy, template kind) under FINALIZATION_POLICY."""
+    response, agent = _specialist_reply(state)
+    strategy, kind = finalizer.choose(first_user_message(state) or state.get("user_input"), response, agent)
+    return response, strategy, kind
+
+
+def _final_answer_update(final_answer, agent="final_answer_agent"):
+    logger.info("✅ Final answer ready (%d chars)", len(final_answer or ""))
+    logger.debug("Final answer", extra=payload(lambda: final_answer))
     
+    # Only the changed channels are returned: re-emitting the whole state
+    # would append every turn to the log a second time. The messages and
+    # turns reducers append the items returned here to the existing log.
+    return {
+        "final_answer": final_answer,
+        "end_conversation": True,
+        "turns": [assistant_turn(final_answer, agent)],
+        "messages": [("assistant", final_answer)],
+    }
+
+
 @trace_agent
-def policy_agent_node(state):
-    print("---POLICY AGENT---")
-    logger.info("📄 Policy agent started")
-    logger.debug(f"Policy agent state: { {k: v for k, v in state.items() if k != 'messages'} }")
-    
-    prompt = POLICY_AGENT_PROMPT.format(
+def final_answer_agent(state):
+    """Generate a clean final summary before ending the conversation"""
+    logger.debug("---FINAL ANSWER AGENT---")
+    logger.info("🎯 Final answer agent started")
+
+    response, strategy, kind = _finalize(state)
+    final_answer = response if strategy == "pass_through" else None
+    if strategy == "template":
+        lookups = _template_lookups(state, kind)
+        with timed("tool"):
+            final_answer = _template_answer(kind, lookups, [tool(**kwargs) for _, tool, kwargs in lookups])
+    if final_answer is None:
+        strategy = "llm"
+        logger.debug("🤖 Generating final summary...")
+        final_answer = stream_chat_completion(_final_answer_messages(state, response), node="final_answer_agent")
+    else:
+        emit_answer("final_answer_agent", final_answer)
+    finalizer.record(strategy)
+    return _changed_only(state, _final_answer_update(final_answer))
+
+
+@trace_agent
+async def afinal_answer_agent(state):
+    """Async variant of final_answer_agent"""
+    logger.debug("---FINAL ANSWER AGENT---")
+    logger.info("🎯 Final answer agent started")
+
+    response, strategy, kind = _finalize(state)
+    final_answer = response if strategy == "pass_through" else None
+    if strategy == "template":
+        lookups = _template_lookups(state, kind)
+        with timed("tool"):
+            results = await asyncio.gather(*(ASYNC_TOOLS[tool](**kwargs) for _, tool, kwargs in lookups))
+        final_answer = _template_answer(kind, lookups, results)
+    if final_answer is None:
+        strategy = "llm"
+        logger.debug("🤖 Generating final summary...")
+        final_answer = await astream_chat_completion(_final_answer_messages(state, response),
+                                                     node="final_answer_agent")
+    else:
+        emit_answer("final_answer_agent", final_answer)
+    finalizer.record(strategy)
+    return _changed_only(state, _final_answer_update(final_answer))
+
+
+def _policy_prompt(state, records=None):
+    prompt = _with_records(POLICY_AGENT_PROMPT.format(
         task=state.get("task"),
         policy_number=state.get("policy_number", "Not provided"),
         customer_id=state.get("customer_id", "Not provided"),
-        conversation_history=state.get("conversation_history", "")
-    )
+        conversation_history=render_history(state)
+    ), records)
+    record_prompt_tokens("policy_agent", prompt)
+    return prompt
+
+    
+@trace_agent
+def policy_agent_node(state):
+    logger.info("📄 Policy agent started")
+    logger.debug("Policy agent state", extra=payload(lambda: state_summary(state)))
+    if SPECIALIST_MODE == "structured":
+        return _structured_specialist(state, "policy_agent")
 
-    tools = [
-        {"type": "function", "function": {
-            "name": "get_policy_details",
-            "description": "Fetch policy info by policy number",
-            "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}}}
-        }},
-        {"type": "function", "function": {
-            "name": "get_auto_policy_details",
-            "description": "Get auto policy details",
-            "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}}}
-        }}
-    ]
-
-    print("🔄 Processing policy request...")
-    result = run_llm(prompt, tools, {
+    logger.debug("🔄 Processing policy request...")
+    records = _prefetched_records(state, _policy_lookups(state))
+    result = run_llm(_policy_prompt(state, records), POLICY_TOOLS, {
         "get_policy_details": get_policy_details,
         "get_auto_policy_details": get_auto_policy_details
     })
     
-    print("✅ Policy agent completed")
-    
-    # Update state with results
-    updated_state = {"messages": [("assistant", result)]}
-    
-    # Preserve IDs
-    if state.get("policy_number"):
-        updated_state["policy_number"] = state["policy_number"]
-    if state.get("customer_id"):
-        updated_state["customer_id"] = state["customer_id"]
-    
-    # Update conversation history
-    current_history = state.get("conversation_history", "")
-    updated_state["conversation_history"] = current_history + f"\nPolicy Agent: {result}"
-    
-    # ⚠️ CRITICAL FIX: Signal completion
-    updated_state["end_conversation"] = True
-    updated_state["next_agent"] = "final_answer_agent"
-    
-    return updated_state
+    logger.info("✅ Policy agent completed")
+    return _specialist_update(state, "policy_agent", result)
+
 
 @trace_agent
-def billing_agent_node(state):
-    print("---BILLING AGENT---")
-    print("TASK: ", state.get("task"))
-    print("USER QUERY: ", state.get("user_input"))
-    print("CONVERSATION HISTORY: ", state.get("conversation_history", ""))
-    
-    prompt = BILLING_AGENT_PROMPT.format(
+async def apolicy_agent_node(state):
+    logger.info("📄 Policy agent started")
+    if SPECIALIST_MODE == "structured":
+        return await _astructured_specialist(state, "policy_agent")
+
+    logger.debug("🔄 Processing policy request...")
+    records = await _aprefetched_records(state, _policy_lookups(state))
+    result = await arun_llm(_policy_prompt(state, records), POLICY_TOOLS, {
+        "get_policy_details": aget_policy_details,
+        "get_auto_policy_details": aget_auto_policy_details
+    })
+
+    logger.info("✅ Policy agent completed")
+    return _specialist_update(state, "policy_agent", result)
+
+
+def _billing_prompt(state, records=None):
+    prompt = _with_records(BILLING_AGENT_PROMPT.format(
         task=state.get("task"),
-        conversation_history=state.get("conversation_history", "")
-    )
+        conversation_history=render_history(state)
+    ), records)
+    record_prompt_tokens("billing_agent", prompt)
+    return prompt
+
 
-    tools = [
-        {"type": "function", "function": {
-            "name": "get_billing_info",
-            "description": "Retrieve billing information",
-            "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}, "customer_id": {"type": "string"}}}
-        }},
-        {"type": "function", "function": {
-            "name": "get_payment_history",
-            "description": "Fetch recent payment history",
-            "parameters": {"type": "object", "properties": {"policy_number": {"type": "string"}}}
-        }}
-    ]
-
-    print("🔄 Processing billing request...")
-    result = run_llm(prompt, tools, {
+@trace_agent
+def billing_agent_node(state):
+    logger.info("💳 Billing agent started")
+    logger.debug("Billing agent request", extra=payload(lambda: {
+        "task": state.get("task"),
+        "user_query": state.get("user_input"),
+        "conversation_history": render_history(state),
+    }))
+    if SPECIALIST_MODE == "structured":
+        return _structured_specialist(state, "billing_agent")
+
+    logger.debug("🔄 Processing billing request...")
+    records = _prefetched_records(state, _billing_lookups(state))
+    result = run_llm(_billing_prompt(state, records), BILLING_TOOLS, {
         "get_billing_info": get_billing_info,
         "get_payment_history": get_payment_history
     })
     
-    print("✅ Billing agent completed")
-    
-    # Extract and preserve policy number if mentioned in the conversation
-    updated_state = {"messages": [("assistant", result)]}
-    
-    # If we have a policy number in state, preserve it
-    if state.get("policy_number"):
-        updated_state["policy_number"] = state["policy_number"]
-    if state.get("customer_id"):
-        updated_state["customer_id"] = state["customer_id"]
-        
-    # Update conversation history
-    current_history = state.get("conversation_history", "")
-    updated_state["conversation_history"] = current_history + f"\nBilling Agent: {result}"
-    
-    # ⚠️ CRITICAL FIX: Signal that conversation should end
-    updated_state["end_conversation"] = True
-    updated_state["next_agent"] = "final_answer_agent"
-    
-    return updated_state
+    logger.info("✅ Billing agent completed")
+    return _specialist_update(state, "billing_agent", result)
 
 
 @trace_agent
-def general_help_agent_node(state):
-    print("---GENERAL HELP AGENT---")
+async def abilling_agent_node(state):
+    logger.info("💳 Billing agent started")
+    if SPECIALIST_MODE == "structured":
+        return await _astructured_specialist(state, "billing_agent")
+
+    logger.debug("🔄 Processing billing request...")
+    records = await _aprefetched_records(state, _billing_lookups(state))
+    result = await arun_llm(_billing_prompt(state, records), BILLING_TOOLS, {
+        "get_billing_info": aget_billing_info,
+        "get_payment_history": aget_payment_history
+    })
+
+    logger.info("✅ Billing agent completed")
+    return _specialist_update(state, "billing_agent", result)
 
-    user_query = state.get("user_input", "")
-    conversation_history = state.get("conversation_history", "")
-    task = state.get("task", "General insurance support")
 
+def _retrieve_faqs(user_query, query_embedding=None):
     # Step 1: Retrieve relevant FAQs from the vector DB
-    print("🔍 Retrieving FAQs...")
     logger.info("🔍 Retrieving FAQs from vector database")
-    results = collection.query(
-        query_texts=[user_query],
-        n_results=3,
-        include=["metadatas", "documents", "distances"]
-    )
-
+    with timed("retrieval"):
+        return search_faqs(user_query, n_results=3, query_embedding=query_embedding)
+
+
+def _prefetched_faqs(state, user_query):
+    """(embedding, results) from prefetch_faqs when they match this query."""
+    prefetched = state.get("faq_results")
+    if prefetched and prefetched.get("query") == user_query:
+        logger.debug("📦 Using prefetched FAQs")
+        return prefetched["embedding"], prefetched["results"]
+    return None, None
+
+
+def _standalone_question(state):
+    """
+    True when the answer depends on the question alone. The semantic cache
+    is process-wide and keyed on the question, while the prompt also renders
+    the conversation, so answers given with earlier context are not shared.
+    """
+    if state.get("history_summary"):
+        return False
+    return sum(1 for turn in state.get("turns") or [] if turn["speaker"] == "user") <= 1
+
+
+def _cached_general_answer(state, user_query, embedding=None):
+    """
+    Step 0: reuse the answer to a near-identical earlier question.
+    Returns (cached entry or None, query embedding for the retrieval step).
+    """
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is None or not _standalone_question(state):
+        return None, embedding
+    with timed("retrieval"):
+        if embedding is None:
+            embedding = embed_query(user_query)
+        entry = semantic_cache.lookup(embedding)
+    if entry is not None:
+        stats = semantic_cache.get_stats()
+        logger.info("⚡ Semantic cache hit (hit rate %.0f%%, ~%.2fs saved)",
+                    100 * stats["hit_rate"], entry["cost_sec"])
+    return entry, embedding
+
+
+def _cache_general_answer(state, embedding, results, final_answer, started):
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is not None and embedding is not None and _standalone_question(state):
+        semantic_cache.store(embedding, final_answer, faq_versions(results),
+                             cost_sec=time.perf_counter() - started,
+                             metadatas=results.get("metadatas", []))
+
+
+def _general_help_prompt(state, results):
     # Step 2: Format retrieved FAQs
     faq_context = ""
     if results and results.get("metadatas") and results["metadatas"][0]:
-        print(f"📚 Found {len(results['metadatas'][0])} relevant FAQs")
+        logger.debug("📚 Found %d relevant FAQs", len(results["metadatas"][0]))
         for i, meta in enumerate(results["metadatas"][0]):
             q = meta.get("question", "")
             a = meta.get("answer", "")
-            score = results["distances"][0][i]
-            faq_context += f"FAQ {i+1} (score: {score:.3f})\nQ: {q}\nA: {a}\n\n"
+            # Ranked best first; raw retriever scores mean nothing to the LLM.
+            faq_context += f"FAQ {i+1}\nQ: {q}\nA: {a}\n\n"
     else:
-        print("❌ No relevant FAQs found")
+        logger.info("❌ No relevant FAQs found")
         faq_context = "No relevant FAQs were found."
 
     # Step 3: Format the final prompt
     prompt = GENERAL_HELP_PROMPT.format(
-        task=task,
-        conversation_history=conversation_history,
+        task=state.get("task", "General insurance support"),
+        conversation_history=render_history(state),
         faq_context=faq_context
     )
+    record_prompt_tokens("general_help_agent", prompt)
+    return prompt
 
-    print("🤖 Calling LLM for general response...")
-    final_answer = run_llm(prompt)
 
-    print("✅ General help agent completed")
+def _general_help_update(state, final_answer):
+    logger.info("✅ General help agent completed")
     
     updated_state = {
         "messages": [("assistant", final_answer)],
-        "retrieved_faqs": results.get("metadatas", []),
+        "faq_results": None,
     }
 
     # Update conversation history
-    updated_state["conversation_history"] = conversation_history + f"\nGeneral Help Agent: {final_answer}"
+    updated_state["turns"] = [assistant_turn(final_answer, "general_help_agent")]
     
     # ⚠️ CRITICAL FIX: Signal completion
     updated_state["end_conversation"] = True
     updated_state["next_agent"] = "final_answer_agent"
 
-    return updated_state
+    return _changed_only(state, updated_state)
+
 
 @trace_agent
-def human_escalation_node(state):
-    print("---HUMAN ESCALATION AGENT---")
-    logger.warning(f"Escalation triggered - State: { {k: v for k, v in state.items() if k != 'messages'} }")
-    
+def general_help_agent_node(state):
+    logger.info("💬 General help agent started")
+
+    started = time.perf_counter()
+    user_query = state.get("user_input", "")
+    embedding, results = _prefetched_faqs(state, user_query)
+    cached, embedding = _cached_general_answer(state, user_query, embedding)
+    if cached is not None:
+        return _general_help_update(state, cached["answer"])
+
+    if results is None:
+        results = _retrieve_faqs(user_query, embedding)
+    prompt = _general_help_prompt(state, results)
+
+    logger.debug("🤖 Calling LLM for general response...")
+    final_answer = run_llm(prompt)
+    _cache_general_answer(state, embedding, results, final_answer, started)
+    return _general_help_update(state, final_answer)
+
+
+@trace_agent
+async def ageneral_help_agent_node(state):
+    logger.info("💬 General help agent started")
+
+    started = time.perf_counter()
+    user_query = state.get("user_input", "")
+    embedding, results = _prefetched_faqs(state, user_query)
+    cached, embedding = await asyncio.to_thread(_cached_general_answer, state, user_query, embedding)
+    if cached is not None:
+        return _general_help_update(state, cached["answer"])
+
+    if results is None:
+        results = await asyncio.to_thread(_retrieve_faqs, user_query, embedding)
+    prompt = _general_help_prompt(state, results)
+
+    logger.debug("🤖 Calling LLM for general response...")
+    final_answer = await arun_llm(prompt)
+    _cache_general_answer(state, embedding, results, final_answer, started)
+    return _general_help_update(state, final_answer)
+
+
+def _human_escalation_messages(state):
     prompt = HUMAN_ESCALATION_PROMPT.format(
         task=state.get("task"),
-        conversation_history=state.get("conversation_history", "")
+        conversation_history=render_history(state)
     )
+    record_prompt_tokens("human_escalation_agent", prompt)
+    return [{"role": "system", "content": prompt}]
 
-    print("🤖 Generating escalation response...")
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "system", "content": prompt}]
-    )
 
-    print("🚨 Conversation escalated to human")
+def _human_escalation_update(content):
+    logger.warning("🚨 Conversation escalated to human")
     return {
-        "final_answer": response.choices[0].message.content,
+        "final_answer": content,
         "requires_human_escalation": True,
         "escalation_reason": "Customer requested human assistance.",
-        "messages": [("assistant", response.choices[0].message.content)]
+        "messages": [("assistant", content)]
+    }
+
+
+@trace_agent
+def human_escalation_node(state):
+    logger.warning("Escalation triggered", extra=payload(lambda: state_summary(state)))
+
+    logger.debug("🤖 Generating escalation response...")
+    content = stream_chat_completion(_human_escalation_messages(state), node="human_escalation_agent")
+    return _human_escalation_update(content)
+
+
+@trace_agent
+async def ahuman_escalation_node(state):
+    logger.warning("Escalation triggered", extra=payload(lambda: state_summary(state)))
+
+    logger.debug("🤖 Generating escalation response...")
+    content = await astream_chat_completion(_human_escalation_messages(state), node="human_escalation_agent")
+    return _human_escalation_update(content)
+
+
+def _human_input_update(state, answer):
+    question = state.get("question", "")
+    return {
+        "needs_user_input": False,
+        "needs_clarification": True,
+        "clarification_question": question,
+        "user_clarification": answer,
+        "user_input": answer,
     }
 
 
+@trace_agent
+def human_input_node(state):
+    """
+    Pause the run until the user answers `question`. The checkpointer keeps
+    the thread; callers resume with Command(resume=answer) and the answer
+    flows back to the supervisor as a clarification.
+    """
+    logger.info("⏸️ Waiting for user input: %s", state.get("question"))
+    answer = interrupt({"question": state.get("question"), "missing_info": state.get("missing_info")})
+    return _human_input_update(state, answer)
+
+
+@trace_agent
+async def ahuman_input_node(state):
+    logger.info("⏸️ Waiting for user input: %s", state.get("question"))
+    answer = interrupt({"question": state.get("question"), "missing_info": state.get("missing_info")})
+    return _human_input_update(state, answer)
+
+
 def decide_next_agent(state):
     """Determine the next agent based on state"""
     
     # Priority 1: Check for human escalation
     if state.get("requires_human_escalation"):
-        print("🚨 Routing to human_escalation_agent")
+        logger.info("🚨 Routing to human_escalation_agent")
         return "human_escalation_agent"
     
     # Priority 2: Check if conversation should end
     if state.get("end_conversation"):
-        print("✅ Routing to final_answer_agent")
+        logger.info("✅ Routing to final_answer_agent")
         return "final_answer_agent"
     
     # Priority 3: Check if we need user input
     if state.get("needs_user_input"):
-        print("⏸️ Pausing for user input")
-        return "supervisor_agent"
+        logger.info("⏸️ Pausing for user input")
+        return "human_input"
     
     # Priority 4: Check if we need clarification
     if state.get("needs_clarification"):
-        print("❓ Processing clarification")
+        logger.info("❓ Processing clarification")
         return "supervisor_agent"
     
     # Priority 5: Follow next_agent directive
     next_agent = state.get("next_agent", "general_help_agent")
-    print(f"➡️ Routing to: {next_agent}")
+    logger.info("➡️ Routing to: %s", next_agent)
     return next_agent
 
 
@@ -607,36 +1230,164 @@ def decide_next_agent(state):
 
 
 # ---- Build workflow ----
-workflow = StateGraph(GraphState)
+def build_workflow(nodes):
+    """Wire the agent graph around a mapping of node name -> node function."""
+    workflow = StateGraph(GraphState)
 
-workflow.add_node("supervisor_agent", supervisor_agent)
-workflow.add_node("policy_agent", policy_agent_node)
-workflow.add_node("billing_agent", billing_agent_node)
-workflow.add_node("claims_agent", claims_agent_node)
-workflow.add_node("general_help_agent", general_help_agent_node)
-workflow.add_node("human_escalation_agent", human_escalation_node)
-workflow.add_node("final_answer_agent", final_answer_agent)
+    for name, fn in nodes.items():
+        workflow.add_node(name, fn)
 
-workflow.set_entry_point("supervisor_agent")
+    workflow.set_entry_point("supervisor_agent")
 
-workflow.add_conditional_edges(
-    "supervisor_agent",
-    decide_next_agent,
-    {
-        "supervisor_agent": "supervisor_agent",
-        "policy_agent": "policy_agent",
-        "billing_agent": "billing_agent", 
-        "claims_agent": "claims_agent",
-        "human_escalation_agent": "human_escalation_agent",
-        "general_help_agent": "general_help_agent",
-        "final_answer_agent": "final_answer_agent"
-    }
-)
-
-for node in ["policy_agent", "billing_agent", "claims_agent", "general_help_agent"]:
-    workflow.add_edge(node, "supervisor_agent")
-
-workflow.add_edge("final_answer_agent", END)
-workflow.add_edge("human_escalation_agent", END)
+    workflow.add_conditional_edges(
+        "supervisor_agent",
+        decide_next_agent,
+        {
+            "supervisor_agent": "supervisor_agent",
+            "human_input": "human_input",
+            "policy_agent": "policy_agent",
+            "billing_agent": "billing_agent", 
+            "claims_agent": "claims_agent",
+            "human_escalation_agent": "human_escalation_agent",
+            "general_help_agent": "general_help_agent",
+            "final_answer_agent": "final_answer_agent"
+        }
+    )
 
-app = workflow.compile()
+    for node in ["human_input", "general_help_agent"]:
+        workflow.add_edge(node, "supervisor_agent")
+
+    for node in ["policy_agent", "billing_agent", "claims_agent"]:
+        workflow.add_conditional_edges(node, after_specialist, {
+            END: END,
+            "human_input": "human_input",
+            "supervisor_agent": "supervisor_agent",
+        })
+
+    workflow.add_edge("final_answer_agent", END)
+    workflow.add_edge("human_escalation_agent", END)
+    return workflow
+
+
+SYNC_NODES = {
+    "supervisor_agent": supervisor_agent,
+    "human_input": human_input_node,
+    "policy_agent": policy_agent_node,
+    "billing_agent": billing_agent_node,
+    "claims_agent": claims_agent_node,
+    "general_help_agent": general_help_agent_node,
+    "human_escalation_agent": human_escalation_node,
+    "final_answer_agent": final_answer_agent,
+}
+
+# Same graph with coroutine nodes, for app.ainvoke / app.astream callers.
+ASYNC_NODES = {
+    "supervisor_agent": asupervisor_agent,
+    "human_input": ahuman_input_node,
+    "policy_agent": apolicy_agent_node,
+    "billing_agent": abilling_agent_node,
+    "claims_agent": aclaims_agent_node,
+    "general_help_agent": ageneral_help_agent_node,
+    "human_escalation_agent": ahuman_escalation_node,
+    "final_answer_agent": afinal_answer_agent,
+}
+
+
+# ---- Application factory ----
+# Nothing is compiled, connected or registered at import: the graph, its
+# checkpointer, logging, the OpenAI clients and the tracer are all set up on
+# first use, so importing this module (Streamlit reruns, batch workers,
+# tests) stays cheap.
+
+_apps: Dict[str, Any] = {}
+_apps_lock = threading.Lock()
+
+
+def create_app(checkpointer=None):
+    """
+    Compile a new sync graph. Without a checkpointer, one is built from
+    CHECKPOINT_BACKEND: durable per-thread checkpoints; invoke with
+    checkpointing.thread_config(thread_id) and resume pauses with Command(resume=...).
+    """
+    configure_logging()
+    if checkpointer is None:
+        checkpointer = build_checkpointer()
+    return build_workflow(SYNC_NODES).compile(checkpointer=checkpointer)
+
+
+def get_app():
+    """The process-wide sync graph, compiled on first call."""
+    with _apps_lock:
+        if "app" not in _apps:
+            _apps["app"] = create_app()
+        return _apps["app"]
+
+
+def get_async_app():
+    """Checkpoint-free coroutine graph for single-shot runs (load tests, batch jobs)."""
+    with _apps_lock:
+        if "async_app" not in _apps:
+            configure_logging()
+            _apps["async_app"] = build_workflow(ASYNC_NODES).compile()
+        return _apps["async_app"]
+
+
+async def compile_async_app(checkpointer=None):
+    """
+    Coroutine graph with a durable checkpointer. Await it inside the event
+    loop that will run the graph, since async savers bind to that loop; the
+    SQLite saver's connection (`.checkpointer.conn`) should be closed on shutdown.
+    """
+    configure_logging()
+    if checkpointer is None:
+        checkpointer = await abuild_checkpointer()
+    return build_workflow(ASYNC_NODES).compile(checkpointer=checkpointer)
+
+
+def __getattr__(name):
+    # `from agent_app import app` and `agent_app.async_app` keep working; the
+    # graph is compiled on first access rather than at import.
+    if name == "app":
+        return get_app()
+    if name == "async_app":
+        return get_async_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ---- Batch mode ----
+def prefetch_faqs(states):
+    """
+    Retrieve FAQs for many initial states in one batched call and attach
+    them as `faq_results`, so general help skips its own retrieval. Queries
+    that carry a policy, customer or claim ID are left alone, since the
+    supervisor sends those to a specialist.
+    """
+    batch = [s for s in states
+             if s.get("user_input") and not extract_entities(s["user_input"], ENTITY_KEYS)]
+    if not batch:
+        return states
+    queries = [s["user_input"] for s in batch]
+    started = time.perf_counter()
+    embeddings = embed_queries(queries)
+    for state, query, embedding, results in zip(
+        batch, queries, embeddings, search_faqs_batch(queries, n_results=3, query_embeddings=embeddings)
+    ):
+        state["faq_results"] = {"query": query, "embedding": embedding, "results": results}
+    logger.info("📦 Prefetched FAQs for %d/%d queries in %.2fs",
+                len(batch), len(states), time.perf_counter() - started)
+    return states
+
+
+def invoke_batch(states, max_concurrency=None, prefetch=True):
+    """
+    Run many independent conversations through `app`, each on a fresh
+    thread, with FAQ retrieval batched up front. Returns one final state
+    per input, in order; paused runs carry `__interrupt__`.
+    """
+    if prefetch:
+        states = prefetch_faqs([dict(s) for s in states])
+    configs = [thread_config(new_thread_id()) for _ in states]
+    if max_concurrency is not None:
+        for config in configs:
+            config["max_concurrency"] = max_concurrency
+    return get_app().batch(states, configs)
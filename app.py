@@ -1,31 +1,73 @@
+import time
+_rerun_start = time.perf_counter()
+
 import streamlit as st
-from agent_app import app   # your compiled LangGraph app
+from langgraph.types import Command
+from checkpointing import new_thread_id, thread_config
+from conversation import user_turn
+from metrics import histogram, start_metrics_server
+from resources import get_resources
+from retrieval import warm_up_in_background
+
+UI_RERUN_SECONDS = histogram(
+    "ui_rerun_overhead_seconds",
+    "Script time per Streamlit rerun before the user's message is handled",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+# Graph, OpenAI client, DB pool and tracer: built on the first run of the
+# process (st.cache_resource), then shared by every rerun and session.
+resources = get_resources()
+app = resources.get("graph")
+
+# Load the FAQ index and embedding model before the first general-help question.
+# Runs once per process; Streamlit reruns of this script are no-ops.
+warm_up_in_background()
+# Prometheus text metrics on METRICS_HOST:METRICS_PORT, when the port is set.
+start_metrics_server()
 
 st.set_page_config(page_title="AI Insurance Support", page_icon="🏦")
 st.title("🏦 AI Insurance Support Assistant")
 
-# Initialize session state
-if "state" not in st.session_state:
-    st.session_state["state"] = None
-    st.session_state["graph_completed"] = False
-
-if "conversation_history" not in st.session_state:
-    st.session_state["conversation_history"] = ""
-
-if "awaiting_clarification" not in st.session_state:
-    st.session_state["awaiting_clarification"] = False
-
-if "last_question" not in st.session_state:
-    st.session_state["last_question"] = None
+def chat_from_checkpoint(snapshot):
+    """Rebuild the visible chat for a thread restored from its checkpoint."""
+    turns = snapshot.values.get("turns") or []
+    chat = []
+    for i, turn in enumerate(turns):
+        if turn["speaker"] == "user":
+            chat.append(("user", turn["content"]))
+        elif turn["agent"] == "supervisor" and i + 1 < len(turns) and turns[i + 1]["speaker"] == "user":
+            chat.append(("assistant", turn["content"]))  # a clarification question
+    if snapshot.interrupts:
+        chat.append(("assistant", snapshot.interrupts[0].value["question"]))
+    elif snapshot.values.get("final_answer"):
+        chat.append(("assistant", snapshot.values["final_answer"]))
+    return chat
+
+# The graph state lives in the checkpointer, keyed by thread id. The id is
+# kept in the URL so a reload, restart or another worker resumes the thread.
+if "thread_id" not in st.session_state:
+    st.session_state["thread_id"] = st.query_params.get("thread")
 
 # Display chat history
 if "chat_history" not in st.session_state:
-    st.session_state["chat_history"] = []
+    thread_id = st.session_state["thread_id"]
+    st.session_state["chat_history"] = (
+        chat_from_checkpoint(app.get_state(thread_config(thread_id))) if thread_id else []
+    )
 
 for role, msg in st.session_state["chat_history"]:
     with st.chat_message(role):
         st.write(msg)
 
+rerun_sec = time.perf_counter() - _rerun_start
+UI_RERUN_SECONDS.observe(rerun_sec)
+
+with st.sidebar:
+    st.caption(f"Rerun overhead: {1000 * rerun_sec:.1f} ms")
+    if st.button("Check system health"):
+        st.json(resources.health())
+
 # User input box
 user_query = st.chat_input("Ask about your insurance...")
 
@@ -46,57 +88,67 @@ def init_state(user_query: str):
         "payment_method": None,
         "billing_frequency": None,
         "invoice_date": None,
-        "conversation_history": f"User: {user_query}",
+        "turns": [user_turn(user_query)],
         "task": "Help user with their query",
         "final_answer": ""
     }
 
+UI_TIME_TO_FIRST_TOKEN = histogram(
+    "ui_time_to_first_token_seconds",
+    "Time from submitting a message to the first answer token rendered in the UI",
+)
+
+def stream_graph(graph_input, config: dict, result: dict):
+    """
+    Run the graph in streaming mode, yielding answer tokens for st.write_stream.
+    The final graph state is stored in result["state"].
+    """
+    start = time.perf_counter()
+    first_token = True
+    for mode, chunk in app.stream(graph_input, config, stream_mode=["custom", "values"]):
+        if mode == "values":
+            result["state"] = chunk
+        elif isinstance(chunk, dict) and chunk.get("type") == "token":
+            if first_token:
+                UI_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start)
+                first_token = False
+            yield chunk["delta"]
+
+def pending_interrupt(thread_id):
+    if not thread_id:
+        return None
+    interrupts = app.get_state(thread_config(thread_id)).interrupts
+    return interrupts[0] if interrupts else None
+
 if user_query:
     # Show user message in chat
     st.session_state["chat_history"].append(("user", user_query))
     with st.chat_message("user"):
         st.write(user_query)
 
-    # Case 1: This is a NEW question (not a clarification)
-    if not st.session_state["awaiting_clarification"]:
-        # Start fresh graph run
-        st.session_state["state"] = init_state(user_query)
-        st.session_state["graph_completed"] = False
-
+    if pending_interrupt(st.session_state["thread_id"]):
+        # Case 1: the USER'S ANSWER to a clarification resumes the paused thread
+        graph_input = Command(resume=user_query)
     else:
-        # Case 2: This is the USER'S ANSWER to a clarification
-        st.session_state["state"] = {
-            **st.session_state["state"],
-            "needs_clarification": True,
-            "clarification_question": st.session_state["last_question"],
-            "user_clarification": user_query,
-            "user_input": user_query,
-        }
-        st.session_state["awaiting_clarification"] = False
-        st.session_state["last_question"] = None
-
-    # Run the graph ONLY if not already completed
-    if not st.session_state.get("graph_completed", False):
-        try:
-            state = app.invoke(st.session_state["state"])
-            st.session_state["state"] = state
-            
-            # Mark as completed to prevent re-invocation
-            st.session_state["graph_completed"] = True
-            
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
-            st.session_state["graph_completed"] = True
-
-    state = st.session_state["state"]
+        # Case 2: a NEW question starts a fresh thread
+        st.session_state["thread_id"] = new_thread_id()
+        st.query_params["thread"] = st.session_state["thread_id"]
+        graph_input = init_state(user_query)
+
+    config = thread_config(st.session_state["thread_id"])
+    streamed = ""
+    result = {}
+    try:
+        # Answer tokens render as they arrive instead of after the whole run
+        with st.chat_message("assistant"):
+            streamed = st.write_stream(stream_graph(graph_input, config, result))
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
 
     # --- CASE A: Agent needs more info ---
-    if state.get("needs_user_input"):
-        question = state["question"]
-
-        st.session_state["awaiting_clarification"] = True
-        st.session_state["last_question"] = question
-        st.session_state["graph_completed"] = False  # Allow next run
+    interrupt = pending_interrupt(st.session_state["thread_id"])
+    if interrupt:
+        question = interrupt.value["question"]
 
         # Show assistant question in chat
         st.session_state["chat_history"].append(("assistant", question))
@@ -106,14 +158,16 @@ if user_query:
         st.stop()  # wait for user's next message
 
     # --- CASE B: Conversation is done ---
+    state = result.get("state") or {}
     final_answer = state.get("final_answer")
 
     if final_answer:
         st.session_state["chat_history"].append(("assistant", final_answer))
-        with st.chat_message("assistant"):
-            st.write(final_answer)
+        if not streamed:
+            with st.chat_message("assistant"):
+                st.write(final_answer)
     else:
         fallback = "I'm still processing your request. Please continue."
         st.session_state["chat_history"].append(("assistant", fallback))
         with st.chat_message("assistant"):
-            st.write(fallback)
\ No newline at end of file
+            st.write(fallback)
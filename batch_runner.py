@@ -0,0 +1,308 @@
+"""
+Offline batch runner: answer a JSONL file of customer queries through the agent graph.
+
+    python -m batch_runner queries.jsonl --output answers.jsonl --workers 16 --llm-rps 20
+
+Each input line is {"id": ..., "query": ...} ("user_input" is accepted for
+"query"; a missing id falls back to the line number). When the graph pauses
+for a clarification, the answer comes from the row's "clarifications": a
+list answered in order, or an object keyed by the requested info (e.g.
+{"policy number": "POL000123"}). A question with no scripted answer is
+recorded as unresolved rather than waiting for input.
+
+Input is streamed and at most a few conversations per worker are in flight,
+so memory stays flat for large files. Every finished conversation is
+appended to the output at once; re-running with the same output skips the
+ids already there (except errors, which are retried), so an interrupted run resumes where it stopped.
+After a resumed run the output is compacted to the last row per id, so a
+retried error leaves only its new result.
+Throughput and per-node latency are printed at the end.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Clarifications resume paused threads, so the graph needs a checkpointer;
+# threads are deleted once their result is written.
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+
+from langgraph.types import Command
+
+from agent_app import get_app
+from checkpointing import new_thread_id, thread_config
+from conversation import user_turn
+from finalization import finalizer
+from llm_utils import llm_rate_limiter
+from metrics import render_prometheus
+from prefetch import prefetcher
+
+
+DEFAULT_MAX_CLARIFICATIONS = 3
+
+
+# ---- Input / output ----
+
+def read_queries(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row["id"] = str(row.get("id", line_no))
+            row["query"] = row.get("query") or row.get("user_input") or ""
+            yield row
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids already in the output file; errored rows and a torn last line are re-run."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                if row.get("status") != "error":
+                    done.add(str(row["id"]))
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def compact_output(path: str) -> int:
+    """
+    Rewrite the output with only the last row per id, dropping torn lines;
+    returns the number of rows removed. Only ids are held in memory.
+    """
+    last_line: Dict[str, int] = {}
+    n_lines = 0
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            n_lines += 1
+            try:
+                last_line[str(json.loads(line)["id"])] = line_no
+            except (ValueError, KeyError):
+                continue
+    keep = set(last_line.values())
+    if len(keep) == n_lines:
+        return 0
+
+    tmp_path = path + ".tmp"
+    with open(path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+        for line_no, line in enumerate(src):
+            if line_no in keep:
+                dst.write(line if line.endswith("\n") else line + "\n")
+    os.replace(tmp_path, path)
+    return n_lines - len(keep)
+
+
+def _open_output(path: str):
+    out = open(path, "a+", encoding="utf-8")
+    if out.tell():
+        out.seek(out.tell() - 1)
+        if out.read(1) != "\n":
+            out.write("\n")
+    return out
+
+
+# ---- One conversation ----
+
+def initial_state(query: str) -> Dict[str, Any]:
+    return {
+        "n_iteration": 0,
+        "messages": [],
+        "user_input": query,
+        "claim_id": "",
+        "next_agent": "supervisor_agent",
+        "requires_human_escalation": False,
+        "turns": [user_turn(query)],
+        "task": "Help user with their query",
+        "final_answer": "",
+    }
+
+
+def scripted_answer(row: Dict[str, Any], request: Dict[str, Any], asked: int) -> Optional[str]:
+    scripted = row.get("clarifications")
+    if isinstance(scripted, list):
+        return scripted[asked] if asked < len(scripted) else None
+    if isinstance(scripted, dict):
+        wanted = (request.get("missing_info") or "").lower()
+        for key, answer in scripted.items():
+            if key.lower() == wanted:
+                return answer
+    return None
+
+
+def _stream(graph_input, config, node_times: List[Tuple[str, float]]) -> Optional[Dict[str, Any]]:
+    """Run until the graph ends or pauses; returns the pending interrupt, if any."""
+    last = time.perf_counter()
+    pending = None
+    for chunk in get_app().stream(graph_input, config, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in chunk:
+            if node == "__interrupt__":
+                pending = chunk[node][0].value
+            else:
+                node_times.append((node, now - last))
+        last = now
+    return pending
+
+
+def run_conversation(
+    row: Dict[str, Any], max_clarifications: int
+) -> Tuple[Dict[str, Any], List[Tuple[str, float]]]:
+    """Result row for one query, plus (node, seconds) for every node that ran."""
+    app = get_app()
+    config = thread_config(new_thread_id())
+    node_times: List[Tuple[str, float]] = []
+    clarifications: List[Dict[str, str]] = []
+    result = {"id": row["id"], "query": row["query"]}
+    start = time.perf_counter()
+    try:
+        pending = _stream(initial_state(row["query"]), config, node_times)
+        while pending is not None:
+            answer = scripted_answer(row, pending, len(clarifications))
+            if answer is None or len(clarifications) >= max_clarifications:
+                break
+            clarifications.append({"question": pending.get("question"), "answer": answer})
+            pending = _stream(Command(resume=answer), config, node_times)
+
+        values = app.get_state(config).values
+        if pending is not None:
+            result.update(status="unresolved", unresolved_question=pending.get("question"),
+                          missing_info=pending.get("missing_info"))
+        elif values.get("requires_human_escalation"):
+            result["status"] = "escalated"
+        else:
+            result["status"] = "answered"
+        result["final_answer"] = values.get("final_answer")
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    finally:
+        if app.checkpointer is not None:
+            app.checkpointer.delete_thread(config["configurable"]["thread_id"])
+        prefetcher.close(config["configurable"]["thread_id"])
+
+    result["clarifications"] = clarifications
+    result["latency_sec"] = round(time.perf_counter() - start, 4)
+    result["node_latency_sec"] = {}
+    for node, seconds in node_times:
+        result["node_latency_sec"][node] = round(result["node_latency_sec"].get(node, 0.0) + seconds, 4)
+    return result, node_times
+
+
+# ---- Runner ----
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def print_summary(n: int, elapsed: float, statuses: Dict[str, int], latencies: List[float],
+                  node_latencies: Dict[str, List[float]]) -> None:
+    print(f"\n✅ {n} conversations in {elapsed:.1f}s ({n / elapsed if elapsed else 0:.2f} conv/s)")
+    print("   " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    if latencies:
+        print(f"   conversation latency p50 {statistics.median(latencies):.2f}s, "
+              f"p95 {_percentile(latencies, 0.95):.2f}s")
+    if llm_rate_limiter.rate:
+        print(f"   LLM rate limit {llm_rate_limiter.rate:g}/s, {llm_rate_limiter.waited_sec:.1f}s spent waiting")
+    prefetch = prefetcher.get_stats()
+    if prefetch["started"]:
+        print(f"   prefetch: {prefetch['hits']} of {prefetch['started']} lookups used by specialists "
+              f"(hit rate {prefetch['hit_rate']:.0%}, {prefetch['wasted']} wasted)")
+    finals = finalizer.get_stats()
+    if finals["total"]:
+        print(f"   final answers: {finals['pass_through']} passed through, {finals['template']} templated, "
+              f"{finals['llm']} rewritten ({finals['llm_avoided_rate']:.0%} without an LLM call)")
+    if node_latencies:
+        print(f"\n{'node':<26}{'calls':>8}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}{'total s':>10}")
+        for node, values in sorted(node_latencies.items(), key=lambda item: -sum(item[1])):
+            print(f"{node:<26}{len(values):>8}{statistics.mean(values):>9.3f}"
+                  f"{statistics.median(values):>9.3f}{_percentile(values, 0.95):>9.3f}{sum(values):>10.1f}")
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    workers: int = 8,
+    max_clarifications: int = DEFAULT_MAX_CLARIFICATIONS,
+    limit: Optional[int] = None,
+) -> Dict[str, int]:
+    """Answer every query in `input_path` not yet in `output_path`; returns counts by status."""
+    resumed = os.path.exists(output_path)
+    done = completed_ids(output_path)
+    if done:
+        print(f"⏩ Skipping {len(done)} queries already in {output_path}")
+
+    statuses: Dict[str, int] = defaultdict(int)
+    latencies: List[float] = []
+    node_latencies: Dict[str, List[float]] = defaultdict(list)
+    submitted = 0
+    start = time.perf_counter()
+
+    with _open_output(output_path) as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+
+        def drain(return_when):
+            nonlocal in_flight
+            finished, in_flight = wait(in_flight, return_when=return_when)
+            for future in finished:
+                result, node_times = future.result()
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                statuses[result["status"]] += 1
+                latencies.append(result["latency_sec"])
+                for node, seconds in node_times:
+                    node_latencies[node].append(seconds)
+
+        for row in read_queries(input_path):
+            if row["id"] in done:
+                continue
+            if limit is not None and submitted >= limit:
+                break
+            in_flight.add(executor.submit(run_conversation, row, max_clarifications))
+            submitted += 1
+            if len(in_flight) >= 2 * workers:
+                drain(FIRST_COMPLETED)
+        if in_flight:
+            drain(ALL_COMPLETED)
+
+    if resumed and submitted:
+        removed = compact_output(output_path)
+        if removed:
+            print(f"🧹 Dropped {removed} superseded rows from {output_path}")
+
+    print_summary(submitted, time.perf_counter() - start, statuses, latencies, node_latencies)
+    return dict(statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("--output", required=True, help="JSONL results file (appended to, and used to resume)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--llm-rps", type=float, default=None,
+                        help="max LLM requests per second (default: LLM_RATE_LIMIT_RPS)")
+    parser.add_argument("--llm-burst", type=int, default=1)
+    parser.add_argument("--max-clarifications", type=int, default=DEFAULT_MAX_CLARIFICATIONS)
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many new queries")
+    parser.add_argument("--metrics-out", default=None,
+                        help="write per-node metrics here in Prometheus text format when done")
+    args = parser.parse_args()
+
+    if args.llm_rps is not None:
+        llm_rate_limiter.configure(args.llm_rps, args.llm_burst)
+    run_batch(args.input, args.output, args.workers, args.max_clarifications, args.limit)
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+FAQ retrieval throughput: one query at a time versus batched calls.
+
+    python -m benchmarks.bench_batch_retrieval --queries 256 --batch-sizes 8 32 128
+
+"single" calls retrieval.search_faqs once per query, as general_help_agent_node
+does. "batch N" sends N queries per retrieval.search_faqs_batch call, as
+agent_app.prefetch_faqs does for invoke_batch: one embedding call, one
+Chroma query and one re-ranker pass per batch. Queries are sampled FAQ
+questions; run with FAQ_RETRIEVAL_MODE=vector to time the vector index alone.
+Requires chromadb and an ingested collection.
+"""
+import argparse
+import random
+import time
+
+import retrieval
+
+
+def sample_queries(n, seed=7):
+    rng = random.Random(seed)
+    questions = [(meta or {}).get("question", "") for _, meta, _ in retrieval._iter_collection()]
+    return [rng.choice(questions) for _ in range(n)]
+
+
+def run_single(queries):
+    start = time.perf_counter()
+    results = [retrieval.search_faqs(q) for q in queries]
+    return time.perf_counter() - start, results
+
+
+def run_batched(queries, batch_size):
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(queries), batch_size):
+        results.extend(retrieval.search_faqs_batch(queries[i:i + batch_size]))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 128])
+    args = parser.parse_args()
+
+    retrieval.warm_up()
+    queries = sample_queries(args.queries)
+    print(f"{len(queries)} queries, mode={retrieval.FAQ_RETRIEVAL_MODE}")
+
+    elapsed, baseline = run_single(queries)
+    single_qps = len(queries) / elapsed
+    print(f"{'mode':<12}{'seconds':>10}{'queries/s':>12}{'speedup':>10}{'same top-3':>12}")
+    print(f"{'single':<12}{elapsed:>10.2f}{single_qps:>12.1f}{1.0:>9.1f}x{'-':>12}")
+
+    for size in args.batch_sizes:
+        elapsed, results = run_batched(queries, size)
+        qps = len(queries) / elapsed
+        same = sum(a["ids"] == b["ids"] for a, b in zip(baseline, results)) / len(queries)
+        print(f"{f'batch {size}':<12}{elapsed:>10.2f}{qps:>12.1f}{qps / single_qps:>9.1f}x{same:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
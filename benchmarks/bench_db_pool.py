@@ -0,0 +1,77 @@
+"""
+Lookups/sec for the tools.py queries: connect-per-call vs the shared pool.
+
+    python -m benchmarks.bench_db_pool --policies 5000 --lookups 5000 --threads 8
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import db_access
+from benchmarks.common import build_synthetic_db
+
+
+QUERIES = [
+    db_access.POLICY_DETAILS_SQL,
+    db_access.BILLING_BY_POLICY_SQL,
+    db_access.CLAIMS_BY_POLICY_SQL,
+    db_access.PAYMENT_HISTORY_SQL,
+    db_access.AUTO_POLICY_DETAILS_SQL,
+]
+
+
+def connect_per_call(db_path, sql, params):
+    # Mirrors the original tools.py pattern.
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def run(label, lookup, workload, threads):
+    start = time.perf_counter()
+    if threads <= 1:
+        for sql, params in workload:
+            lookup(sql, params)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as ex:
+            list(ex.map(lambda w: lookup(*w), workload))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {len(workload) / elapsed:>10.0f} lookups/sec  ({elapsed:.3f}s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policies", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        build_synthetic_db(db_path, n_policies=args.policies)
+
+        rng = random.Random(0)
+        workload = [
+            (rng.choice(QUERIES), (f"POL{rng.randrange(args.policies):06d}",))
+            for _ in range(args.lookups)
+        ]
+
+        pool = db_access.ConnectionPool(db_path=db_path, max_size=args.threads)
+        for threads in (1, args.threads):
+            base = run(f"connect-per-call (threads={threads})",
+                       lambda s, p: connect_per_call(db_path, s, p), workload, threads)
+            pooled = run(f"pooled (threads={threads})", pool.fetchall, workload, threads)
+            print(f"{'speedup':<32} {base / pooled:>10.2f}x\n")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
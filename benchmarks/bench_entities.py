@@ -0,0 +1,80 @@
+"""
+Supervisor entity extraction per pass: full-history re.search vs incremental scanning.
+
+Each pass appends a user/specialist exchange and then extracts IDs and the
+last specialist message, as the supervisor does. The history never mentions
+a claim ID, so the full-history version rescans everything on every pass.
+
+    python -m benchmarks.bench_entities --turns 500
+"""
+import argparse
+import re
+import time
+
+from conversation import assistant_turn, is_specialist, user_turn
+from entity_extractor import scan_new_turns
+
+ANSWER = ("Your current premium for policy POL000123 is $182.40 billed monthly. The next "
+          "payment of $182.40 is due on 2025-02-01 and your last payment was received on "
+          "2025-01-01 by card.\nLet me know if there is anything else I can help with.")
+
+
+def full_history_pass(state):
+    turns = state["turns"]
+    conversation_text = "\n".join(t["content"] for t in turns)
+    found = {}
+    for key, pattern in (("policy_number", r'POL\d{6}'),
+                         ("customer_id", r'CUST\d{5}'),
+                         ("claim_id", r'CLM\d{6}')):
+        m = re.search(pattern, conversation_text)
+        if m:
+            found[key] = m.group()
+    last = ""
+    for turn in reversed(turns):
+        if is_specialist(turn):
+            last = turn["content"].split("\n")[0].strip().lower()
+            break
+    return found, last
+
+
+def incremental_pass(state):
+    state.update(scan_new_turns(state))
+    index = state["last_specialist_index"]
+    last = state["turns"][index]["content"].split("\n", 1)[0].strip().lower() if index >= 0 else ""
+    return state["entities"], last
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    old_state = {"turns": []}
+    new_state = {"turns": []}
+    old_time = new_time = 0.0
+
+    for i in range(args.turns):
+        new = [user_turn(f"Question {i} from CUST{i % 100000:05d}: what is my premium?"),
+               assistant_turn(ANSWER, "billing_agent")]
+        old_state["turns"] = old_state["turns"] + new
+        new_state["turns"] = new_state["turns"] + new
+
+        start = time.perf_counter()
+        old = full_history_pass(old_state)
+        old_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        incremental = incremental_pass(new_state)
+        new_time += time.perf_counter() - start
+
+        assert old == incremental, (i, old, incremental)
+
+    for label, elapsed in (("full-history re.search", old_time), ("incremental scan", new_time)):
+        print(f"{label:<24} {1000 * elapsed:9.2f} ms total   "
+              f"{1e6 * elapsed / args.turns:8.1f} µs/pass")
+    print(f"{'speedup':<24} {old_time / new_time:.1f}x over {args.turns} passes "
+          f"({2 * args.turns} turns)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+LLM calls per conversation and final-answer strategies under each
+FINALIZATION_POLICY.
+
+    python -m benchmarks.bench_finalization --conversations 20 --fake-llm-latency 0.3
+
+Runs billing, claim status and coverage questions through the tool-loop
+specialists with the fake LLM. One billing question gives no policy
+number, so the graph asks for it and the answer resumes the run; the
+template is still chosen from the original question. Most fake specialist replies are short,
+clean statements, so with "pass_through" they go out unchanged. A reply
+that asks the customer a question falls through to the template or the
+LLM. With "template,llm" the billing and claim status questions are
+answered from the records where they exist, and the rest fall back to
+the LLM rewrite.
+"llm" is the previous always-rewrite behaviour.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("OPEN_AI_KEY", "bench")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+# Trace only on request (TRACING_ENABLED=1): with no collector, span export dominates the timings.
+os.environ.setdefault("TRACING_ENABLED", "0")
+os.environ.setdefault("LOG_FILE", "")
+
+from benchmarks.bench_specialist_modes import run_conversation
+from benchmarks.common import build_synthetic_db
+from benchmarks.fake_llm import install_fake_clients
+
+QUERIES = [
+    "When is my payment due? My policy is POL{i:06d}",
+    "What is the status of claim CLM{i:04d}00?",
+    "What does my policy cover? My policy is POL{i:06d}",
+    "When is my next payment due?",
+]
+POLICIES = ["llm", "template,llm", "pass_through,template,llm"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--fake-llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    import db_access
+    tmp = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_synthetic_db(os.path.join(tmp, "bench.db"), n_policies=args.conversations)
+    db_access.configure_pool(os.path.join(tmp, "bench.db"))
+
+    import agent_app
+    from finalization import build_finalizer_from_env
+    from prefetch import prefetcher
+    prefetcher.enabled = False
+    app = agent_app.get_app()
+    counter = install_fake_clients(args.fake_llm_latency)
+
+    print(f"{args.conversations} conversations per question, fake LLM {args.fake_llm_latency}s per call\n")
+    print(f"{'FINALIZATION_POLICY':<28}{'LLM calls':>10}{'mean s':>9}{'avoided':>9}   strategies")
+    for policy in POLICIES:
+        os.environ["FINALIZATION_POLICY"] = policy
+        agent_app.finalizer = build_finalizer_from_env()
+        calls_before = counter.calls
+        latencies = []
+        for i in range(args.conversations):
+            for template in QUERIES:
+                start = time.perf_counter()
+                run_conversation(app, template.format(i=i), f"POL{i:06d}")
+                latencies.append(time.perf_counter() - start)
+        stats = agent_app.finalizer.get_stats()
+        calls = (counter.calls - calls_before) / len(latencies)
+        print(f"{policy:<28}{calls:>10.2f}{statistics.mean(latencies):>9.2f}{stats['llm_avoided_rate']:>9.0%}   "
+              f"pass_through {stats['pass_through']}, template {stats['template']}, llm {stats['llm']}")
+
+
+if __name__ == "__main__":
+    main()
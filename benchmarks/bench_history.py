@@ -0,0 +1,57 @@
+"""
+Prompt history size per turn: full string concatenation vs the bounded turn log.
+
+    python -m benchmarks.bench_history --turns 50
+"""
+import argparse
+import time
+
+from conversation import (
+    assistant_turn,
+    compact_history,
+    count_tokens,
+    format_turn,
+    render_history,
+    user_turn,
+)
+
+ANSWER = ("Your current premium for policy POL000123 is $182.40 billed monthly. The next "
+          "payment of $182.40 is due on 2025-02-01 and your last payment was received on "
+          "2025-01-01 by card. Let me know if there is anything else I can help with.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    history = ""
+    state = {"turns": []}
+    old_tokens, new_tokens = [], []
+    old_time = new_time = 0.0
+
+    for i in range(args.turns):
+        new = [user_turn(f"Question {i}: what is my premium and when is it due?"),
+               assistant_turn(ANSWER, "billing_agent")]
+
+        start = time.perf_counter()
+        for turn in new:
+            history += ("\n" if history else "") + format_turn(turn)
+        old_tokens.append(count_tokens(history))
+        old_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        state["turns"] = state["turns"] + new
+        state.update(compact_history(state))
+        new_tokens.append(count_tokens(render_history(state)))
+        new_time += time.perf_counter() - start
+
+    for label, series, elapsed in (("string concatenation", old_tokens, old_time),
+                                   ("bounded turn log", new_tokens, new_time)):
+        print(f"{label:<22} last prompt history {series[-1]:>6} tokens   "
+              f"total sent {sum(series):>8} tokens   build time {1000 * elapsed:7.2f} ms")
+    print(f"{'reduction':<22} {1 - sum(new_tokens) / sum(old_tokens):.1%} of history tokens over {args.turns} turns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Fast-path router hit rate, accuracy and classification latency on a labeled query set.
+
+    python -m benchmarks.bench_intent_router [--queries labeled.jsonl]
+
+The query file is JSONL with "text" and "agent" fields (agent null for queries
+that should defer to the LLM); a small built-in set is used when none is given.
+"""
+import argparse
+import json
+import time
+
+from intent_router import IntentRouter
+
+
+SAMPLE_QUERIES = [
+    ("how much is my monthly premium", "billing_agent"),
+    ("when is my next bill due?", "billing_agent"),
+    ("can you show my last payments", "billing_agent"),
+    ("what's the balance on my account", "billing_agent"),
+    ("what is my comprehensive deductible", "policy_agent"),
+    ("which car is listed on my policy", "policy_agent"),
+    ("does my policy cover rental cars", "policy_agent"),
+    ("what is the status of claim CLM000123", "claims_agent"),
+    ("I was in an accident and want to file a claim", "claims_agent"),
+    ("what is whole life insurance", "general_help_agent"),
+    ("how does car insurance work", "general_help_agent"),
+    ("is renters insurance worth it", "general_help_agent"),
+    ("get me a real person please", "human_escalation_agent"),
+    ("my policy number is POL000004", None),  # no intent: should defer to the LLM
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries")
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries) as f:
+            labeled = [(r["text"], r["agent"]) for r in map(json.loads, f) if r]
+    else:
+        labeled = SAMPLE_QUERIES
+
+    router = IntentRouter()
+
+    correct = 0
+    start = time.perf_counter()
+    for text, expected in labeled:
+        decision = router.classify(text)
+        if decision and decision["next_agent"] == expected:
+            correct += 1
+    elapsed = time.perf_counter() - start
+
+    stats = router.get_stats()
+    print(f"queries:            {len(labeled)}")
+    print(f"fast-path hit rate: {stats['hit_rate']:.1%}")
+    print(f"accuracy on hits:   {correct / stats['hits']:.1%}" if stats["hits"] else "accuracy on hits:   n/a")
+    print(f"classify latency:   {1000 * elapsed / len(labeled):.3f} ms/query")
+    print(f"LLM time saved:     {stats['latency_saved_sec']:.2f}s "
+          f"(~{stats['latency_saved_per_request_sec']:.2f}s/request at {stats['avg_llm_latency_sec']:.2f}s per routing call)")
+
+
+if __name__ == "__main__":
+    main()
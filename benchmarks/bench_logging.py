@@ -0,0 +1,204 @@
+"""
+Per-request logging overhead: the old print()/f-string/synchronous-handler
+pattern versus logging_setup (lazy arguments, sampled payloads, queue handler).
+
+    python -m benchmarks.bench_logging --requests 2000 --turns 20
+
+Part 1 replays the log traffic of one billing request, as the nodes emitted
+it before and as they emit it now, against real files in a temp directory.
+Part 2 runs the graph itself (fake LLM, no latency) with the current call
+sites, once with the handlers attached directly to the root logger and once
+behind logging_setup's queue, to isolate the cost of handler I/O on the
+request path.
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPEN_AI_KEY", "bench")
+os.environ.setdefault("CHECKPOINT_BACKEND", "none")
+# Trace only on request (TRACING_ENABLED=1): with no collector, span export dominates the timings.
+os.environ.setdefault("TRACING_ENABLED", "0")
+
+import logging_setup
+from logging_setup import payload, state_summary
+
+FORMAT = logging_setup.LOG_FORMAT_TEXT
+
+
+def make_state(turns):
+    history = [{"speaker": "user" if i % 2 == 0 else "assistant", "agent": "billing_agent",
+                "content": f"Message {i} about policy POL{i:06d} and its billing schedule " * 3}
+               for i in range(turns)]
+    return {
+        "user_input": "When is my next payment due for POL000123?",
+        "task": "Retrieve billing information",
+        "policy_number": "POL000123",
+        "customer_id": "CUST00042",
+        "turns": history,
+        "messages": [("user", t["content"]) for t in history],
+        "n_iteration": 1,
+        "final_answer": "Your next payment of $123.45 is due on 2025-02-01." * 4,
+    }
+
+
+def render(state):
+    return "\n".join(f"{t['speaker'].title()}: {t['content']}" for t in state["turns"])
+
+
+def legacy_request(log, state):
+    """What a billing request logged before: prints, eager f-strings, INFO on every step."""
+    print("---SUPERVISOR AGENT---")
+    print(f"🔢 Supervisor iteration: {state['n_iteration']}")
+    print(f"⚡ Fast-path routing to: billing_agent (rules, confidence 1.00, hit rate 90%, ~1.00s saved)")
+    print("---BILLING AGENT---")
+    print("TASK: ", state.get("task"))
+    print("USER QUERY: ", state.get("user_input"))
+    print("CONVERSATION HISTORY: ", render(state))
+    print("🔄 Processing billing request...")
+    log.debug(f"Billing agent state: { {k: v for k, v in state.items() if k != 'messages'} }")
+    log.info(f"🧮 billing_agent prompt tokens: {len(render(state)) // 4}")
+    print("Initial LLM Response:", {"content": None, "tool_calls": [{"name": "get_billing_info",
+                                                                      "arguments": {"policy_number": "POL000123"}}]})
+    log.info(f"🔍 Fetching billing info - Policy: {state['policy_number']}, Customer: {state['customer_id']}")
+    log.info("✅ Billing info found")
+    print("✅ Billing agent completed")
+    print("---SUPERVISOR AGENT---")
+    print(f"🔢 Supervisor iteration: {state['n_iteration'] + 1}")
+    print("✅ Question appears to be answered → routing to final_answer_agent")
+    print("✅ Routing to final_answer_agent")
+    print("---FINAL ANSWER AGENT---")
+    log.info("🎯 Final answer agent started")
+    log.info(f"🧮 final_answer_agent prompt tokens: {len(render(state)) // 4}")
+    print("🤖 Generating final summary...")
+    print(f"✅ Final answer: {state['final_answer']}")
+
+
+def current_request(log, state):
+    """The same request with the current call sites."""
+    log.debug("---SUPERVISOR AGENT---")
+    log.debug("🔢 Supervisor iteration: %d", state["n_iteration"])
+    log.info("⚡ Fast-path routing to: %s (%s, confidence %.2f, hit rate %.0f%%, ~%.2fs saved)",
+             "billing_agent", "rules", 1.0, 90.0, 1.0)
+    log.info("💳 Billing agent started")
+    log.debug("Billing agent request", extra=payload(lambda: {
+        "task": state.get("task"), "user_query": state.get("user_input"), "conversation_history": render(state),
+    }))
+    log.debug("🔄 Processing billing request...")
+    log.debug("Billing agent state", extra=payload(lambda: state_summary(state)))
+    log.debug("🧮 %s prompt tokens: %d", "billing_agent", 1000)
+    log.debug("Initial LLM response: %d tool calls", 1)
+    log.debug("🔍 Fetching billing info - Policy: %s, Customer: %s", state["policy_number"], state["customer_id"])
+    log.debug("✅ Billing info found")
+    log.info("✅ Billing agent completed")
+    log.debug("---SUPERVISOR AGENT---")
+    log.debug("🔢 Supervisor iteration: %d", state["n_iteration"] + 1)
+    log.info("✅ Question appears to be answered → routing to final_answer_agent")
+    log.info("✅ Routing to final_answer_agent")
+    log.debug("---FINAL ANSWER AGENT---")
+    log.info("🎯 Final answer agent started")
+    log.debug("🧮 %s prompt tokens: %d", "final_answer_agent", 1000)
+    log.debug("🤖 Generating final summary...")
+    log.info("✅ Final answer ready (%d chars)", len(state["final_answer"]))
+    log.debug("Final answer", extra=payload(lambda: state["final_answer"]))
+
+
+def direct_handlers(tmp):
+    """Root logger writing straight to console and file, as tools.py used to configure it."""
+    logging_setup.flush_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in (logging.StreamHandler(sys.stderr), logging.FileHandler(os.path.join(tmp, "direct.log"))):
+        handler.setFormatter(logging.Formatter(FORMAT))
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def queued_handlers(tmp):
+    logging_setup.configure_logging(level="INFO", fmt="text", log_file=os.path.join(tmp, "queued.log"), force=True)
+
+
+def json_handlers(tmp):
+    logging_setup.configure_logging(level="INFO", fmt="json", log_file=os.path.join(tmp, "json.log"), force=True)
+
+
+def time_requests(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+def replay(args, tmp):
+    state = make_state(args.turns)
+    log = logging.getLogger("bench")
+    variants = [
+        ("before: print + f-strings, sync handlers", direct_handlers, legacy_request),
+        ("current call sites, sync handlers", direct_handlers, current_request),
+        ("current call sites, queue handler", queued_handlers, current_request),
+        ("current call sites, queue handler, JSON", json_handlers, current_request),
+    ]
+    print(f"\n1) Replayed log traffic per request ({args.requests} requests, {args.turns} turns of history)")
+    with open(os.path.join(tmp, "stdout.txt"), "w") as stdout:
+        for label, setup, request in variants:
+            setup(tmp)
+            with contextlib.redirect_stdout(stdout):
+                per_request = time_requests(lambda: request(log, state), args.requests)
+            logging_setup.flush_logging()   # drain the queue before the next variant
+            print(f"   {label:<44} {1e6 * per_request:9.1f} µs/request")
+
+
+def graph(args, tmp):
+    from benchmarks.common import build_synthetic_db
+    from benchmarks.fake_llm import install_fake_clients
+    from benchmarks.load_test import initial_state
+    import db_access
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_synthetic_db(os.path.join(tmp, "bench.db"), n_policies=200)
+    db_access.configure_pool(os.path.join(tmp, "bench.db"), max_size=2)
+    import agent_app
+    agent_app.get_app()   # compile now: building the app configures logging_setup's queue
+    install_fake_clients(0.0)
+
+    states = [initial_state(i, 200) for i in range(args.graph_requests)]
+    print(f"\n2) Graph requests with the current call sites ({args.graph_requests} requests, fake LLM)")
+    for label, setup in (("handlers on the request path", direct_handlers), ("queue handler", queued_handlers)):
+        setup(tmp)
+        agent_app.app.invoke(states[0])   # warm caches and lazy imports
+        start = time.perf_counter()
+        for state in states:
+            agent_app.app.invoke(state)
+        per_request = (time.perf_counter() - start) / len(states)
+        logging_setup.flush_logging()
+        print(f"   {label:<44} {1e3 * per_request:9.2f} ms/request")
+    logging_setup.flush_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--graph-requests", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    # Console output goes to a real file so its cost is counted but not shown.
+    real_stderr = sys.stderr
+    with open(os.path.join(tmp, "stderr.txt"), "w") as stderr:
+        sys.stderr = stderr
+        try:
+            replay(args, tmp)
+            graph(args, tmp)
+        finally:
+            sys.stderr = real_stderr
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Speculative customer-context prefetch: specialist latency and LLM calls
+with and without prefetch.
+
+    python -m benchmarks.bench_prefetch --conversations 60 --fake-llm-latency 0.2 --db-latency 0.02
+
+Runs the billing and policy queries of load_test through the graph with the
+fake LLM, once with prefetch.prefetcher disabled (the specialist asks for a
+tool call, runs it, then answers) and once enabled (the lookups start in
+the supervisor and the specialist answers from them). --db-latency adds a
+sleep to every DB query to stand in for a remote database. The tool cache
+is cleared before each run and every conversation uses its own policy, so
+neither run is served from the other's lookups.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("OPEN_AI_KEY", "bench")
+os.environ.setdefault("CHECKPOINT_BACKEND", "none")
+# Trace only on request (TRACING_ENABLED=1): with no collector, span export dominates the timings.
+os.environ.setdefault("TRACING_ENABLED", "0")
+
+from benchmarks.common import build_synthetic_db
+from benchmarks.fake_llm import install_fake_clients
+from benchmarks.load_test import QUERIES
+from conversation import user_turn
+
+
+def initial_state(i):
+    # Only the billing and policy queries; the supervisor fast-paths both.
+    query = QUERIES[1 + i % 2].format(pol=f"POL{i:06d}")
+    return {
+        "n_iteration": 0,
+        "messages": [],
+        "user_input": query,
+        "claim_id": "",
+        "next_agent": "supervisor_agent",
+        "requires_human_escalation": False,
+        "turns": [user_turn(query)],
+        "task": "Help user with their query",
+        "final_answer": "",
+    }
+
+
+def slow_db(pool, delay):
+    for name in ("fetchone", "fetchall"):
+        fetch = getattr(pool, name)
+
+        def delayed(*args, _fetch=fetch, **kwargs):
+            time.sleep(delay)
+            return _fetch(*args, **kwargs)
+        setattr(pool, name, delayed)
+
+
+def run(app, states, counter):
+    calls_before = counter.calls
+    latencies = []
+    for state in states:
+        start = time.perf_counter()
+        app.invoke(state)
+        latencies.append(time.perf_counter() - start)
+    return latencies, (counter.calls - calls_before) / len(states)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=60)
+    parser.add_argument("--fake-llm-latency", type=float, default=0.2)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    import db_access
+    tmp = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_synthetic_db(os.path.join(tmp, "bench.db"), n_policies=2 * args.conversations)
+    slow_db(db_access.configure_pool(os.path.join(tmp, "bench.db")), args.db_latency)
+
+    import agent_app
+    from prefetch import prefetcher
+    from tools import tool_cache
+    counter = install_fake_clients(args.fake_llm_latency)
+
+    print(f"{args.conversations} conversations, fake LLM {args.fake_llm_latency}s, DB {args.db_latency}s per query\n")
+    print(f"{'prefetch':<10}{'mean s':>9}{'p50 s':>9}{'LLM calls/conv':>16}")
+    for enabled, offset in ((False, 0), (True, args.conversations)):
+        prefetcher.enabled = enabled
+        tool_cache.clear()
+        states = [initial_state(offset + i) for i in range(args.conversations)]
+        latencies, calls = run(agent_app.app, states, counter)
+        print(f"{'on' if enabled else 'off':<10}{statistics.mean(latencies):>9.3f}"
+              f"{statistics.median(latencies):>9.3f}{calls:>16.2f}")
+
+    stats = prefetcher.get_stats()
+    print(f"\nprefetch: {stats['started']} lookups started, {stats['hits']} used by a specialist, "
+          f"{stats['wasted'] + stats['pending_unused']} never used, hit rate {stats['hit_rate']:.0%}, "
+          f"avg wait {stats['avg_wait_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
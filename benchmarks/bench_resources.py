@@ -0,0 +1,82 @@
+"""
+Per-rerun cost of obtaining the heavy objects: rebuilt every rerun versus
+held by the resource layer (resources.get_resources).
+
+    python -m benchmarks.bench_resources --reruns 50
+
+"first run" is the cold get_resources() call of a fresh process, split by
+resource. "rebuilt per rerun" compiles a new graph, opens a new DB pool and
+constructs a new OpenAI client on every rerun, as a script without cached
+resources would. "resource layer" is what app.py now does on each rerun.
+A shallow health() check is timed as well. The OpenAI client is only
+constructed, never called, so no API key or network is needed.
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPEN_AI_KEY", "bench")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+# Trace only on request (TRACING_ENABLED=1): with no collector, span export dominates the timings.
+os.environ.setdefault("TRACING_ENABLED", "0")
+os.environ.setdefault("LOG_FILE", "")
+
+
+def rebuild_everything():
+    from openai import OpenAI
+
+    from agent_app import create_app
+    from db_access import ConnectionPool
+    from env_loader import get_tracer, require_openai_key
+
+    app = create_app()
+    pool = ConnectionPool(max_size=1)
+    pool.fetchone("SELECT 1")
+    pool.close()
+    OpenAI(api_key=require_openai_key())
+    get_tracer()
+    return app
+
+
+def via_resources():
+    from resources import get_resources
+
+    return get_resources().get("graph")
+
+
+def time_reruns(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    from resources import get_resources
+    resources = get_resources()
+    print(f"first run: {time.perf_counter() - start:.2f}s (imports included)")
+    for name, seconds in resources.get_stats()["build_sec"].items():
+        print(f"   {name:<16} {1000 * seconds:8.1f} ms")
+
+    print(f"\n{'per rerun':<22}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for label, fn in (("rebuilt per rerun", rebuild_everything), ("resource layer", via_resources)):
+        samples = time_reruns(fn, args.reruns)
+        print(f"{label:<22}{1000 * statistics.mean(samples):>10.3f}"
+              f"{1000 * statistics.median(samples):>10.3f}{1000 * max(samples):>10.3f}")
+
+    samples = time_reruns(resources.health, 10)
+    print(f"\nshallow health check: {1000 * statistics.median(samples):.2f} ms")
+    for name, entry in resources.health().items():
+        print(f"   {name:<16} {entry['status']:<6} {entry['detail']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+FAQ retrieval cold start: time to open the collection, load the embedding
+model and answer the first and a warm query, each measured in a fresh process.
+
+    python -m benchmarks.bench_retrieval_cold_start --chroma-path ./chroma_db --runs 3
+
+"lazy" opens everything on the first query, as general_help_agent_node does
+without warm-up. "warmed" calls retrieval.warm_up() first, as app.py does at
+worker start, so the first query only pays the query itself. Requires
+chromadb and an ingested collection (the first run ingests it if missing).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+QUERY = "What does comprehensive auto insurance cover?"
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import retrieval
+t_import = time.perf_counter() - t0
+t_warm = 0.0
+if sys.argv[1] == "warmed":
+    t = time.perf_counter(); retrieval.warm_up(); t_warm = time.perf_counter() - t
+t = time.perf_counter(); retrieval.query_faqs(sys.argv[2]); t_first = time.perf_counter() - t
+t = time.perf_counter(); retrieval.query_faqs(sys.argv[2]); t_second = time.perf_counter() - t
+print(json.dumps({"import": t_import, "warm_up": t_warm, "first_query": t_first, "second_query": t_second}))
+"""
+
+
+def run_child(mode, env):
+    out = subprocess.run([sys.executable, "-c", CHILD, mode, QUERY], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chroma-path", default="./chroma_db")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    env = {**os.environ, "CHROMA_PATH": args.chroma_path, "FAQ_WARM_UP": "0"}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    # Make sure the collection exists so ingestion is not part of any timing.
+    run_child("lazy", env)
+
+    for mode in ("lazy", "warmed"):
+        runs = [run_child(mode, env) for _ in range(args.runs)]
+        med = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        print(f"{mode:<7} warm-up {1000 * med['warm_up']:8.1f} ms   "
+              f"first query {1000 * med['first_query']:8.1f} ms   "
+              f"second query {1000 * med['second_query']:7.1f} ms   (median of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
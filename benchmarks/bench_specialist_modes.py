@@ -0,0 +1,110 @@
+"""
+LLM calls and latency per intent: the tool-loop specialists versus the
+single structured call (SPECIALIST_MODE=structured).
+
+    python -m benchmarks.bench_specialist_modes --conversations 20 --fake-llm-latency 0.3
+
+Each intent runs the same queries through the graph with the fake LLM in
+both modes. When the graph pauses for a clarification, the conversation's
+policy number is given as the answer, as a customer would. Prefetch is
+disabled so the tool-loop numbers show the full tool round trip; with
+prefetch on, the tool loop saves one call where the records are ready.
+The "nodes" column lists the nodes of the last conversation in order.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("OPEN_AI_KEY", "bench")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+# Trace only on request (TRACING_ENABLED=1): with no collector, span export dominates the timings.
+os.environ.setdefault("TRACING_ENABLED", "0")
+os.environ.setdefault("LOG_FILE", "")
+
+from langgraph.types import Command
+
+from benchmarks.common import build_synthetic_db
+from benchmarks.fake_llm import install_fake_clients
+from checkpointing import new_thread_id, thread_config
+from conversation import user_turn
+
+INTENTS = {
+    "billing": "When is my payment due? My policy is POL{i:06d}",
+    "claims": "What is the status of claim CLM{i:04d}00?",
+    "policy (customer ID only)": "What does my policy cover? My customer ID is CUST{i:05d}",
+    "billing (no ID)": "When is my next payment due?",
+}
+
+
+def initial_state(query):
+    return {
+        "n_iteration": 0,
+        "messages": [],
+        "user_input": query,
+        "claim_id": "",
+        "next_agent": "supervisor_agent",
+        "requires_human_escalation": False,
+        "turns": [user_turn(query)],
+        "task": "Help user with their query",
+        "final_answer": "",
+    }
+
+
+def run_conversation(app, query, policy_number):
+    config = thread_config(new_thread_id())
+    nodes = []
+    graph_input = initial_state(query)
+    for _ in range(3):
+        paused = False
+        for chunk in app.stream(graph_input, config, stream_mode="updates"):
+            for node in chunk:
+                if node == "__interrupt__":
+                    paused = True
+                else:
+                    nodes.append(node)
+        if not paused:
+            break
+        graph_input = Command(resume=policy_number)
+    app.checkpointer.delete_thread(config["configurable"]["thread_id"])
+    return nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--fake-llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    import db_access
+    tmp = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_synthetic_db(os.path.join(tmp, "bench.db"), n_policies=args.conversations)
+    db_access.configure_pool(os.path.join(tmp, "bench.db"))
+
+    import agent_app
+    from prefetch import prefetcher
+    prefetcher.enabled = False
+    app = agent_app.get_app()
+    counter = install_fake_clients(args.fake_llm_latency)
+
+    print(f"{args.conversations} conversations per intent, fake LLM {args.fake_llm_latency}s per call\n")
+    print(f"{'intent':<28}{'mode':<12}{'LLM calls':>10}{'mean s':>9}   nodes")
+    for intent, template in INTENTS.items():
+        for mode in ("tools", "structured"):
+            agent_app.SPECIALIST_MODE = mode
+            calls_before = counter.calls
+            latencies, nodes = [], []
+            for i in range(args.conversations):
+                start = time.perf_counter()
+                nodes = run_conversation(app, template.format(i=i), f"POL{i:06d}")
+                latencies.append(time.perf_counter() - start)
+            calls = (counter.calls - calls_before) / args.conversations
+            print(f"{intent:<28}{mode:<12}{calls:>10.2f}{statistics.mean(latencies):>9.2f}   {' > '.join(nodes)}")
+
+
+if __name__ == "__main__":
+    main()
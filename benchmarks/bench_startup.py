@@ -0,0 +1,117 @@
+"""
+Startup cost: `python -X importtime` for the entry modules, plus the time to
+the first compiled graph.
+
+    python -m benchmarks.bench_startup --budget-ms 2000
+
+Each measurement runs in a fresh interpreter. For every module the report
+shows its cumulative import time and the heaviest imports beneath it.
+The run fails (exit status 1) if a module imports one of the --forbid
+packages, or if importing agent_app takes longer than --budget-ms. Those
+packages are only needed once a request is served: openai, phoenix,
+numpy, pandas, datasets and chromadb. Run it in CI to catch an eager
+import slipping back in.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULES = ["agent_app", "batch_runner", "tools", "llm_utils", "db_setup"]
+FORBIDDEN = ["openai", "phoenix", "numpy", "pandas", "datasets", "chromadb", "sentence_transformers"]
+
+FIRST_APP = """
+import json, time
+start = time.perf_counter()
+import agent_app
+imported = time.perf_counter()
+agent_app.get_app()
+print(json.dumps({"import": imported - start, "first_app": time.perf_counter() - imported}))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("OPEN_AI_KEY", "bench")
+    env.setdefault("CHECKPOINT_BACKEND", "memory")
+    env.setdefault("TRACING_ENABLED", "0")
+    env.setdefault("LOG_FILE", "")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def importtime(module: str) -> List[Tuple[str, int, int]]:
+    """(module, cumulative µs, depth) for every import in the interpreter, startup included."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=_env())
+    if proc.returncode:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(cumulative), depth))
+    return rows
+
+
+def own_imports(rows: List[Tuple[str, int, int]], module: str) -> List[Tuple[str, int, int]]:
+    """The rows under `module`'s own top-level entry (its line comes after its children)."""
+    end = max(i for i, (name, _, depth) in enumerate(rows) if name == module and depth == 0)
+    start = end
+    while start > 0 and rows[start - 1][2] > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+
+def first_app() -> Dict[str, float]:
+    proc = subprocess.run([sys.executable, "-c", FIRST_APP], capture_output=True, text=True, env=_env())
+    if proc.returncode:
+        raise RuntimeError(f"building the app failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--forbid", nargs="*", default=FORBIDDEN,
+                        help="packages none of the modules may import")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if `import agent_app` takes longer than this")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    agent_app_ms = None
+    for module in args.modules:
+        rows = own_imports(importtime(module), module)
+        total = rows[-1][1] / 1000
+        if module == "agent_app":
+            agent_app_ms = total
+        print(f"\n{module}: {total:.0f} ms")
+        children = sorted((r for r in rows if r[2] in (1, 2)), key=lambda r: -r[1])
+        for name, us, _ in children[:args.top]:
+            print(f"   {us / 1000:8.0f} ms  {name}")
+        loaded = {name.split(".")[0] for name, _, _ in rows}
+        leaked = sorted(set(args.forbid) & loaded)
+        if leaked:
+            failures.append(f"import {module} loads {', '.join(leaked)}")
+
+    timings = first_app()
+    print(f"\nimport agent_app {1000 * timings['import']:.0f} ms, "
+          f"then get_app() {1000 * timings['first_app']:.0f} ms (graph, checkpointer, logging)")
+
+    if args.budget_ms is not None and agent_app_ms is not None and agent_app_ms > args.budget_ms:
+        failures.append(f"import agent_app took {agent_app_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("\n✅ No eager imports of deferred packages")
+
+
+if __name__ == "__main__":
+    main()
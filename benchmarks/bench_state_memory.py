@@ -0,0 +1,138 @@
+"""
+Memory cost of the state updates over a long conversation: tracemalloc
+peaks per graph run, plus what the checkpointer stores.
+
+    python -m benchmarks.bench_state_memory --turns 50 --runs 20
+
+Each run starts a thread whose input already carries a --turns turn
+history (alternating customer questions and answers) plus a new billing
+or claims question. It goes through supervisor, specialist, supervisor
+and final answer with the fake LLM, under tracemalloc. The report shows:
+
+- the traced memory peak per run;
+- the blocks and bytes still allocated after each run, which the
+  checkpointer keeps;
+- the channel blobs the in-memory checkpointer wrote per run.
+
+A node that re-emits an unchanged channel still creates a new version
+and a new blob. The blob counts therefore show what was rewritten.
+
+Most of the peak and retained memory is the input itself. The seeded
+messages are coerced into message objects, and the history is
+checkpointed once. That cost grows with --turns whatever the nodes
+return.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+os.environ.setdefault("OPEN_AI_KEY", "bench")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+# Trace only on request (TRACING_ENABLED=1): with no collector, span export dominates the timings.
+os.environ.setdefault("TRACING_ENABLED", "0")
+os.environ.setdefault("LOG_FILE", "")
+
+from benchmarks.common import build_synthetic_db
+from benchmarks.fake_llm import install_fake_clients
+from checkpointing import new_thread_id, thread_config
+from conversation import assistant_turn, user_turn
+
+QUERIES = [
+    "When is my payment due? My policy is POL{i:06d}",
+    "What is the status of claim CLM{i:04d}00?",
+]
+
+
+def history(n_turns):
+    """A long earlier conversation: customer questions and final answers."""
+    turns, messages = [], []
+    for t in range(n_turns):
+        if t % 2 == 0:
+            turns.append(user_turn(f"Earlier question {t} about my coverage and deductible for the car."))
+        else:
+            answer = (f"Answer {t}: your collision deductible is $500 and your comprehensive deductible "
+                      f"is $250. Rental car coverage is included on this policy.")
+            turns.append(assistant_turn(answer, "final_answer_agent"))
+            messages.append(("assistant", answer))
+    return turns, messages
+
+
+def initial_state(query, n_turns):
+    turns, messages = history(n_turns)
+    return {
+        "n_iteration": 0,
+        "messages": messages,
+        "user_input": query,
+        "claim_id": "",
+        "next_agent": "supervisor_agent",
+        "requires_human_escalation": False,
+        "turns": turns + [user_turn(query)],
+        "task": "Help user with their query",
+        "final_answer": "",
+    }
+
+
+def blob_stats(checkpointer, thread_id):
+    """(blobs per channel, total serialized bytes) stored for the thread."""
+    per_channel, size = Counter(), 0
+    for (tid, _, channel, _), (_, data) in checkpointer.blobs.items():
+        if tid == thread_id and not channel.startswith(("branch:", "__")):
+            per_channel[channel] += 1
+            size += len(data)
+    return per_channel, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50, help="turns of history each run starts with")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    import db_access
+    tmp = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_synthetic_db(os.path.join(tmp, "bench.db"), n_policies=20)
+    db_access.configure_pool(os.path.join(tmp, "bench.db"))
+
+    import agent_app
+    app = agent_app.get_app()
+    install_fake_clients(0)
+
+    peaks, retained, latencies = [], [], []
+    blobs, blob_bytes = Counter(), 0
+    tracemalloc.start()
+    for run in range(args.runs):
+        query = QUERIES[run % len(QUERIES)].format(i=run % 20)
+        graph_input = initial_state(query, args.turns)
+        config = thread_config(new_thread_id())
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        app.invoke(graph_input, config)
+        latencies.append(time.perf_counter() - start)
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+        retained.append(current - baseline)
+        per_channel, size = blob_stats(app.checkpointer, config["configurable"]["thread_id"])
+        blobs.update(per_channel)
+        blob_bytes += size
+    tracemalloc.stop()
+
+    print(f"{args.runs} runs, each with a {args.turns}-turn history\n")
+    print(f"peak traced memory per run: mean {statistics.mean(peaks) / 1024:.0f} KiB, max {max(peaks) / 1024:.0f} KiB")
+    print(f"retained per run (checkpoints): mean {statistics.mean(retained) / 1024:.0f} KiB")
+    print(f"mean run time {1000 * statistics.mean(latencies):.1f} ms")
+    print(f"state channel blobs per run: {sum(blobs.values()) / args.runs:.1f} "
+          f"({blob_bytes / args.runs / 1024:.1f} KiB)")
+    for channel, count in blobs.most_common():
+        print(f"   {channel:<24}{count / args.runs:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import random
+import sqlite3
+from datetime import date, timedelta
+
+
+def build_synthetic_db(db_path: str, n_policies: int = 2000, seed: int = 42, with_migrations: bool = True) -> None:
+    """Create a synthetic insurance_support.db with the production schema."""
+    from db_setup import drop_and_create_tables, migrate
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    drop_and_create_tables(conn)
+
+    today = date(2025, 1, 1)
+    customers, policies, autos, bills, payments, claims = [], [], [], [], [], []
+    for i in range(n_policies):
+        cust = f"CUST{i:05d}"
+        pol = f"POL{i:06d}"
+        customers.append((cust, f"First{i}", f"Last{i}", f"c{i}@example.com", "555-0100", "1980-01-01", "CA"))
+        policies.append((pol, cust, rng.choice(["auto", "home", "life"]), "2023-01-01",
+                         round(rng.uniform(50, 500), 2), "monthly", "active"))
+        autos.append((pol, f"VIN{i:010d}", "Toyota", "Camry", 2020, 100000, 500, 250, 1, 0))
+        for m in range(6):
+            bill = f"BILL{i:06d}{m:02d}"
+            due = today - timedelta(days=30 * m)
+            status = "pending" if m == 0 else "paid"
+            bills.append((bill, pol, str(due - timedelta(days=15)), str(due), policies[-1][4], status))
+            if status == "paid":
+                payments.append((f"PAY{i:06d}{m:02d}", bill, str(due), policies[-1][4],
+                                 "card", f"TX{i}{m}", "completed"))
+        for c in range(rng.randint(0, 3)):
+            claims.append((f"CLM{i:04d}{c:02d}", pol, str(today - timedelta(days=rng.randint(1, 700))),
+                           "collision", round(rng.uniform(500, 9000), 2), "pending"))
+
+    conn.executemany("INSERT INTO customers VALUES (?,?,?,?,?,?,?)", customers)
+    conn.executemany("INSERT INTO policies VALUES (?,?,?,?,?,?,?)", policies)
+    conn.executemany("INSERT INTO auto_policy_details VALUES (?,?,?,?,?,?,?,?,?,?)", autos)
+    conn.executemany("INSERT INTO billing VALUES (?,?,?,?,?,?)", bills)
+    conn.executemany("INSERT INTO payments VALUES (?,?,?,?,?,?,?)", payments)
+    conn.executemany("INSERT INTO claims VALUES (?,?,?,?,?,?)", claims)
+    conn.commit()
+    if with_migrations:
+        migrate(conn)
+    conn.close()
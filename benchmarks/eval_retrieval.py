@@ -0,0 +1,98 @@
+"""
+Offline FAQ retrieval evaluation: recall@k and latency per retrieval mode.
+
+    python -m benchmarks.eval_retrieval --queries heldout.jsonl
+    python -m benchmarks.eval_retrieval --synthetic 300
+
+--queries takes JSONL rows {"query": ..., "relevant_ids": [...]} (or
+"relevant_questions": [...], mapped through retrieval.faq_id). Without it,
+--synthetic N builds a held-out set from N sampled FAQs by dropping a third
+of each question's words, so no query matches an indexed text exactly.
+Modes: vector, bm25, hybrid, and hybrid+rerank when FAQ_RERANK_MODEL is set.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import retrieval
+from bm25 import tokenize
+
+KS = (1, 3, 5, 10)
+
+
+def load_queries(path):
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            relevant = set(row.get("relevant_ids") or [])
+            relevant |= {retrieval.faq_id(q) for q in row.get("relevant_questions") or []}
+            queries.append((row["query"], relevant))
+    return queries
+
+
+def synthetic_queries(n, seed=7):
+    rng = random.Random(seed)
+    faqs = [(doc_id, (meta or {}).get("question", "")) for doc_id, meta, _ in retrieval._iter_collection()]
+    queries = []
+    for doc_id, question in rng.sample(faqs, min(n, len(faqs))):
+        words = question.split()
+        keep = [w for w in words if rng.random() > 0.33 or len(words) <= 3]
+        if tokenize(" ".join(keep)):
+            queries.append((" ".join(keep), {doc_id}))
+    return queries
+
+
+def run_mode(mode, queries):
+    max_k = max(KS)
+    hits = {k: 0 for k in KS}
+    latencies = []
+    for query, relevant in queries:
+        start = time.perf_counter()
+        if mode == "bm25":
+            ids = [doc_id for doc_id, _ in retrieval.get_bm25_index().search(query, max_k)]
+        else:
+            results = retrieval.search_faqs(
+                query, n_results=max_k,
+                mode="vector" if mode == "vector" else "hybrid",
+                rerank=mode == "hybrid+rerank",
+            )
+            ids = results["ids"][0]
+        latencies.append(time.perf_counter() - start)
+        for k in KS:
+            hits[k] += bool(relevant & set(ids[:k]))
+    latencies.sort()
+    return {
+        **{f"recall@{k}": hits[k] / len(queries) for k in KS},
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=None)
+    parser.add_argument("--synthetic", type=int, default=200)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries) if args.queries else synthetic_queries(args.synthetic)
+    retrieval.warm_up()
+
+    modes = ["vector", "bm25", "hybrid"]
+    if retrieval.get_reranker() is not None:
+        modes.append("hybrid+rerank")
+
+    print(f"{len(queries)} queries")
+    print(f"{'mode':<15}" + "".join(f"{f'recall@{k}':>11}" for k in KS) + f"{'p50 ms':>9}{'p95 ms':>9}")
+    for mode in modes:
+        r = run_mode(mode, queries)
+        print(f"{mode:<15}" + "".join(f"{r[f'recall@{k}']:>11.1%}" for k in KS)
+              + f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
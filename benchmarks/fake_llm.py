@@ -0,0 +1,114 @@
+"""
+Deterministic stand-in for the OpenAI client with configurable latency.
+
+Lets the benchmarks drive the real graph (routing, tools, DB) without API
+keys or network variance. Install with `install_fake_clients(latency)`.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace as NS
+
+
+POLICY_RE = re.compile(r"POL\d{6}")
+ANY_ID_RE = re.compile(r"POL\d{6}|CUST\d{5}|CLM\d{6}")
+
+
+def _usage(prompt_chars: int, completion: str):
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(completion) // 4
+    data = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+    return NS(model_dump=lambda: dict(data), **data)
+
+
+def fake_response(kwargs, call_number):
+    """Build a chat.completions response for the given request kwargs."""
+    messages = kwargs["messages"]
+    text = " ".join(str(m.get("content") or "") for m in messages)
+    tools = kwargs.get("tools") or []
+    tool_names = [t["function"]["name"] for t in tools]
+    content, tool_calls = None, None
+
+    if "ask_user" in tool_names:
+        content = json.dumps({"next_agent": "general_help_agent",
+                              "task": "Answer general insurance question",
+                              "justification": "fake routing"})
+    elif tools and messages[-1]["role"] != "tool" and "Records already retrieved" not in text:
+        policy = POLICY_RE.search(text)
+        if policy:
+            tool_calls = [NS(id=f"call_{call_number}", type="function",
+                             function=NS(name=tool_names[0],
+                                         arguments=json.dumps({"policy_number": policy.group()})))]
+        else:
+            content = "Could you provide your policy number?"
+    elif kwargs.get("response_format"):
+        if ANY_ID_RE.search(text):
+            content = json.dumps({"answer": "Your premium is $123.45, due on 2025-01-01.",
+                                  "needs_follow_up": False, "follow_up_question": ""})
+        else:
+            content = json.dumps({"answer": "", "needs_follow_up": True,
+                                  "follow_up_question": "Could you provide your policy number?"})
+    else:
+        content = "Your premium amount is $123.45 and the balance is due on 2025-01-01."
+
+    message = NS(content=content, tool_calls=tool_calls, role="assistant")
+    return NS(choices=[NS(message=message, finish_reason="stop")],
+              usage=_usage(len(text), content or ""))
+
+
+def fake_stream_chunks(response):
+    """Split a fake response into streaming chunks (word deltas, then usage)."""
+    content = response.choices[0].message.content or ""
+    for word in re.findall(r"\S+\s*", content):
+        yield NS(choices=[NS(delta=NS(content=word))], usage=None)
+    yield NS(choices=[], usage=response.usage)
+
+
+async def _async_chunks(response):
+    for chunk in fake_stream_chunks(response):
+        yield chunk
+
+
+class _Counter:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+
+class FakeCompletions:
+    def __init__(self, latency, counter):
+        self.latency = latency
+        self.counter = counter
+
+    def create(self, **kwargs):
+        n = self.counter.next()
+        time.sleep(self.latency)
+        response = fake_response(kwargs, n)
+        return fake_stream_chunks(response) if kwargs.get("stream") else response
+
+
+class AsyncFakeCompletions(FakeCompletions):
+    async def create(self, **kwargs):
+        n = self.counter.next()
+        await asyncio.sleep(self.latency)
+        response = fake_response(kwargs, n)
+        return _async_chunks(response) if kwargs.get("stream") else response
+
+
+def install_fake_clients(latency: float = 0.3):
+    """Swap the OpenAI clients used by llm_utils; returns the call counter."""
+    import llm_utils
+
+    counter = _Counter()
+    llm_utils.client = NS(chat=NS(completions=FakeCompletions(latency, counter)))
+    llm_utils.async_client = NS(chat=NS(completions=AsyncFakeCompletions(latency, counter)))
+    llm_utils.llm_cache = None  # every request should pay the simulated latency
+    return counter
@@ -0,0 +1,122 @@
+"""
+Concurrent conversations per process: sync app.invoke vs async_app.ainvoke.
+
+    python -m benchmarks.load_test --conversations 50 --concurrency 25 --fake-llm-latency 0.3
+
+With --fake-llm-latency the OpenAI client is replaced by a deterministic fake
+that sleeps for the given time, so the numbers reflect the graph's own
+blocking behaviour rather than API variance. Without it, real API calls are
+made (OPEN_AI_KEY must be set). Set OTEL_SDK_DISABLED=true when no Phoenix
+collector is running, otherwise span export retries dominate the timings.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUERIES = [
+    "What is my premium for policy {pol}?",
+    "When is my payment due? My policy is {pol}",
+    "What does policy {pol} cover?",
+]
+
+
+def initial_state(i, n_policies):
+    from conversation import user_turn
+
+    query = QUERIES[i % len(QUERIES)].format(pol=f"POL{i % n_policies:06d}")
+    return {
+        "n_iteration": 0,
+        "messages": [],
+        "user_input": query,
+        "claim_id": "",
+        "next_agent": "supervisor_agent",
+        "requires_human_escalation": False,
+        "turns": [user_turn(query)],
+        "task": "Help user with their query",
+        "final_answer": "",
+    }
+
+
+def report(label, n, elapsed, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{label:<36} {n / elapsed:>7.2f} conv/s   wall {elapsed:6.2f}s   "
+          f"p95 {p95:5.2f}s   effective concurrency {sum(latencies) / elapsed:5.1f}")
+
+
+def run_sync(app, states, workers):
+    latencies = []
+
+    def one(state):
+        start = time.perf_counter()
+        app.invoke(state)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    if workers <= 1:
+        for s in states:
+            one(s)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(one, states))
+    return time.perf_counter() - start, latencies
+
+
+async def run_async(async_app, states, concurrency):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(state):
+        async with sem:
+            start = time.perf_counter()
+            await async_app.ainvoke(state)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(s) for s in states))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--fake-llm-latency", type=float, default=None)
+    parser.add_argument("--policies", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.fake_llm_latency is not None:
+        os.environ.setdefault("OPEN_AI_KEY", "load-test")
+    # Measure the graph itself, not checkpoint writes.
+    os.environ.setdefault("CHECKPOINT_BACKEND", "none")
+
+    import db_access
+    from benchmarks.common import build_synthetic_db
+
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "load.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_synthetic_db(db_path, n_policies=args.policies)
+    db_access.configure_pool(db_path, max_size=args.concurrency)
+
+    import agent_app
+    if args.fake_llm_latency is not None:
+        from benchmarks.fake_llm import install_fake_clients
+        install_fake_clients(args.fake_llm_latency)
+
+    states = [initial_state(i, args.policies) for i in range(args.conversations)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_seq = run_sync(agent_app.app, states, workers=1)
+        async_res = asyncio.run(run_async(agent_app.async_app, states, args.concurrency))
+
+    report("sync app.invoke (1 worker)", args.conversations, *sync_seq)
+    report(f"async_app.ainvoke (concurrency={args.concurrency})", args.conversations, *async_res)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i if in is it my of on or
+should the to what when where which who why will with you your me am was
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring.
+
+    Postings map each term to {doc position: term frequency}, so a query
+    only touches documents that share a term with it.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self._doc_len: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._idf: Dict[str, float] = {}
+        self._avg_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, documents: Iterable[Tuple[str, str]]) -> None:
+        """Index (doc id, text) pairs; call finalize() before searching."""
+        for doc_id, text in documents:
+            pos = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            counts = Counter(tokenize(text))
+            self._doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings[term][pos] = tf
+
+    def finalize(self) -> "BM25Index":
+        n = len(self.doc_ids)
+        self._avg_len = sum(self._doc_len) / n if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self._postings.items()
+        }
+        return self
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (doc id, score) pairs, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for pos, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[pos] / self._avg_len)
+                scores[pos] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.doc_ids[pos], score) for pos, score in best]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(d) = sum over lists of 1 / (k + rank of d)."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
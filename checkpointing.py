@@ -0,0 +1,96 @@
+import importlib
+import inspect
+import logging
+import os
+import sqlite3
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+logger = logging.getLogger(__name__)
+
+
+# "sqlite" (default), "memory", "none", or "package.module:factory" for any
+# other BaseCheckpointSaver (Postgres, Redis, ...) shared by several workers.
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.db")
+
+
+def thread_config(thread_id: str) -> Dict[str, Any]:
+    """RunnableConfig that binds a graph run to a conversation thread."""
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def new_thread_id() -> str:
+    return uuid.uuid4().hex
+
+
+def sqlite_checkpointer(path: Optional[str] = None):
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    path = path or CHECKPOINT_DB_PATH
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    saver = SqliteSaver(conn)
+    saver.setup()
+    logger.info(f"💾 SQLite checkpointer at {path}")
+    return saver
+
+
+async def async_sqlite_checkpointer(path: Optional[str] = None):
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    path = path or CHECKPOINT_DB_PATH
+    conn = await aiosqlite.connect(path)
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    logger.info(f"💾 Async SQLite checkpointer at {path}")
+    return saver
+
+
+CHECKPOINTERS: Dict[str, Callable[[], Any]] = {
+    "sqlite": sqlite_checkpointer,
+    "memory": InMemorySaver,
+    "none": lambda: None,
+}
+
+ASYNC_CHECKPOINTERS: Dict[str, Callable[[], Any]] = {
+    "sqlite": async_sqlite_checkpointer,
+    "memory": InMemorySaver,
+    "none": lambda: None,
+}
+
+
+def _load_factory(spec: str) -> Callable[[], Any]:
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(
+            f"Unknown CHECKPOINT_BACKEND {spec!r}: use one of "
+            f"{sorted(CHECKPOINTERS)} or 'package.module:factory'"
+        )
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def build_checkpointer(backend: Optional[str] = None):
+    """Checkpointer for the sync graph; None disables persistence."""
+    backend = backend or CHECKPOINT_BACKEND
+    factory = CHECKPOINTERS.get(backend) or _load_factory(backend)
+    return factory()
+
+
+async def abuild_checkpointer(backend: Optional[str] = None):
+    """
+    Checkpointer for the async graph. Async savers bind to the running event
+    loop, so this must be awaited inside the loop that will run the graph.
+    """
+    backend = backend or CHECKPOINT_BACKEND
+    factory = ASYNC_CHECKPOINTERS.get(backend) or _load_factory(backend)
+    saver = factory()
+    if inspect.isawaitable(saver):
+        saver = await saver
+    return saver
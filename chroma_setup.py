@@ -1,25 +1,48 @@
-import pandas as pd
-import chromadb
-from datasets import load_dataset
+from retrieval import FAQ_COLLECTION, content_hash, faq_id, get_embedding_function, refresh_bm25_index
+
+def setup_chroma_db(path="./chroma_db", collection=None):
+    """
+    Load a 500-row sample of insuranceQA into the FAQ collection; use
+    `python -m faq_ingest` for the full corpus and internal FAQ files.
+    IDs are derived from the question text and IDs already in the collection
+    are skipped, so calling this again does not duplicate documents.
+    """
+    import chromadb
+    import pandas as pd
+    from datasets import load_dataset
 
-def setup_chroma_db(path="./chroma_db"):
     ds = load_dataset("deccan-ai/insuranceQA-v2")
     df = pd.concat([split.to_pandas() for split in ds.values()], ignore_index=True)
     df["combined"] = "Question: " + df["input"] + " \n Answer:  " + df["output"]
 
     df = df.sample(500, random_state=42).reset_index(drop=True)
+    df["id"] = df["input"].map(faq_id)
+    df = df.drop_duplicates("id")
 
-    chroma_client = chromadb.PersistentClient(path=path)
-    collection = chroma_client.get_or_create_collection(name="insurance_FAQ_collection")
+    if collection is None:
+        chroma_client = chromadb.PersistentClient(path=path)
+        collection = chroma_client.get_or_create_collection(
+            name=FAQ_COLLECTION, embedding_function=get_embedding_function()
+        )
 
     batch_size = 100
+    added = 0
     for i in range(0, len(df), batch_size):
         batch_df = df.iloc[i:i+batch_size]
+        existing = set(collection.get(ids=batch_df["id"].tolist(), include=[])["ids"])
+        batch_df = batch_df[~batch_df["id"].isin(existing)]
+        if batch_df.empty:
+            continue
         collection.add(
             documents=batch_df["combined"].tolist(),
-            metadatas=[{"question": q, "answer": a} for q, a in zip(batch_df["input"], batch_df["output"])],
-            ids=batch_df.index.astype(str).tolist()
+            metadatas=[{"question": q, "answer": a, "content_hash": content_hash(q.strip(), a.strip())}
+                       for q, a in zip(batch_df["input"], batch_df["output"])],
+            ids=batch_df["id"].tolist()
         )
+        added += len(batch_df)
+
+    if added:
+        refresh_bm25_index()
 
-    print("✅ ChromaDB ready")
+    print(f"✅ ChromaDB ready ({added} new docs, {len(df) - added} already present)")
     return collection
@@ -0,0 +1,213 @@
+import logging
+import os
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Dict, List, Optional, TypedDict, Union
+
+from metrics import PROMPT_TOKENS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Token budget for the conversation window rendered into each prompt.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1200"))
+# Cap on the rolling summary of turns that fell out of the window.
+SUMMARY_TOKEN_BUDGET = int(os.getenv("HISTORY_SUMMARY_TOKEN_BUDGET", "300"))
+# "extractive" (local, default) or "llm".
+HISTORY_SUMMARIZER = os.getenv("HISTORY_SUMMARIZER", "extractive")
+
+SPECIALIST_LABELS = {
+    "billing_agent": "Billing Agent",
+    "policy_agent": "Policy Agent",
+    "claims_agent": "Claims Agent",
+    "general_help_agent": "General Help Agent",
+}
+
+
+class Turn(TypedDict):
+    # Not "role": LangGraph treats {"role": ...} dicts as chat messages.
+    speaker: str    # "user" or "assistant"
+    agent: str      # "user", "supervisor", "final_answer_agent", a specialist name, ...
+    content: str
+    tokens: int     # count_tokens(format_turn(turn)), stored when the turn is made
+
+
+def _counted(turn: Turn) -> Turn:
+    turn["tokens"] = count_tokens(format_turn(turn))
+    return turn
+
+
+def user_turn(content: str) -> Turn:
+    return _counted({"speaker": "user", "agent": "user", "content": content})
+
+
+def assistant_turn(content: str, agent: str = "assistant") -> Turn:
+    return _counted({"speaker": "assistant", "agent": agent, "content": content or ""})
+
+
+def append_turns(left: Optional[List[Turn]], right: Union[Turn, List[Turn], None]) -> List[Turn]:
+    """Reducer for GraphState.turns: nodes return only the turns they add."""
+    left = left or []
+    if not right:
+        return left
+    if isinstance(right, dict):
+        right = [right]
+    return left + list(right)
+
+
+def is_specialist(turn: Turn) -> bool:
+    return turn["agent"] in SPECIALIST_LABELS
+
+
+def format_turn(turn: Turn) -> str:
+    if turn["speaker"] == "user":
+        return f"User: {turn['content']}"
+    return f"{SPECIALIST_LABELS.get(turn['agent'], 'Assistant')}: {turn['content']}"
+
+
+# ---- Token accounting ----
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count via tiktoken when installed, otherwise a ~4 chars/token estimate."""
+    if not text:
+        return 0
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def turn_tokens(turn: Turn) -> int:
+    """Tokens of the turn's rendered line; counted once, when the turn was made."""
+    tokens = turn.get("tokens")
+    return tokens if tokens is not None else count_tokens(format_turn(turn))
+
+
+def record_prompt_tokens(node: str, prompt: str) -> int:
+    """Report the prompt size a node is about to send."""
+    tokens = count_tokens(prompt)
+    PROMPT_TOKENS.observe(tokens, node=node)
+    logger.debug("🧮 %s prompt tokens: %d", node, tokens)
+    return tokens
+
+
+# ---- Rendering ----
+
+def render_history(state: Dict, budget: Optional[int] = None) -> str:
+    """
+    Render the part of the conversation a prompt needs: the rolling summary
+    of older turns followed by the most recent turns that fit in `budget`
+    tokens. Only the window is touched, so cost does not grow with history.
+    """
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+    turns = state.get("turns") or []
+    start = state.get("summary_upto") or 0
+
+    window: List[str] = []
+    used = 0
+    # Walk back by index: slicing would copy the whole log on every render.
+    for i in range(len(turns) - 1, start - 1, -1):
+        cost = turn_tokens(turns[i])
+        if window and used + cost > budget:
+            break
+        window.append(format_turn(turns[i]))
+        used += cost
+    window.reverse()
+
+    summary = state.get("history_summary")
+    if summary:
+        window.insert(0, f"Summary of earlier conversation: {summary}")
+    return "\n".join(window)
+
+
+def first_user_message(state: Dict) -> str:
+    for turn in state.get("turns") or []:
+        if turn["speaker"] == "user":
+            return turn["content"]
+    return state.get("user_input", "")
+
+
+# ---- Rolling summarization ----
+
+def _summary_line(turn: Turn) -> str:
+    first_sentence = turn["content"].strip().split("\n", 1)[0].split(". ", 1)[0][:200]
+    return f"{format_turn(turn).split(':', 1)[0]}: {first_sentence}"
+
+
+def _extractive_summary(previous: str, turns: List[Turn]) -> str:
+    # Keep the newest lines that fit the budget (at least one). Walking back
+    # from the newest turn measures each line once and never formats the
+    # older turns that would be dropped anyway.
+    newest_first = chain((_summary_line(t) for t in reversed(turns)), [previous] if previous else [])
+    kept: List[str] = []
+    used = 0
+    for line in newest_first:
+        cost = count_tokens(line) + 1   # + the " | " separator
+        if kept and used + cost > SUMMARY_TOKEN_BUDGET:
+            break
+        kept.append(line)
+        used += cost
+    kept.reverse()
+    return " | ".join(kept)
+
+
+def _llm_summary(previous: str, turns: List[Turn]) -> str:
+    from llm_utils import cached_chat_completion
+    from prompts import HISTORY_SUMMARY_PROMPT
+
+    prompt = HISTORY_SUMMARY_PROMPT.format(
+        previous_summary=previous or "(none)",
+        new_turns="\n".join(format_turn(t) for t in turns),
+        max_tokens=SUMMARY_TOKEN_BUDGET,
+    )
+    return cached_chat_completion([{"role": "system", "content": prompt}])
+
+
+SUMMARIZERS: Dict[str, Callable[[str, List[Turn]], str]] = {
+    "extractive": _extractive_summary,
+    "llm": _llm_summary,
+}
+
+
+def compact_history(state: Dict, budget: Optional[int] = None) -> Dict:
+    """
+    Fold turns that no longer fit the window into `history_summary`.
+
+    Turns stay in the append-only log; `summary_upto` marks how many of them
+    the summary covers. Returns a state update, empty when nothing needs folding.
+    """
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+    turns = state.get("turns") or []
+    start = state.get("summary_upto") or 0
+
+    # Walk back from the newest turn until the unsummarized part is known to
+    # exceed the budget, so a long log is not formatted and counted in full.
+    # The cut keeps the newest turns that fit in half the budget, leaving
+    # room for new turns before the next compaction, and never folds the
+    # latest turn.
+    cut, tail = None, 0
+    for i in range(len(turns) - 1, start - 1, -1):
+        tail += turn_tokens(turns[i])
+        if cut is None and tail > budget // 2:
+            cut = min(i + 1, len(turns) - 1)
+        if tail > budget:
+            break
+    else:
+        return {}
+    if cut <= start:
+        return {}
+
+    summarizer = SUMMARIZERS.get(HISTORY_SUMMARIZER, _extractive_summary)
+    summary = summarizer(state.get("history_summary") or "", turns[start:cut])
+    logger.info("🗜️ Folded turns %d-%d into history summary", start, cut - 1)
+    return {"history_summary": summary, "summary_upto": cut}
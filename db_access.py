@@ -0,0 +1,232 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+
+DEFAULT_DB_PATH = "insurance_support.db"
+
+# Size of each connection's compiled-statement cache. Below the sqlite3
+# default of 128 on purpose: the tool queries are a handful of fixed
+# statements, so 64 holds them all with room to spare on every pooled connection.
+STATEMENT_CACHE_SIZE = 64
+
+
+# ---- Tool queries ----
+# Kept as module constants so every call passes the *same* SQL string and
+# sqlite3 can serve the compiled statement from its per-connection cache.
+
+POLICY_DETAILS_SQL = """
+    SELECT p.*, c.first_name, c.last_name
+    FROM policies p
+    JOIN customers c ON p.customer_id = c.customer_id
+    WHERE p.policy_number = ?
+"""
+
+CLAIM_BY_ID_SQL = """
+    SELECT c.*, p.policy_type
+    FROM claims c
+    JOIN policies p ON c.policy_number = p.policy_number
+    WHERE c.claim_id = ?
+"""
+
+CLAIMS_BY_POLICY_SQL = """
+    SELECT c.*, p.policy_type
+    FROM claims c
+    JOIN policies p ON c.policy_number = p.policy_number
+    WHERE c.policy_number = ?
+    ORDER BY c.claim_date DESC LIMIT 3
+"""
+
+BILLING_BY_POLICY_SQL = """
+    SELECT b.*, p.premium_amount, p.billing_frequency
+    FROM billing b
+    JOIN policies p ON b.policy_number = p.policy_number
+    WHERE b.policy_number = ? AND b.status = 'pending'
+    ORDER BY b.due_date DESC LIMIT 1
+"""
+
+BILLING_BY_CUSTOMER_SQL = """
+    SELECT b.*, p.premium_amount, p.billing_frequency
+    FROM billing b
+    JOIN policies p ON b.policy_number = p.policy_number
+    WHERE p.customer_id = ? AND b.status = 'pending'
+    ORDER BY b.due_date DESC LIMIT 1
+"""
+
+PAYMENT_HISTORY_SQL = """
+    SELECT p.payment_date, p.amount, p.status, p.payment_method
+    FROM payments p
+    JOIN billing b ON p.bill_id = b.bill_id
+    WHERE b.policy_number = ?
+    ORDER BY p.payment_date DESC LIMIT 10
+"""
+
+AUTO_POLICY_DETAILS_SQL = """
+    SELECT apd.*, p.policy_type, p.premium_amount
+    FROM auto_policy_details apd
+    JOIN policies p ON apd.policy_number = p.policy_number
+    WHERE apd.policy_number = ?
+"""
+
+
+# Every query the tools issue, by name; db_setup.verify_query_plans checks
+# that none of them falls back to a table scan.
+TOOL_QUERIES = {
+    "policy_details": POLICY_DETAILS_SQL,
+    "claim_by_id": CLAIM_BY_ID_SQL,
+    "claims_by_policy": CLAIMS_BY_POLICY_SQL,
+    "billing_by_policy": BILLING_BY_POLICY_SQL,
+    "billing_by_customer": BILLING_BY_CUSTOMER_SQL,
+    "payment_history": PAYMENT_HISTORY_SQL,
+    "auto_policy_details": AUTO_POLICY_DETAILS_SQL,
+}
+
+
+def get_db_path() -> str:
+    """Resolve the database path (INSURANCE_DB_PATH overrides the default)."""
+    return os.getenv("INSURANCE_DB_PATH", DEFAULT_DB_PATH)
+
+
+def _row_factory(cursor: sqlite3.Cursor, row: Sequence[Any]) -> Dict[str, Any]:
+    columns = [desc[0] for desc in cursor.description]
+    return dict(zip(columns, row))
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of read-only SQLite connections.
+
+    Connections are opened lazily up to `max_size`, handed out one caller at a
+    time and returned to the pool afterwards, so the connect/teardown cost and
+    statement compilation are paid once per connection rather than per lookup.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_size: int = 8, timeout: float = 5.0):
+        self.db_path = db_path or get_db_path()
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._wal_checked = False
+
+    def _ensure_wal(self) -> None:
+        # journal_mode=WAL is persistent in the file but needs a writable
+        # connection to switch; do it once so readers never block writers.
+        if self._wal_checked or not os.path.exists(self.db_path):
+            return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+        self._wal_checked = True
+
+    def _open(self) -> sqlite3.Connection:
+        self._ensure_wal()
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.row_factory = _row_factory
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[Dict[str, Any]]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# Called after configure_pool switches databases (e.g. to drop cached lookups).
+POOL_LISTENERS: List[Callable[[], None]] = []
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(max_size=int(os.getenv("INSURANCE_DB_POOL_SIZE", "8")))
+    return _pool
+
+
+def configure_pool(db_path: Optional[str] = None, max_size: int = 8) -> ConnectionPool:
+    """Replace the process-wide pool, e.g. to point the tools at another database."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(db_path=db_path, max_size=max_size)
+    for listener in POOL_LISTENERS:
+        listener()
+    return _pool
+
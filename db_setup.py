@@ -1,8 +1,6 @@
 import sqlite3
-import pandas as pd
 from datetime import datetime, timedelta
 import random
-import numpy as np
 
 def connect_db(db_path='insurance_support.db'):
     return sqlite3.connect(db_path)
@@ -18,6 +16,8 @@ def drop_and_create_tables(conn):
         DROP TABLE IF EXISTS policies;
         DROP TABLE IF EXISTS customers;
     """)
+    # The drops took the migrated indexes with them; start the migrations over.
+    cursor.execute("PRAGMA user_version = 0")
 
     cursor.executescript("""
         CREATE TABLE customers (
@@ -89,6 +89,63 @@ def drop_and_create_tables(conn):
 
     conn.commit()
 
+# ---- Schema migrations ----
+# Applied in order on top of drop_and_create_tables; the applied version is
+# tracked in PRAGMA user_version so re-running only applies newer steps.
+MIGRATIONS = [
+    (1, "lookup indexes for tools.py queries", """
+        -- get_claim_status(policy_number=...): WHERE policy_number = ? ORDER BY claim_date DESC
+        CREATE INDEX IF NOT EXISTS idx_claims_policy_date
+            ON claims(policy_number, claim_date DESC);
+
+        -- get_billing_info: WHERE policy_number = ? AND status = 'pending' ORDER BY due_date DESC
+        -- (bill_id included so the get_payment_history join is covered too)
+        CREATE INDEX IF NOT EXISTS idx_billing_policy_status_due
+            ON billing(policy_number, status, due_date DESC, bill_id);
+
+        -- get_payment_history: billing -> payments join, covering the selected columns
+        CREATE INDEX IF NOT EXISTS idx_payments_bill_date
+            ON payments(bill_id, payment_date DESC, amount, status, payment_method);
+
+        -- get_billing_info(customer_id=...)
+        CREATE INDEX IF NOT EXISTS idx_policies_customer
+            ON policies(customer_id);
+    """),
+]
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Apply any migrations newer than the database's user_version."""
+    current = get_schema_version(conn)
+    for version, description, sql in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.executescript(sql)
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+        print(f"✅ Applied migration {version}: {description}")
+    conn.execute("ANALYZE")
+    conn.commit()
+
+def verify_query_plans(conn):
+    """
+    Run EXPLAIN QUERY PLAN for every tool query and fail if any of them
+    falls back to a full table scan.
+    """
+    from db_access import TOOL_QUERIES
+
+    offenders = {}
+    for name, sql in TOOL_QUERIES.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", (None,)).fetchall()
+        scans = [row[-1] for row in plan if row[-1].startswith("SCAN")]
+        if scans:
+            offenders[name] = scans
+    if offenders:
+        details = "; ".join(f"{name}: {', '.join(scans)}" for name, scans in offenders.items())
+        raise RuntimeError(f"Tool queries fall back to table scans: {details}")
+
 def insert_data(conn, data):
     for table, df in data.items():
         df.to_sql(table, conn, if_exists='append', index=False)
@@ -98,5 +155,15 @@ def setup_insurance_database(data):
     conn = connect_db()
     drop_and_create_tables(conn)
     insert_data(conn, data)
+    migrate(conn)
+    verify_query_plans(conn)
     conn.close()
     print("✅ Database created successfully!")
+
+if __name__ == "__main__":
+    # Upgrade an existing database in place without reloading data.
+    conn = connect_db()
+    migrate(conn)
+    verify_query_plans(conn)
+    conn.close()
+    print(f"✅ Schema at version {MIGRATIONS[-1][0]}, all tool queries use indexes")
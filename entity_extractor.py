@@ -0,0 +1,95 @@
+import re
+import threading
+from typing import Dict, Iterable, Optional, Pattern
+
+from conversation import is_specialist
+
+
+# Entity name -> regex. Names double as GraphState keys for the built-in IDs.
+ENTITY_PATTERNS: Dict[str, str] = {
+    "policy_number": r"POL\d{6}",
+    "customer_id": r"CUST\d{5}",
+    "claim_id": r"CLM\d{6}",
+}
+
+_combined: Optional[Pattern] = None
+_by_name: Dict[str, Pattern] = {}
+_lock = threading.Lock()
+
+
+def _compile() -> Pattern:
+    # Non-capturing alternatives keep sre's literal-prefix search; capture
+    # groups disable it and make the scan several times slower. Matches are
+    # attributed to an entity afterwards, which only costs per match.
+    global _combined, _by_name
+    with _lock:
+        _by_name = {name: re.compile(pattern) for name, pattern in ENTITY_PATTERNS.items()}
+        _combined = re.compile("|".join(f"(?:{pattern})" for pattern in ENTITY_PATTERNS.values()))
+    return _combined
+
+
+def _entity_of(text: str) -> Optional[str]:
+    for name, pattern in _by_name.items():
+        if pattern.fullmatch(text):
+            return name
+    return None
+
+
+def register_entity(name: str, pattern: str) -> None:
+    """Add (or replace) an ID format; `name` must be a valid identifier."""
+    ENTITY_PATTERNS[name] = pattern
+    _compile()
+
+
+def extract(text: str, wanted: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    First match of each entity type in `text`, found in a single pass over
+    one precompiled alternation. Stops early once every wanted type is found.
+    """
+    pattern = _combined or _compile()
+    wanted = set(ENTITY_PATTERNS if wanted is None else wanted)
+    found: Dict[str, str] = {}
+    if not text or not wanted:
+        return found
+    for m in pattern.finditer(text):
+        value = m.group()
+        name = _entity_of(value)
+        if name in wanted and name not in found:
+            found[name] = value
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def scan_new_turns(state: Dict) -> Dict:
+    """
+    Scan only the turns appended since the last supervisor pass.
+
+    Keeps the first-seen value of each entity in `entities`, the index of
+    the latest specialist turn in `last_specialist_index`, and the scan
+    position in `entity_scan_offset`, so each pass costs O(new text).
+    Returns the state update.
+    """
+    turns = state.get("turns") or []
+    offset = state.get("entity_scan_offset") or 0
+    entities = dict(state.get("entities") or {})
+    last_specialist = state.get("last_specialist_index")
+    if last_specialist is None:
+        last_specialist = -1
+
+    for i in range(offset, len(turns)):
+        turn = turns[i]
+        missing = [name for name in ENTITY_PATTERNS if name not in entities]
+        if missing:
+            entities.update(extract(turn["content"], missing))
+        if is_specialist(turn):
+            last_specialist = i
+
+    return {
+        "entities": entities,
+        "entity_scan_offset": len(turns),
+        "last_specialist_index": last_specialist,
+    }
+
+
+_compile()
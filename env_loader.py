@@ -1,21 +1,67 @@
+import logging
 import os
+import threading
 from dotenv import load_dotenv
-from phoenix.otel import register
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 OPENAI_API_KEY = os.getenv("OPEN_AI_KEY")
 PHOENIX_ENDPOINT = os.getenv("PHOENIX_COLLECTOR_ENDPOINT")
 
-if not OPENAI_API_KEY:
-    raise ValueError("❌ OPEN_AI_KEY is missing in .env file!")
-
-tracer_provider = register(
-    project_name="multi-agent-system",
-    endpoint=PHOENIX_ENDPOINT,
-    auto_instrument=True
+# TRACING_ENABLED=0 (or OTEL_SDK_DISABLED=true) skips Phoenix entirely and
+# traces to a no-op tracer, for runs without a collector.
+TRACING_ENABLED = (
+    os.getenv("TRACING_ENABLED", "1") == "1"
+    and os.getenv("OTEL_SDK_DISABLED", "").lower() != "true"
 )
 
-tracer = tracer_provider.get_tracer(__name__)
+_tracer_provider = None
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def require_openai_key() -> str:
+    """The OpenAI key; checked when the first client is built, not at import."""
+    if not OPENAI_API_KEY:
+        raise ValueError("❌ OPEN_AI_KEY is missing in .env file!")
+    return OPENAI_API_KEY
+
+
+def get_tracer_provider():
+    """Phoenix tracer provider, registered on first use (auto-instrumented)."""
+    global _tracer_provider
+    with _tracer_lock:
+        if _tracer_provider is None:
+            if TRACING_ENABLED:
+                from phoenix.otel import register
+
+                _tracer_provider = register(
+                    project_name="multi-agent-system",
+                    endpoint=PHOENIX_ENDPOINT,
+                    auto_instrument=True
+                )
+                logger.info("✅ Phoenix tracing registered")
+            else:
+                from opentelemetry.trace import NoOpTracerProvider
+
+                _tracer_provider = NoOpTracerProvider()
+                logger.info("🔕 Tracing disabled")
+    return _tracer_provider
+
+
+def get_tracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = get_tracer_provider().get_tracer(__name__)
+    return _tracer
+
 
-print("✅ Environment loaded & Phoenix registered")
+def __getattr__(name):
+    # `env_loader.tracer` / `tracer_provider` still work; both are built on first access.
+    if name == "tracer":
+        return get_tracer()
+    if name == "tracer_provider":
+        return get_tracer_provider()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,232 @@
+"""
+Streaming, resumable bulk ingestion of FAQ sources into the Chroma FAQ collection.
+
+    python -m faq_ingest data/insuranceqa.parquet data/internal_faqs.jsonl --workers 8
+
+Sources are JSONL or Parquet files with a question and an answer field (the
+insuranceQA column names `input`/`output` by default). They are read in
+chunks, so memory stays flat regardless of corpus size. Embeddings are
+computed on a process pool. Each document's ID is derived from its question
+(retrieval.faq_id) and its metadata carries a hash of question + answer, so
+a re-run only embeds and upserts documents that are new or changed.
+Progress is recorded per source in a manifest after every committed chunk;
+an interrupted run picks up after the last committed chunk.
+"""
+import argparse
+import json
+import os
+import resource
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from retrieval import (
+    CHROMA_PATH,
+    FAQ_COLLECTION,
+    content_hash,
+    faq_id,
+    get_embedding_function,
+    get_semantic_cache,
+    refresh_bm25_index,
+)
+
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MANIFEST = "faq_ingest_manifest.json"
+
+
+def faq_document(question: str, answer: str) -> str:
+    return "Question: " + question + " \n Answer:  " + answer
+
+
+# ---- Sources ----
+
+def _read_jsonl(path: str, chunk_size: int) -> Iterator[List[Dict]]:
+    with open(path, encoding="utf-8") as f:
+        rows = (json.loads(line) for line in f if line.strip())
+        while chunk := list(islice(rows, chunk_size)):
+            yield chunk
+
+
+def _read_parquet(path: str, chunk_size: int) -> Iterator[List[Dict]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Reading Parquet sources requires pyarrow") from e
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[List[Dict]]:
+    if path.endswith((".parquet", ".pq")):
+        return _read_parquet(path, chunk_size)
+    if path.endswith((".jsonl", ".ndjson")):
+        return _read_jsonl(path, chunk_size)
+    raise ValueError(f"Unsupported FAQ source {path!r}: expected .jsonl or .parquet")
+
+
+# ---- Resume manifest ----
+
+def _source_key(path: str) -> str:
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def load_manifest(path: str) -> Dict[str, int]:
+    """Source key -> number of chunks already committed."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path: str, manifest: Dict[str, int]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+# ---- Embedding workers ----
+
+_embed_fn = None
+
+
+def _init_worker() -> None:
+    global _embed_fn
+    _embed_fn = get_embedding_function()
+
+
+def _embed(documents: List[str]) -> List[List[float]]:
+    return [list(map(float, v)) for v in _embed_fn(documents)]
+
+
+# ---- Pipeline ----
+
+def _prepare(rows: List[Dict], question_field: str, answer_field: str, collection) -> Dict[str, List]:
+    """Deduplicate a chunk and keep only documents that are new or changed."""
+    batch: Dict[str, Dict] = {}
+    for row in rows:
+        question = (row.get(question_field) or "").strip()
+        answer = (row.get(answer_field) or "").strip()
+        if question and answer:
+            batch[faq_id(question)] = {"question": question, "answer": answer,
+                                       "content_hash": content_hash(question, answer)}
+
+    stored = collection.get(ids=list(batch), include=["metadatas"])
+    for doc_id, meta in zip(stored["ids"], stored["metadatas"]):
+        if meta and meta.get("content_hash") == batch[doc_id]["content_hash"]:
+            del batch[doc_id]
+
+    return {
+        "ids": list(batch),
+        "metadatas": list(batch.values()),
+        "documents": [faq_document(m["question"], m["answer"]) for m in batch.values()],
+        "skipped": len(rows) - len(batch),
+    }
+
+
+def _peak_memory_mb() -> Tuple[float, float]:
+    # ru_maxrss is KiB on Linux; workers are reported separately.
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+
+def ingest(
+    sources: List[str],
+    collection=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    manifest_path: str = DEFAULT_MANIFEST,
+    question_field: str = "input",
+    answer_field: str = "output",
+) -> Dict:
+    """
+    Ingest `sources` into the FAQ collection; returns counts and throughput.
+    At most 2 chunks per worker are in flight, which bounds memory.
+    """
+    if collection is None:
+        import chromadb
+
+        collection = chromadb.PersistentClient(path=CHROMA_PATH).get_or_create_collection(
+            name=FAQ_COLLECTION, embedding_function=get_embedding_function()
+        )
+
+    workers = workers or os.cpu_count() or 1
+    manifest = load_manifest(manifest_path)
+    stats = {"read": 0, "upserted": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for source in sources:
+            key = _source_key(source)
+            done = manifest.get(key, 0)
+            if done:
+                print(f"⏭️ {source}: resuming after {done} committed chunks")
+            pending = deque()
+
+            def commit_oldest():
+                # Chunks are committed in read order so the manifest offset stays exact.
+                index, chunk, future = pending.popleft()
+                if future is not None:
+                    collection.upsert(ids=chunk["ids"], documents=chunk["documents"],
+                                      metadatas=chunk["metadatas"], embeddings=future.result())
+                    stats["upserted"] += len(chunk["ids"])
+                    semantic_cache = get_semantic_cache()
+                    if semantic_cache is not None:
+                        semantic_cache.invalidate_faqs(chunk["ids"])
+                stats["skipped"] += chunk["skipped"]
+                manifest[key] = index + 1
+                save_manifest(manifest_path, manifest)
+
+            for index, rows in enumerate(read_chunks(source, chunk_size)):
+                if index < done:
+                    continue
+                stats["read"] += len(rows)
+                chunk = _prepare(rows, question_field, answer_field, collection)
+                future = pool.submit(_embed, chunk["documents"]) if chunk["ids"] else None
+                pending.append((index, chunk, future))
+                if len(pending) >= 2 * workers:
+                    commit_oldest()
+            while pending:
+                commit_oldest()
+            print(f"✅ {source}: {manifest.get(key, 0)} chunks committed")
+
+    if stats["upserted"]:
+        refresh_bm25_index()
+
+    elapsed = time.perf_counter() - start
+    own_mb, workers_mb = _peak_memory_mb()
+    stats.update({
+        "elapsed_sec": elapsed,
+        "docs_per_sec": stats["read"] / elapsed if elapsed else 0.0,
+        "peak_memory_mb": own_mb,
+        "peak_worker_memory_mb": workers_mb,
+    })
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="+", help="JSONL or Parquet files")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--question-field", default="input")
+    parser.add_argument("--answer-field", default="output")
+    args = parser.parse_args()
+
+    stats = ingest(args.sources, chunk_size=args.chunk_size, workers=args.workers,
+                   manifest_path=args.manifest, question_field=args.question_field,
+                   answer_field=args.answer_field)
+    print(f"📊 read {stats['read']} docs, upserted {stats['upserted']}, skipped {stats['skipped']} unchanged/duplicate "
+          f"in {stats['elapsed_sec']:.1f}s ({stats['docs_per_sec']:.0f} docs/sec), "
+          f"peak memory {stats['peak_memory_mb']:.0f} MB main / "
+          f"{stats['peak_worker_memory_mb']:.0f} MB largest worker")
+
+
+if __name__ == "__main__":
+    main()
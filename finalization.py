@@ -0,0 +1,163 @@
+"""
+How final_answer_agent turns the specialist's reply into the customer's answer.
+
+FINALIZATION_POLICY is an ordered, comma-separated list of strategies. The
+first one that applies produces the final answer:
+
+- pass_through: the specialist's reply, unchanged, when it already reads
+  as a customer answer. That means short, ending in a statement rather
+  than a question back to the customer, and free of tool, JSON or agent
+  residue.
+- template: a fixed sentence rendered from the database records for the
+  common data questions (premium, due date, claim status).
+- llm: the FINAL_ANSWER_PROMPT rewrite. It is the fallback whether listed
+  or not, and also runs when a template has no usable records.
+
+The default "pass_through,template,llm" only pays for the rewrite when it
+is needed. "llm" restores the previous behaviour of always rewriting.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from metrics import histogram
+
+
+logger = logging.getLogger(__name__)
+
+
+STRATEGIES = ("pass_through", "template", "llm")
+
+FINALIZATIONS = histogram(
+    "agent_finalization_llm_calls",
+    "LLM calls per final answer, by strategy (0 = pass-through or template)",
+    buckets=(0, 1),
+)
+
+# Leftovers that mean the reply was not written for the customer.
+_RESIDUE_RE = re.compile(
+    r"```|[{}\[\]]|\btool[_ ]?calls?\b|\bfunction\b|\bjson\b|\bsupervisor\b|\bspecialist\b"
+    r"|\bagent\b|traceback|\berror\b|clarification",
+    re.IGNORECASE,
+)
+# A reply ending in a question is asking the customer, not answering them.
+_SENTENCE_END_RE = re.compile(r"[.!)]\s*$")
+
+# Questions the templates answer, and the specialist that handles each.
+_BILLING_RE = re.compile(r"\bpremium\b|\bdue\b|\bnext (?:payment|bill)\b|\bhow much\b.*\b(?:pay|owe)\b",
+                         re.IGNORECASE)
+_CLAIM_STATUS_RE = re.compile(r"\bstatus\b|\bupdate\b|\bwhere\b|\bprogress\b|\bapproved\b", re.IGNORECASE)
+TEMPLATE_KINDS = {
+    "billing": ("billing_agent", _BILLING_RE),
+    "claim_status": ("claims_agent", _CLAIM_STATUS_RE),
+}
+
+
+def _money(value: Any) -> str:
+    try:
+        return f"${float(value):,.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def render_billing(records: Dict[str, Any]) -> Optional[str]:
+    bill = records.get("billing_info")
+    if not isinstance(bill, dict) or "error" in bill or not bill.get("due_date"):
+        return None
+    frequency = (bill.get("billing_frequency") or "").lower()
+    premium = f"your {frequency} premium" if frequency else "your premium"
+    return (f"For policy {bill['policy_number']}, {premium} is {_money(bill.get('premium_amount'))}. "
+            f"Your next payment of {_money(bill.get('amount_due'))} is due on {bill['due_date']}.")
+
+
+def render_claim_status(records: Dict[str, Any]) -> Optional[str]:
+    claims = records.get("claims")
+    if not isinstance(claims, list) or not claims:
+        return None
+    lines = [
+        f"Claim {c['claim_id']} ({c.get('incident_type') or 'claim'}, filed {c.get('claim_date')}, "
+        f"estimated loss {_money(c.get('estimated_loss'))}) is currently {str(c.get('status')).lower()}."
+        for c in claims
+    ]
+    if len(lines) == 1:
+        return lines[0]
+    return "Here are your most recent claims:\n" + "\n".join(f"- {line}" for line in lines)
+
+
+RENDERERS = {
+    "billing": render_billing,
+    "claim_status": render_claim_status,
+}
+
+
+class Finalizer:
+    """Picks the cheapest strategy that yields a user-ready answer and counts the outcomes."""
+
+    def __init__(self, strategies: Iterable[str] = STRATEGIES, max_chars: int = 600, max_lines: int = 8):
+        self.strategies = tuple(s for s in strategies if s in STRATEGIES and s != "llm")
+        self.max_chars = max_chars
+        self.max_lines = max_lines
+        self.counts = {strategy: 0 for strategy in STRATEGIES}
+        self._lock = threading.Lock()
+
+    def user_ready(self, response: str) -> bool:
+        """Length and format heuristics for passing the specialist's reply through."""
+        text = (response or "").strip()
+        return (
+            bool(text)
+            and len(text) <= self.max_chars
+            and text.count("\n") < self.max_lines
+            and _SENTENCE_END_RE.search(text) is not None
+            and _RESIDUE_RE.search(text) is None
+        )
+
+    def template_kind(self, user_query: str, agent: str) -> Optional[str]:
+        for kind, (kind_agent, pattern) in TEMPLATE_KINDS.items():
+            if agent == kind_agent and pattern.search(user_query or ""):
+                return kind
+        return None
+
+    def choose(self, user_query: str, response: str, agent: str) -> Tuple[str, Optional[str]]:
+        """(strategy, template kind): the first enabled strategy that applies, else "llm"."""
+        for strategy in self.strategies:
+            if strategy == "pass_through" and self.user_ready(response):
+                return "pass_through", None
+            if strategy == "template":
+                kind = self.template_kind(user_query, agent)
+                if kind:
+                    return "template", kind
+        return "llm", None
+
+    def render(self, kind: str, records: Dict[str, Any]) -> Optional[str]:
+        """The template answer, or None when the records cannot fill it."""
+        return RENDERERS[kind](records)
+
+    def record(self, strategy: str) -> None:
+        with self._lock:
+            self.counts[strategy] += 1
+        FINALIZATIONS.observe(1 if strategy == "llm" else 0, strategy=strategy)
+        logger.info("🏁 Final answer via %s", strategy)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        return {
+            **counts,
+            "total": total,
+            "llm_avoided_rate": (total - counts["llm"]) / total if total else 0.0,
+        }
+
+
+def build_finalizer_from_env() -> Finalizer:
+    """FINALIZATION_POLICY, FINALIZE_MAX_CHARS, FINALIZE_MAX_LINES."""
+    return Finalizer(
+        strategies=[s.strip() for s in os.getenv("FINALIZATION_POLICY", ",".join(STRATEGIES)).split(",")],
+        max_chars=int(os.getenv("FINALIZE_MAX_CHARS", "600")),
+        max_lines=int(os.getenv("FINALIZE_MAX_LINES", "8")),
+    )
+
+
+finalizer = build_finalizer_from_env()
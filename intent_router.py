@@ -0,0 +1,131 @@
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional, TypedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+# Keyword rules mirroring the routing guidelines in SUPERVISOR_PROMPT.
+INTENT_RULES: Dict[str, List[str]] = {
+    "policy_agent": [
+        r"\bpolicy type\b", r"\btype of policy\b", r"\bcover(?:age|ed|s)?\b",
+        r"\bdeductibles?\b", r"\bvehicles?\b", r"\bliability\b", r"\bendorsements?\b",
+    ],
+    "billing_agent": [
+        r"\bpremiums?\b", r"\bpayments?\b", r"\bpay\b", r"\bdue\b", r"\bowe\b",
+        r"\binvoices?\b", r"\bbill(?:ing)?\b", r"\bbalance\b", r"\bhow much\b",
+    ],
+    "claims_agent": [
+        r"\bclaims?\b", r"\bsettlements?\b",
+    ],
+    "general_help_agent": [
+        r"\bin general\b", r"\bhow does (?:\w+ )*insurance work\b",
+        r"\bwhat (?:is|are) (?:a |an )?(?:term|whole|universal|umbrella)\b",
+    ],
+    "human_escalation_agent": [
+        r"\b(?:human|real person|representative|speak to (?:an? )?agent)\b",
+    ],
+}
+
+TASK_TEMPLATES: Dict[str, str] = {
+    "policy_agent": "Retrieve policy information",
+    "billing_agent": "Retrieve billing information",
+    "claims_agent": "Retrieve claim information",
+    "general_help_agent": "Answer general insurance question",
+    "human_escalation_agent": "Escalate to human support",
+}
+
+# Used as the saving per fast-path hit until a real LLM routing call has been timed.
+DEFAULT_LLM_ROUTING_LATENCY_SEC = 1.0
+
+
+class RouteDecision(TypedDict):
+    next_agent: str
+    confidence: float
+    source: str
+
+
+class IntentRouter:
+    """
+    Local intent classifier used by the supervisor before falling back to the LLM.
+
+    Keyword rules answer unambiguous queries outright (exactly one agent's
+    rules match); anything else is left to the LLM. The router is shared
+    across threads, so the counters are updated under a lock.
+    """
+
+    def __init__(self):
+        self._rules = {
+            agent: re.compile("|".join(patterns), re.IGNORECASE)
+            for agent, patterns in INTENT_RULES.items()
+        }
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.hits = 0
+        self.llm_calls = 0
+        self.llm_latency_total = 0.0
+        self.classify_latency_total = 0.0
+        self.latency_saved_total = 0.0
+
+    # ---- classification ----
+
+    def _rule_match(self, text: str) -> Optional[str]:
+        matched = [agent for agent, rx in self._rules.items() if rx.search(text)]
+        return matched[0] if len(matched) == 1 else None
+
+    def classify(self, text: str) -> Optional[RouteDecision]:
+        """Return a confident routing decision for `text`, or None to defer to the LLM."""
+        start = time.perf_counter()
+        agent = self._rule_match(text) if text else None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.requests += 1
+            self.classify_latency_total += elapsed
+            if agent is None:
+                return None
+            self.hits += 1
+            self.latency_saved_total += self._avg_llm_latency()
+        return {"next_agent": agent, "confidence": 1.0, "source": "rules"}
+
+    # ---- accounting ----
+
+    def record_llm_call(self, latency_sec: float) -> None:
+        """Record the latency of an LLM routing call made after a fast-path miss."""
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_latency_total += latency_sec
+
+    def _avg_llm_latency(self) -> float:
+        if not self.llm_calls:
+            return DEFAULT_LLM_ROUTING_LATENCY_SEC
+        return self.llm_latency_total / self.llm_calls
+
+    def avg_llm_latency(self) -> float:
+        with self._lock:
+            return self._avg_llm_latency()
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "hits": self.hits,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "llm_calls": self.llm_calls,
+                "avg_llm_latency_sec": self._avg_llm_latency(),
+                "avg_classify_latency_ms": 1000 * self.classify_latency_total / requests if requests else 0.0,
+                "latency_saved_sec": self.latency_saved_total,
+                "latency_saved_per_request_sec": self.latency_saved_total / requests if requests else 0.0,
+            }
+
+
+def build_task(agent: str, user_query: str) -> str:
+    """Task description for a fast-path route, in the shape the LLM would produce."""
+    return f"{TASK_TEMPLATES.get(agent, 'Assist the user with their query')}: {user_query}"
+
+
+router = IntentRouter()
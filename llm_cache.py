@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(model: str, messages: List[Dict[str, Any]], tools: Optional[List[Dict]] = None) -> str:
+    """
+    Hash model, messages and tool schemas into a cache key.
+
+    Tool-call ids are generated fresh by the API on every turn, so they are
+    dropped; what identifies a second pass is the tool names, arguments and
+    outputs, which stay in the key.
+    """
+    normalized = []
+    for msg in messages:
+        msg = {k: v for k, v in msg.items() if k != "tool_call_id"}
+        if msg.get("tool_calls"):
+            msg["tool_calls"] = [
+                {k: v for k, v in tc.items() if k != "id"} for tc in msg["tool_calls"]
+            ]
+        normalized.append(msg)
+    payload = json.dumps(
+        {"model": model, "messages": normalized, "tools": tools or []},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUCache:
+    """In-process LRU tier with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """
+    On-disk tier shared across processes, evicting least recently used rows.
+
+    Rows hold the hashed key, the completion text and its token usage; the
+    prompt is never stored. Completions can quote customer records, so the
+    tier is opt-in (LLM_CACHE_PATH). A row is served for at most `ttl`
+    seconds; expired rows are deleted when read, on open and every 100 writes.
+    """
+
+    def __init__(self, path: str = "llm_cache.db", max_entries: int = 100_000, ttl: float = 3600.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+        self._evict(time.time())
+        self._conn.commit()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl, now),
+            )
+            self._writes += 1
+            # Trim periodically rather than on every write.
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+        self._conn.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+class LLMCache:
+    """
+    Tiered response cache in front of chat.completions.create.
+
+    Tiers are checked in order (memory, then disk); a hit in a lower tier is
+    promoted into the tiers above it. Any object with get/set/clear can be
+    plugged in as a tier.
+    """
+
+    def __init__(self, tiers: List[Any]):
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.hits_by_tier = [0] * len(tiers)
+        self.tokens_saved = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for upper in self.tiers[:i]:
+                    upper.set(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.hits_by_tier[i] += 1
+                    self.tokens_saved += value.get("usage", {}).get("total_tokens", 0)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "hits_by_tier": {type(t).__name__: n for t, n in zip(self.tiers, self.hits_by_tier)},
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+def build_cache_from_env() -> Optional[LLMCache]:
+    """
+    Build the cache from LLM_CACHE_* environment variables (None when disabled).
+    The memory tier is on by default; the disk tier only when LLM_CACHE_PATH is set.
+    """
+    if os.getenv("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+    ttl = float(os.getenv("LLM_CACHE_TTL_SEC", "3600"))
+    tiers: List[Any] = [MemoryLRUCache(int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")), ttl)]
+    path = os.getenv("LLM_CACHE_PATH", "")
+    if path:
+        try:
+            tiers.append(SQLiteCache(path, int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "100000")), ttl))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM disk cache unavailable ({e}); using memory tier only")
+    return LLMCache(tiers)
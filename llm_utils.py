@@ -1,70 +1,446 @@
+import contextvars
 import json
+import logging
+import os
+import time
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
-from env_loader import OPENAI_API_KEY
+from langgraph.config import get_stream_writer
+from opentelemetry import trace
+from env_loader import require_openai_key
 from tracing_utils import trace_agent
+from llm_cache import build_cache_from_env, make_key
+from metrics import TIME_TO_FIRST_TOKEN, record_llm_call, record_tool_call, timed
+from rate_limiter import RateLimiter
 
 
-client = OpenAI(api_key=OPENAI_API_KEY)   # ✅ Correct variable name
+logger = logging.getLogger(__name__)
 
 
-def run_llm(
-    prompt: str,
-    tools: Optional[List[Dict]] = None,
-    tool_functions: Optional[Dict[str, Any]] = None,
+# Built on first use by get_client() / get_async_client(), so importing this
+# module does not load the openai package; assign a stand-in to replace them.
+client = None
+async_client = None
+_client_lock = threading.Lock()
+
+# Built on first use by get_llm_cache(), so importing this module creates no
+# cache files; assign None to disable the cache.
+_UNBUILT = object()
+llm_cache = _UNBUILT
+
+# Requests per second across every completion call in the process (0 = no limit);
+# cache hits are not counted.
+llm_rate_limiter = RateLimiter(
+    float(os.getenv("LLM_RATE_LIMIT_RPS", "0")),
+    burst=int(os.getenv("LLM_RATE_LIMIT_BURST", "1")),
+)
+
+# Tool calls returned in one model turn are independent lookups, so they run
+# concurrently on a bounded pool; each gets its own timeout.
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+TOOL_TIMEOUT_SEC = float(os.getenv("TOOL_TIMEOUT_SEC", "10"))
+
+
+def _parse_tool_timeouts(spec: str) -> Dict[str, float]:
+    """'get_claim_status=5,get_billing_info=2.5' -> {tool name: seconds}."""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        try:
+            timeouts[name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning("⚠️ Ignoring TOOL_TIMEOUTS entry %r", item)
+    return timeouts
+
+
+# Per-tool overrides of TOOL_TIMEOUT_SEC, by tool name.
+TOOL_TIMEOUTS: Dict[str, float] = _parse_tool_timeouts(os.getenv("TOOL_TIMEOUTS", ""))
+
+_tool_executor = None   # built by get_tool_executor()
+
+
+def get_client():
+    global client
+    with _client_lock:
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=require_openai_key())
+    return client
+
+
+def get_async_client():
+    global async_client
+    with _client_lock:
+        if async_client is None:
+            from openai import AsyncOpenAI
+            async_client = AsyncOpenAI(api_key=require_openai_key())
+    return async_client
+
+
+def get_llm_cache():
+    global llm_cache
+    with _client_lock:
+        if llm_cache is _UNBUILT:
+            llm_cache = build_cache_from_env()
+    return llm_cache
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    global _tool_executor
+    with _client_lock:
+        if _tool_executor is None:
+            _tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+    return _tool_executor
+
+
+def create_chat_completion(**kwargs):
+    """
+    client.chat.completions.create behind the rate limiter; its latency and
+    token usage are added to the current node's metrics.
+    """
+    llm_rate_limiter.acquire()
+    start = time.perf_counter()
+    response = get_client().chat.completions.create(**kwargs)
+    record_llm_call(time.perf_counter() - start, getattr(response, "usage", None))
+    return response
+
+
+async def acreate_chat_completion(**kwargs):
+    """Async variant of create_chat_completion using `async_client`."""
+    await llm_rate_limiter.aacquire()
+    start = time.perf_counter()
+    response = await get_async_client().chat.completions.create(**kwargs)
+    record_llm_call(time.perf_counter() - start, getattr(response, "usage", None))
+    return response
+
+
+def cached_chat_completion(
+    messages: List[Dict[str, Any]],
     model: str = "gpt-4o-mini",
+    key_tools: Optional[List[Dict]] = None,
 ) -> str:
     """
-    Run an LLM request that optionally supports tools.
-    
-    Args:
-        prompt (str): The system or user prompt to send.
-        tools (list[dict], optional): Tool schema list for model function calling.
-        tool_functions (dict[str, callable], optional): Mapping of tool names to Python functions.
-        model (str): Model name to use (default: gpt-4o-mini).
+    Plain (no tool choice) chat completion served from `llm_cache` when possible.
 
-    Returns:
-        str: Final LLM response text.
+    `key_tools` only contributes to the cache key, so a post-tool second pass
+    is keyed on the schemas that produced its tool outputs.
     """
+    key = make_key(model, messages, key_tools) if get_llm_cache() else None
+    if key:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            return cached["content"]
+
+    response = create_chat_completion(model=model, messages=messages)
+    content = response.choices[0].message.content
+
+    _store(key, content, getattr(response, "usage", None))
+    return content
+
+
+async def acached_chat_completion(
+    messages: List[Dict[str, Any]],
+    model: str = "gpt-4o-mini",
+    key_tools: Optional[List[Dict]] = None,
+) -> str:
+    """Async variant of cached_chat_completion using `async_client`."""
+    key = make_key(model, messages, key_tools) if get_llm_cache() else None
+    if key:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            return cached["content"]
 
-    # Step 1: Initial LLM call
-    response = client.chat.completions.create(
+    response = await acreate_chat_completion(model=model, messages=messages)
+    content = response.choices[0].message.content
+
+    _store(key, content, getattr(response, "usage", None))
+    return content
+
+
+def _store(key: Optional[str], content: Optional[str], usage) -> None:
+    if key and content is not None:
+        get_llm_cache().set(key, {"content": content, "usage": usage.model_dump() if usage else {}})
+
+
+# ---- Token streaming ----
+# Deltas are pushed to LangGraph's "custom" stream so callers using
+# app.stream(..., stream_mode="custom") can render the answer as it arrives.
+
+def _stream_writer():
+    """Custom-stream writer of the running graph node, or a no-op outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def emit_answer(node: str, text: str) -> None:
+    """Emit a complete answer as one token event, for answers that were not streamed."""
+    _stream_writer()({"type": "token", "node": node, "delta": text})
+
+
+def _record_first_token(node: str, start: float) -> None:
+    ttft = time.perf_counter() - start
+    TIME_TO_FIRST_TOKEN.observe(ttft, node=node)
+    trace.get_current_span().set_attribute("llm.time_to_first_token_sec", ttft)
+
+
+def stream_chat_completion(
+    messages: List[Dict[str, Any]],
+    node: str,
+    model: str = "gpt-4o-mini",
+) -> str:
+    """
+    Chat completion whose tokens are emitted as {"type": "token", "node", "delta"}
+    custom-stream events while they arrive. Returns the full text.
+
+    Cached answers are emitted as a single delta.
+    """
+    writer = _stream_writer()
+    key = make_key(model, messages) if get_llm_cache() else None
+    if key:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            writer({"type": "token", "node": node, "delta": cached["content"]})
+            return cached["content"]
+
+    llm_rate_limiter.acquire()
+    start = time.perf_counter()
+    stream = get_client().chat.completions.create(
         model=model,
-        messages=[{"role": "system", "content": prompt}],
-        tools=tools if tools else None,
-        tool_choice="auto" if tools else None
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
     )
 
-    message = response.choices[0].message
-    print("Initial LLM Response:", message)
+    parts, usage = [], None
+    for chunk in stream:
+        usage = getattr(chunk, "usage", None) or usage
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            if not parts:
+                _record_first_token(node, start)
+            parts.append(delta)
+            writer({"type": "token", "node": node, "delta": delta})
 
-    # Step 2: If no tools or no tool calls, return simple model response
-    if not getattr(message, "tool_calls", None):
-        return message.content
+    record_llm_call(time.perf_counter() - start, usage)
+    content = "".join(parts)
+    _store(key, content, usage)
+    return content
+
+
+async def astream_chat_completion(
+    messages: List[Dict[str, Any]],
+    node: str,
+    model: str = "gpt-4o-mini",
+) -> str:
+    """Async variant of stream_chat_completion using `async_client`."""
+    writer = _stream_writer()
+    key = make_key(model, messages) if get_llm_cache() else None
+    if key:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            writer({"type": "token", "node": node, "delta": cached["content"]})
+            return cached["content"]
+
+    await llm_rate_limiter.aacquire()
+    start = time.perf_counter()
+    stream = await get_async_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+
+    parts, usage = [], None
+    async for chunk in stream:
+        usage = getattr(chunk, "usage", None) or usage
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            if not parts:
+                _record_first_token(node, start)
+            parts.append(delta)
+            writer({"type": "token", "node": node, "delta": delta})
+
+    record_llm_call(time.perf_counter() - start, usage)
+    content = "".join(parts)
+    _store(key, content, usage)
+    return content
+
+
+# ---- Structured output ----
+
+def _parse_structured(content: Optional[str]) -> Dict[str, Any]:
+    try:
+        parsed = json.loads(content or "")
+    except ValueError:
+        parsed = None
+    # A reply that is not the requested JSON object is treated as a plain answer.
+    return parsed if isinstance(parsed, dict) else {"answer": content or ""}
+
+
+def structured_chat_completion(
+    messages: List[Dict[str, Any]],
+    response_format: Dict[str, Any],
+    node: str,
+    model: str = "gpt-4o-mini",
+) -> Dict[str, Any]:
+    """
+    Chat completion constrained to `response_format` (a JSON schema), parsed
+    into a dict and served from `llm_cache` when possible. A non-empty
+    "answer" field is emitted as one custom-stream token event, so the UI
+    renders it like a streamed answer.
+    """
+    key = make_key(model, messages, [response_format]) if get_llm_cache() else None
+    content = None
+    if key:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            content = cached["content"]
+    if content is None:
+        response = create_chat_completion(model=model, messages=messages, response_format=response_format)
+        content = response.choices[0].message.content
+        _store(key, content, getattr(response, "usage", None))
+
+    parsed = _parse_structured(content)
+    if parsed.get("answer") and not parsed.get("needs_follow_up"):
+        emit_answer(node, parsed["answer"])
+    return parsed
 
-    # Step 3: Handle tool calls dynamically
-    if not tool_functions:
-        return message.content + "\n\n⚠️ No tool functions provided to execute tool calls."
+
+async def astructured_chat_completion(
+    messages: List[Dict[str, Any]],
+    response_format: Dict[str, Any],
+    node: str,
+    model: str = "gpt-4o-mini",
+) -> Dict[str, Any]:
+    """Async variant of structured_chat_completion using `async_client`."""
+    key = make_key(model, messages, [response_format]) if get_llm_cache() else None
+    content = None
+    if key:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            content = cached["content"]
+    if content is None:
+        response = await acreate_chat_completion(model=model, messages=messages, response_format=response_format)
+        content = response.choices[0].message.content
+        _store(key, content, getattr(response, "usage", None))
+
+    parsed = _parse_structured(content)
+    if parsed.get("answer") and not parsed.get("needs_follow_up"):
+        emit_answer(node, parsed["answer"])
+    return parsed
+
+
+def _tool_message(tool_call, result) -> Dict[str, Any]:
+    return {
+        "role": "tool",
+        "tool_call_id": tool_call.id,
+        "content": json.dumps(result)
+    }
+
+
+def _tool_timeout(func_name: str) -> float:
+    return TOOL_TIMEOUTS.get(func_name, TOOL_TIMEOUT_SEC)
+
+
+def _timeout_error(func_name: str) -> Dict[str, Any]:
+    return {
+        "error": f"Tool '{func_name}' timed out after {_tool_timeout(func_name)}s",
+        "timeout": True,
+    }
+
+
+def _call_tool(tool_fn, func_name: str, arguments: Optional[str]):
+    start = time.perf_counter()
+    try:
+        args = json.loads(arguments or "{}")
+        result = tool_fn(**args) if tool_fn else {"error": f"Tool '{func_name}' not implemented."}
+    except Exception as e:
+        result = {"error": str(e)}
+    record_tool_call(func_name, time.perf_counter() - start, ok=not (isinstance(result, dict) and "error" in result))
+    return result
+
+
+def dispatch_tool_calls(tool_calls, tool_functions: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Run a turn's tool calls concurrently on the shared tool pool.
+
+    Results are returned as tool messages in the original tool_call order; a
+    call that exceeds its timeout yields a structured error instead of
+    holding up the turn.
+
+    A timed-out call is abandoned, not cancelled: a running future cannot be
+    cancelled, so its worker keeps its pool slot until the tool returns, and
+    the tool's query runs to completion. The async variant behaves the same
+    for tools run on the pool.
+    """
+    submitted = time.monotonic()
+    # Each call runs in a copy of this context so it is accounted to the calling node.
+    futures = [
+        get_tool_executor().submit(
+            contextvars.copy_context().run,
+            _call_tool, tool_functions.get(tc.function.name), tc.function.name, tc.function.arguments
+        )
+        for tc in tool_calls
+    ]
 
     tool_messages = []
-    for tool_call in message.tool_calls:
+    with timed("tool"):
+        for tool_call, future in zip(tool_calls, futures):
+            func_name = tool_call.function.name
+            remaining = _tool_timeout(func_name) - (time.monotonic() - submitted)
+            try:
+                result = future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                result = _timeout_error(func_name)
+                record_tool_call(func_name, _tool_timeout(func_name), ok=False)
+            tool_messages.append(_tool_message(tool_call, result))
+    return tool_messages
+
+
+async def adispatch_tool_calls(tool_calls, tool_functions: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Async variant of dispatch_tool_calls. Coroutine tools are awaited directly,
+    plain callables run on the shared tool pool; order is preserved by gather.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def run_one(tool_call):
         func_name = tool_call.function.name
-        args = json.loads(tool_call.function.arguments or "{}")
         tool_fn = tool_functions.get(func_name)
-
+        is_coroutine = inspect.iscoroutinefunction(tool_fn)
+        start = time.perf_counter()
         try:
-            result = tool_fn(**args) if tool_fn else {"error": f"Tool '{func_name}' not implemented."}
+            if is_coroutine:
+                args = json.loads(tool_call.function.arguments or "{}")
+                coro = tool_fn(**args)
+            else:
+                coro = loop.run_in_executor(
+                    get_tool_executor(), contextvars.copy_context().run,
+                    _call_tool, tool_fn, func_name, tool_call.function.arguments
+                )
+            result = await asyncio.wait_for(coro, timeout=_tool_timeout(func_name))
+        except asyncio.TimeoutError:
+            result = _timeout_error(func_name)
         except Exception as e:
             result = {"error": str(e)}
+        # Executor calls account for themselves in _call_tool unless they timed out.
+        if is_coroutine or (isinstance(result, dict) and result.get("timeout")):
+            record_tool_call(func_name, time.perf_counter() - start,
+                             ok=not (isinstance(result, dict) and "error" in result))
+        return _tool_message(tool_call, result)
 
-        tool_messages.append({
-            "role": "tool",
-            "tool_call_id": tool_call.id,
-            "content": json.dumps(result)
-        })
+    with timed("tool"):
+        return list(await asyncio.gather(*(run_one(tc) for tc in tool_calls)))
 
-    # Step 4: Second pass — send tool outputs back to the model
-    followup_messages = [
+
+def _followup_messages(prompt: str, message, tool_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Second-pass conversation: the prompt, the model's tool calls and their outputs."""
+    return [
         {"role": "system", "content": prompt},
         {
             "role": "assistant",
@@ -83,5 +459,89 @@ def run_llm(
         *tool_messages,
     ]
 
-    final = client.chat.completions.create(model=model, messages=followup_messages)
-    return final.choices[0].message.content
\ No newline at end of file
+
+def run_llm(
+    prompt: str,
+    tools: Optional[List[Dict]] = None,
+    tool_functions: Optional[Dict[str, Any]] = None,
+    model: str = "gpt-4o-mini",
+) -> str:
+    """
+    Run an LLM request that optionally supports tools.
+    
+    Args:
+        prompt (str): The system or user prompt to send.
+        tools (list[dict], optional): Tool schema list for model function calling.
+        tool_functions (dict[str, callable], optional): Mapping of tool names to Python functions.
+        model (str): Model name to use (default: gpt-4o-mini).
+
+    Returns:
+        str: Final LLM response text.
+    """
+
+    # Step 1: Initial LLM call. With tools, the model may fetch live data, so
+    # only tool-free prompts are served from the cache here.
+    if not tools:
+        return cached_chat_completion([{"role": "system", "content": prompt}], model)
+
+    response = create_chat_completion(
+        model=model,
+        messages=[{"role": "system", "content": prompt}],
+        tools=tools,
+        tool_choice="auto"
+    )
+
+    message = response.choices[0].message
+    logger.debug("Initial LLM response: %d tool calls", len(getattr(message, "tool_calls", None) or []))
+
+    # Step 2: If no tools or no tool calls, return simple model response
+    if not getattr(message, "tool_calls", None):
+        return message.content
+
+    # Step 3: Run the requested tool calls (concurrently when there are several)
+    if not tool_functions:
+        return message.content + "\n\n⚠️ No tool functions provided to execute tool calls."
+
+    tool_messages = dispatch_tool_calls(message.tool_calls, tool_functions)
+
+    # Step 4: Second pass — send tool outputs back to the model
+    followup_messages = _followup_messages(prompt, message, tool_messages)
+
+    # Keyed on the tool outputs themselves, so fresh DB data never hits a stale entry.
+    return cached_chat_completion(followup_messages, model, key_tools=tools)
+
+
+async def arun_llm(
+    prompt: str,
+    tools: Optional[List[Dict]] = None,
+    tool_functions: Optional[Dict[str, Any]] = None,
+    model: str = "gpt-4o-mini",
+) -> str:
+    """
+    Async variant of run_llm using `async_client`.
+
+    Tool functions may be coroutine functions or plain callables; plain ones
+    run on the shared tool pool so they never block the event loop.
+    """
+    if not tools:
+        return await acached_chat_completion([{"role": "system", "content": prompt}], model)
+
+    response = await acreate_chat_completion(
+        model=model,
+        messages=[{"role": "system", "content": prompt}],
+        tools=tools,
+        tool_choice="auto"
+    )
+
+    message = response.choices[0].message
+
+    if not getattr(message, "tool_calls", None):
+        return message.content
+
+    if not tool_functions:
+        return message.content + "\n\n⚠️ No tool functions provided to execute tool calls."
+
+    tool_messages = await adispatch_tool_calls(message.tool_calls, tool_functions)
+
+    followup_messages = _followup_messages(prompt, message, tool_messages)
+    return await acached_chat_completion(followup_messages, model, key_tools=tools)
@@ -0,0 +1,200 @@
+"""
+Process-wide logging: records are queued on the calling thread and written
+by a background listener, so file and console I/O stay off the request path.
+
+Configured from the environment by configure_logging():
+    LOG_LEVEL                  root level (default INFO)
+    LOG_FORMAT                 "text" or "json" (default text)
+    LOG_FILE                   log file, empty for console only (default insurance_agent.log)
+    LOG_PAYLOAD_SAMPLE_RATE    share of verbose payloads kept (default 0.01)
+
+Verbose data (prompts, state dumps, conversation history) is attached as a
+payload rather than formatted into the message:
+
+    logger.debug("Policy agent state", extra=payload(lambda: state_summary(state)))
+
+The callable only runs for records that pass the level check and the
+payload sampler. Every record carries the LangGraph thread id and the node
+it was logged from when there is one.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from metrics import current_node_stats
+
+try:
+    # The config of the running graph step; what langgraph.config.get_config reads.
+    from langchain_core.runnables.config import var_child_runnable_config
+except ImportError:
+    var_child_runnable_config = None
+
+
+LOG_FORMAT_TEXT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def payload(build: Callable[[], Any]) -> Dict[str, Any]:
+    """`extra` for a record whose verbose payload is built only if it is emitted."""
+    return {"payload": build}
+
+
+def state_summary(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Graph state without the message log, for debug payloads."""
+    return {k: v for k, v in state.items() if k not in ("messages", "turns")}
+
+
+class ContextFilter(logging.Filter):
+    """Adds thread_id (the conversation) and node to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "thread_id"):
+            record.thread_id = _current_thread_id()
+        if not hasattr(record, "node"):
+            stats = current_node_stats()
+            record.node = stats.node if stats is not None else None
+        return True
+
+
+def _current_thread_id() -> Optional[str]:
+    config = var_child_runnable_config.get() if var_child_runnable_config is not None else None
+    return (config.get("configurable") or {}).get("thread_id") if config else None
+
+
+class PayloadSampler(logging.Filter):
+    """Keeps the payload of `rate` of the records that have one; the message always passes."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "payload", None) is not None and random.random() >= self.rate:
+            record.payload = None
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Resolves the message, traceback and sampled payload on the caller's
+    thread, where the objects they read are current, and leaves the rest of
+    the formatting to the listener. The record is updated in place rather
+    than copied: the queue is the root logger's only handler.
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        build = getattr(record, "payload", None)
+        if callable(build):
+            try:
+                record.payload = build()
+            except Exception as e:
+                record.payload = f"<payload failed: {e!r}>"
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread_id": getattr(record, "thread_id", None),
+            "node": getattr(record, "node", None),
+        }
+        if getattr(record, "payload", None) is not None:
+            entry["payload"] = record.payload
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format, with the payload (if kept) on the following line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        if getattr(record, "payload", None) is not None:
+            text += "\n    " + json.dumps(record.payload, default=str, ensure_ascii=False)
+        return text
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    log_file: Optional[str] = None,
+    payload_sample_rate: Optional[float] = None,
+    force: bool = False,
+) -> None:
+    """
+    Route the root logger through a queue to console (and file) handlers on a
+    listener thread. Arguments default to the LOG_* environment variables.
+    Safe to call repeatedly; only the first call (or force=True) applies.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+
+        level = level or os.getenv("LOG_LEVEL", "INFO")
+        fmt = fmt or os.getenv("LOG_FORMAT", "text")
+        log_file = os.getenv("LOG_FILE", "insurance_agent.log") if log_file is None else log_file
+        if payload_sample_rate is None:
+            payload_sample_rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+
+        formatter = JsonFormatter() if fmt == "json" else TextFormatter(LOG_FORMAT_TEXT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        queue_handler = _QueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(ContextFilter())
+        queue_handler.addFilter(PayloadSampler(payload_sample_rate))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        # Neither format uses caller or process fields, so skip collecting them
+        # for every record (see "Optimization" in the logging HOWTO).
+        logging._srcfile = None
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def flush_logging() -> None:
+    """Write out everything queued so far and stop the listener (runs at exit)."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(flush_logging)
@@ -0,0 +1,284 @@
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Latency buckets in seconds.
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, safe to share across threads."""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[Tuple[str, str], ...], Dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self) -> List[Dict]:
+        """Per-label-set count, sum and average."""
+        with self._lock:
+            return [
+                {
+                    "labels": dict(key),
+                    "count": s["count"],
+                    "sum": s["sum"],
+                    "avg": s["sum"] / s["count"] if s["count"] else 0.0,
+                }
+                for key, s in self._series.items()
+            ]
+
+    def series(self) -> List[Tuple[Dict[str, str], List[int], float, int]]:
+        """(labels, per-bucket counts incl. +Inf, sum, count) for each label set."""
+        with self._lock:
+            return [(dict(key), list(s["counts"]), s["sum"], s["count"]) for key, s in self._series.items()]
+
+
+_registry: Dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """Get or create the process-wide histogram called `name`."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, description, buckets)
+        return _registry[name]
+
+
+def get_histogram(name: str) -> Optional[Histogram]:
+    return _registry.get(name)
+
+
+# ---- Prometheus text exposition ----
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+def render_prometheus() -> str:
+    """Every registered histogram in the Prometheus text exposition format."""
+    with _registry_lock:
+        histograms = list(_registry.values())
+    lines = []
+    for h in histograms:
+        help_text = h.description.replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {h.name} {help_text}")
+        lines.append(f"# TYPE {h.name} histogram")
+        for labels, counts, total, count in h.series():
+            cumulative = 0
+            for bound, n in zip(h.buckets + (math.inf,), counts):
+                cumulative += n
+                lines.append(f"{h.name}_bucket{_label_text({**labels, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"{h.name}_sum{_label_text(labels)} {total}")
+            lines.append(f"{h.name}_count{_label_text(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve render_prometheus() over HTTP on a daemon thread, once per process.
+    The port defaults to METRICS_PORT; nothing is started when neither is set.
+    The host defaults to METRICS_HOST, else 127.0.0.1; set it to 0.0.0.0 to
+    let a scraper on another machine reach the endpoint.
+    """
+    global _server
+    port = port if port is not None else int(os.getenv("METRICS_PORT", "0"))
+    host = host if host is not None else os.getenv("METRICS_HOST", "127.0.0.1")
+    with _server_lock:
+        if _server is None and port:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+TIME_TO_FIRST_TOKEN = histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streaming completion request to its first content token",
+)
+
+PROMPT_TOKENS = histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens per LLM request, by graph node",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+
+
+# ---- Per-node accounting ----
+# trace_agent opens a NodeStats for every node execution; LLM, tool and
+# retrieval code adds to whichever one is current in its context.
+
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+NODE_SECONDS = histogram(
+    "agent_node_seconds",
+    "Wall time per graph node execution",
+)
+
+NODE_COMPONENT_SECONDS = histogram(
+    "agent_node_component_seconds",
+    "Time per node execution spent in LLM calls, tool calls and FAQ retrieval",
+)
+
+NODE_TOKENS = histogram(
+    "agent_node_tokens",
+    "Prompt and completion tokens per node execution, from API usage",
+    buckets=TOKEN_BUCKETS,
+)
+
+NODE_LLM_CALLS = histogram(
+    "agent_node_llm_calls",
+    "LLM requests per node execution (cache hits excluded)",
+    buckets=(0, 1, 2, 3, 5, 8),
+)
+
+TOOL_SECONDS = histogram(
+    "agent_tool_seconds",
+    "Latency of each tool call (database lookups), by tool",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+
+
+class NodeStats:
+    """Cost and latency of one node execution."""
+
+    def __init__(self, node: str):
+        self.node = node
+        self.wall_sec = 0.0
+        self.component_sec = {"llm": 0.0, "tool": 0.0, "retrieval": 0.0}
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tool_calls: List[Tuple[str, float, bool]] = []
+        self._lock = threading.Lock()
+
+    def add_llm_call(self, seconds: float, usage: Any = None) -> None:
+        with self._lock:
+            self.llm_calls += 1
+            self.component_sec["llm"] += seconds
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def add_tool_call(self, tool: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.tool_calls.append((tool, seconds, ok))
+
+    def add_time(self, component: str, seconds: float) -> None:
+        with self._lock:
+            self.component_sec[component] = self.component_sec.get(component, 0.0) + seconds
+
+    def as_attributes(self) -> Dict[str, Any]:
+        """Span attributes for this execution."""
+        attributes = {
+            "llm.calls": self.llm_calls,
+            "llm.prompt_tokens": self.prompt_tokens,
+            "llm.completion_tokens": self.completion_tokens,
+            "tool.calls": len(self.tool_calls),
+            "tool.names": [tool for tool, _, _ in self.tool_calls],
+            "tool.latencies_sec": [seconds for _, seconds, _ in self.tool_calls],
+            "tool.errors": sum(not ok for _, _, ok in self.tool_calls),
+        }
+        for component, seconds in self.component_sec.items():
+            attributes[f"node.{component}_sec"] = seconds
+        return attributes
+
+    def observe(self) -> None:
+        NODE_SECONDS.observe(self.wall_sec, node=self.node)
+        for component, seconds in self.component_sec.items():
+            NODE_COMPONENT_SECONDS.observe(seconds, node=self.node, component=component)
+        NODE_LLM_CALLS.observe(self.llm_calls, node=self.node)
+        if self.llm_calls:
+            NODE_TOKENS.observe(self.prompt_tokens, node=self.node, kind="prompt")
+            NODE_TOKENS.observe(self.completion_tokens, node=self.node, kind="completion")
+
+
+_current_node: ContextVar[Optional[NodeStats]] = ContextVar("current_node_stats", default=None)
+
+
+def current_node_stats() -> Optional[NodeStats]:
+    return _current_node.get()
+
+
+@contextmanager
+def node_stats(node: str) -> Iterator[NodeStats]:
+    """Collect a NodeStats for the enclosed node execution and record it on exit."""
+    stats = NodeStats(node)
+    token = _current_node.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.wall_sec = time.perf_counter() - start
+        _current_node.reset(token)
+        stats.observe()
+
+
+def record_llm_call(seconds: float, usage: Any = None) -> None:
+    stats = _current_node.get()
+    if stats is not None:
+        stats.add_llm_call(seconds, usage)
+
+
+def record_tool_call(tool: str, seconds: float, ok: bool = True) -> None:
+    TOOL_SECONDS.observe(seconds, tool=tool)
+    stats = _current_node.get()
+    if stats is not None:
+        stats.add_tool_call(tool, seconds, ok)
+
+
+@contextmanager
+def timed(component: str) -> Iterator[None]:
+    """Add the enclosed block's duration to the current node's `component` time."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current_node.get()
+        if stats is not None:
+            stats.add_time(component, time.perf_counter() - start)
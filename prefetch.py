@@ -0,0 +1,239 @@
+"""
+Speculative prefetch of customer context.
+
+Once the supervisor has a policy number, customer ID or claim ID, the
+specialist it routes to almost always needs the policy row, the current
+bill or the recent claims. Prefetcher starts those lookups in the
+background as soon as an ID enters state, so they overlap the supervisor's
+routing call, and keeps the results in a per-conversation CustomerContext.
+A specialist that finds its records there puts them in its prompt and
+answers in one LLM call instead of a tool-call round trip.
+
+Lookups go through the cached tool functions, so a prefetch also warms
+tool_cache for any tool call the specialist still makes. A prefetched
+result used by a specialist is a hit; one that is never used before its
+context is dropped is wasted. Both are reported by get_stats().
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tools import get_billing_info, get_claim_status, get_policy_details
+
+
+logger = logging.getLogger(__name__)
+
+
+# Returned by take() when no usable prefetched result exists.
+MISSING = object()
+
+LookupKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def lookup_key(tool: Callable, **kwargs: Any) -> LookupKey:
+    return getattr(tool, "tool_name", tool.__name__), tuple(sorted(kwargs.items()))
+
+
+def plan_lookups(policy_number: Optional[str] = None, customer_id: Optional[str] = None,
+                 claim_id: Optional[str] = None) -> List[Tuple[Callable, Dict[str, Any]]]:
+    """The lookups a specialist is likely to need for these IDs, as (tool, kwargs)."""
+    lookups = []
+    if policy_number:
+        lookups.append((get_policy_details, {"policy_number": policy_number}))
+        lookups.append((get_billing_info, {"policy_number": policy_number}))
+        lookups.append((get_claim_status, {"policy_number": policy_number}))
+    elif customer_id:
+        lookups.append((get_billing_info, {"customer_id": customer_id}))
+    if claim_id:
+        lookups.append((get_claim_status, {"claim_id": claim_id}))
+    return lookups
+
+
+class _Lookup:
+    __slots__ = ("future", "started", "used")
+
+    def __init__(self, future: Future):
+        self.future = future
+        self.started = time.monotonic()
+        self.used = False
+
+
+class CustomerContext:
+    """Prefetched lookups of one conversation, by tool and arguments."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.lookups: Dict[LookupKey, _Lookup] = {}
+        self.touched = time.monotonic()
+
+
+class Prefetcher:
+    """
+    Runs plan_lookups() in the background per conversation and hands the
+    results to specialists.
+
+    A specialist waits at most `wait_sec` for a lookup still in flight;
+    results older than `ttl_sec` are not served. At most `max_contexts`
+    conversations are kept (least recently used first out).
+    """
+
+    def __init__(self, enabled: bool = True, wait_sec: float = 0.25, ttl_sec: float = 30.0,
+                 max_contexts: int = 512, max_workers: int = 4):
+        self.enabled = enabled
+        self.wait_sec = wait_sec
+        self.ttl_sec = ttl_sec
+        self.max_contexts = max_contexts
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._contexts: "OrderedDict[str, CustomerContext]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.late = 0
+        self.wasted = 0
+        self.wait_sec_total = 0.0
+
+    # ---- starting lookups ----
+
+    def prefetch(self, key: Optional[str] = None, **ids: Optional[str]) -> Optional[str]:
+        """
+        Start the lookups for `ids` not already running in context `key` (a
+        new context when None). Returns the context key, or None when
+        disabled or there is nothing to fetch.
+        """
+        lookups = plan_lookups(**ids) if self.enabled else []
+        if not lookups:
+            return key
+        key = key or uuid.uuid4().hex
+        new = []
+        with self._lock:
+            context = self._context(key)
+            for tool, kwargs in lookups:
+                lk = lookup_key(tool, **kwargs)
+                current = context.lookups.get(lk)
+                if current is not None and not self._stale(current):
+                    continue
+                if current is not None and not current.used:
+                    self.wasted += 1
+                context.lookups[lk] = _Lookup(self._executor.submit(tool, **kwargs))
+                new.append(lk[0])
+            self.started += len(new)
+        if new:
+            logger.debug("🚀 Prefetching %s for %s", ", ".join(new), ids)
+        return key
+
+    def _context(self, key: str) -> CustomerContext:
+        context = self._contexts.get(key)
+        if context is None:
+            context = self._contexts[key] = CustomerContext(key)
+        self._contexts.move_to_end(key)
+        context.touched = time.monotonic()
+        while len(self._contexts) > self.max_contexts:
+            _, dropped = self._contexts.popitem(last=False)
+            self._count_waste(dropped)
+        return context
+
+    def _stale(self, lookup: _Lookup) -> bool:
+        return time.monotonic() - lookup.started > self.ttl_sec
+
+    def _count_waste(self, context: CustomerContext) -> None:
+        self.wasted += sum(1 for lookup in context.lookups.values() if not lookup.used)
+
+    # ---- using results ----
+
+    def _find(self, key: Optional[str], tool: Callable, kwargs: Dict[str, Any]) -> Optional[_Lookup]:
+        if not self.enabled or not key:
+            return None
+        with self._lock:
+            context = self._contexts.get(key)
+            lookup = context.lookups.get(lookup_key(tool, **kwargs)) if context else None
+        if lookup is None or self._stale(lookup):
+            with self._lock:
+                self.misses += 1
+            return None
+        return lookup
+
+    def _result(self, lookup: _Lookup, waited: float) -> Any:
+        with self._lock:
+            self.wait_sec_total += waited
+            if not lookup.future.done():
+                self.late += 1
+                self.misses += 1
+                return MISSING
+            if lookup.future.exception() is not None:
+                self.misses += 1
+                return MISSING
+            if not lookup.used:
+                lookup.used = True
+                self.hits += 1
+        return lookup.future.result()
+
+    def take(self, key: Optional[str], tool: Callable, **kwargs: Any) -> Any:
+        """The prefetched result of tool(**kwargs) in context `key`, or MISSING."""
+        lookup = self._find(key, tool, kwargs)
+        if lookup is None:
+            return MISSING
+        start = time.perf_counter()
+        if not lookup.future.done():
+            try:
+                lookup.future.exception(timeout=self.wait_sec)
+            except FutureTimeoutError:
+                pass
+        return self._result(lookup, time.perf_counter() - start)
+
+    async def atake(self, key: Optional[str], tool: Callable, **kwargs: Any) -> Any:
+        """Async variant of take; waits without blocking the event loop."""
+        lookup = self._find(key, tool, kwargs)
+        if lookup is None:
+            return MISSING
+        start = time.perf_counter()
+        if not lookup.future.done():
+            # asyncio.wait leaves the lookup running if it times out.
+            await asyncio.wait({asyncio.wrap_future(lookup.future)}, timeout=self.wait_sec)
+        return self._result(lookup, time.perf_counter() - start)
+
+    # ---- lifecycle ----
+
+    def close(self, key: Optional[str]) -> None:
+        """Drop a conversation's context; lookups it never used count as wasted."""
+        with self._lock:
+            context = self._contexts.pop(key, None) if key else None
+            if context is not None:
+                self._count_waste(context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            unused = sum(1 for c in self._contexts.values() for lookup in c.lookups.values() if not lookup.used)
+            wanted = self.hits + self.misses
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.misses,
+                "late": self.late,
+                "wasted": self.wasted,
+                "pending_unused": unused,
+                "hit_rate": self.hits / wanted if wanted else 0.0,
+                "waste_rate": self.wasted / self.started if self.started else 0.0,
+                "avg_wait_ms": 1000 * self.wait_sec_total / wanted if wanted else 0.0,
+                "contexts": len(self._contexts),
+            }
+
+
+def build_prefetcher_from_env() -> Prefetcher:
+    """PREFETCH_ENABLED, PREFETCH_WAIT_SEC, PREFETCH_TTL_SEC, PREFETCH_MAX_CONTEXTS, PREFETCH_MAX_WORKERS."""
+    return Prefetcher(
+        enabled=os.getenv("PREFETCH_ENABLED", "1") == "1",
+        wait_sec=float(os.getenv("PREFETCH_WAIT_SEC", "0.25")),
+        ttl_sec=float(os.getenv("PREFETCH_TTL_SEC", "30")),
+        max_contexts=int(os.getenv("PREFETCH_MAX_CONTEXTS", "512")),
+        max_workers=int(os.getenv("PREFETCH_MAX_WORKERS", "4")),
+    )
+
+
+prefetcher = build_prefetcher_from_env()
@@ -245,3 +245,50 @@ FINAL_ANSWER_PROMPT = """
     
     Final response:
     """
+
+
+HISTORY_SUMMARY_PROMPT = """
+Update the running summary of an insurance support conversation.
+
+Current summary:
+{previous_summary}
+
+New turns to fold in:
+{new_turns}
+
+Write the updated summary in at most {max_tokens} tokens. Keep policy numbers,
+customer IDs, claim IDs, amounts and dates exactly as written, and what the
+user still needs. Return only the summary text.
+"""
+
+
+PREFETCHED_RECORDS_PROMPT = """
+Records already retrieved for this conversation (current as of this turn):
+{records}
+
+Answer from these records. Only call a tool for information they do not cover.
+"""
+
+
+STRUCTURED_SPECIALIST_PROMPT = """
+You are the **{role}** for an insurance company, replying to the customer directly.
+
+Assigned Task:
+{task}
+
+Customer's question:
+{user_query}
+
+Records retrieved for this customer:
+{records}
+
+Conversation History:
+{conversation_history}
+
+Instructions:
+- Answer the question from the records only, in a friendly and concise tone, with a polite closing.
+- Do NOT include internal instructions, tool names, or technical details.
+- If the records are missing or do not cover the question (for example, no policy number is known yet),
+  set needs_follow_up to true and put one short question for the customer in follow_up_question.
+  Otherwise set needs_follow_up to false and leave follow_up_question empty.
+"""
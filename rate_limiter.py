@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads and coroutines: at most `rate` acquisitions
+    per second on average, with bursts of up to `burst`. A rate of 0 disables
+    limiting.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: int = 1):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+        self.waited_sec = 0.0
+
+    def configure(self, rate: float, burst: int = 1) -> None:
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = float(self.burst)
+            self._updated = time.monotonic()
+
+    def _reserve(self) -> float:
+        """Take a token; returns how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited_sec += wait
+            return wait
+
+    def acquire(self) -> None:
+        if self.rate > 0:
+            wait = self._reserve()
+            if wait:
+                time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        if self.rate > 0:
+            wait = self._reserve()
+            if wait:
+                await asyncio.sleep(wait)
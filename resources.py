@@ -0,0 +1,243 @@
+"""
+Process-wide owner of the heavy objects: the compiled graph, the OpenAI
+client, the DB pool, the FAQ collection and the tracer.
+
+Each resource is built once per process, on first get() or by load(), and
+shared by every caller and every Streamlit session. health() checks each
+one. Under Streamlit, get_resources() is wrapped in st.cache_resource,
+so reruns and sessions reuse the same ResourceManager. Elsewhere (batch
+jobs, scripts) a plain once-per-process cache does the same job.
+
+    python -m resources            # build the eager resources, print health, exit 1 if unhealthy
+    python -m resources --deep     # also load the FAQ collection and call the OpenAI API
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from db_access import POOL_LISTENERS
+
+
+logger = logging.getLogger(__name__)
+
+# Health checks get (resource, deep) and return a short detail string or raise.
+Check = Callable[[Any, bool], str]
+
+
+class ResourceManager:
+    """
+    Named resources built on first use, each at most once per process.
+
+    `lazy` resources are skipped by load(), and a shallow health() only
+    checks them once `loaded()` says something else has built them. The
+    FAQ collection is one: loading it can take seconds, and the UI warms it
+    in the background instead.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._checks: Dict[str, Optional[Check]] = {}
+        self._lazy: Dict[str, bool] = {}
+        self._loaded: Dict[str, Optional[Callable[[], bool]]] = {}
+        self._built: Dict[str, Any] = {}
+        self._build_sec: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], check: Optional[Check] = None,
+                 lazy: bool = False, loaded: Optional[Callable[[], bool]] = None) -> None:
+        self._factories[name] = factory
+        self._checks[name] = check
+        self._lazy[name] = lazy
+        self._loaded[name] = loaded
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """The resource, building it on first call."""
+        if name in self._built:
+            return self._built[name]
+        with self._locks[name]:
+            if name not in self._built:
+                start = time.perf_counter()
+                self._built[name] = self._factories[name]()
+                self._build_sec[name] = time.perf_counter() - start
+                logger.info("🧱 Resource %s ready in %.2fs", name, self._build_sec[name])
+        return self._built[name]
+
+    def load(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Build the given (default: all non-lazy) resources; returns seconds spent on each."""
+        names = list(names) if names is not None else [n for n in self._factories if not self._lazy[n]]
+        for name in names:
+            self.get(name)
+        return {name: self._build_sec[name] for name in names}
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """Forget a resource (all when None) so the next get() rebuilds it."""
+        for key in ([name] if name else list(self._factories)):
+            with self._locks[key]:
+                self._built.pop(key, None)
+                self._build_sec.pop(key, None)
+
+    def health(self, deep: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        {name: {"ok", "status", "detail", "check_ms", "build_sec"}}. A shallow
+        check never builds a lazy resource; it reports "idle" until something
+        else has loaded it.
+        """
+        report = {}
+        for name in self._factories:
+            entry = {"ok": True, "status": "ready", "detail": "", "check_ms": 0.0,
+                     "build_sec": self._build_sec.get(name)}
+            start = time.perf_counter()
+            try:
+                if not deep and self._idle(name):
+                    entry["status"] = "idle"
+                else:
+                    resource = self.get(name)
+                    check = self._checks[name]
+                    entry["detail"] = check(resource, deep) if check else type(resource).__name__
+                    entry["build_sec"] = self._build_sec.get(name)
+            except Exception as e:
+                entry.update(ok=False, status="error", detail=f"{type(e).__name__}: {e}")
+            entry["check_ms"] = round(1000 * (time.perf_counter() - start), 2)
+            report[name] = entry
+        return report
+
+    def _idle(self, name: str) -> bool:
+        if name in self._built or not self._lazy[name]:
+            return False
+        loaded = self._loaded[name]
+        return loaded is None or not loaded()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "built": sorted(self._built),
+            "build_sec": dict(self._build_sec),
+        }
+
+
+# ---- Default resources ----
+
+def _graph():
+    from agent_app import get_app
+
+    return get_app()
+
+
+def _check_graph(app, deep: bool) -> str:
+    from checkpointing import thread_config
+
+    if app.checkpointer is not None:
+        app.checkpointer.get_tuple(thread_config("__health_check__"))
+    return f"{len(app.get_graph().nodes)} nodes, checkpointer {type(app.checkpointer).__name__}"
+
+
+def _openai_client():
+    from llm_utils import get_client
+
+    return get_client()
+
+
+def _check_openai(client, deep: bool) -> str:
+    if deep:
+        client.models.list()
+        return "API reachable"
+    return type(client).__name__
+
+
+def _db_pool():
+    from db_access import get_pool
+
+    return get_pool()
+
+
+def _check_db(pool, deep: bool) -> str:
+    pool.fetchone("SELECT 1")
+    return pool.db_path
+
+
+def _faq_collection():
+    from retrieval import get_collection
+
+    return get_collection()
+
+
+def _faq_collection_loaded() -> bool:
+    from retrieval import collection_loaded
+
+    return collection_loaded()
+
+
+def _check_faqs(collection, deep: bool) -> str:
+    return f"{collection.count()} docs"
+
+
+def _tracer():
+    from env_loader import get_tracer
+
+    return get_tracer()
+
+
+def build_resources() -> ResourceManager:
+    resources = ResourceManager()
+    resources.register("openai_client", _openai_client, _check_openai)
+    resources.register("db_pool", _db_pool, _check_db)
+    resources.register("tracer", _tracer)
+    resources.register("graph", _graph, _check_graph)
+    resources.register("faq_collection", _faq_collection, _check_faqs, lazy=True, loaded=_faq_collection_loaded)
+    # configure_pool() replaces the pool; drop ours so the next get() picks up the new one.
+    POOL_LISTENERS.append(lambda: resources.reset("db_pool"))
+    return resources
+
+
+# ---- Caching ----
+
+def _once(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Plain-Python stand-in for st.cache_resource: call `fn` once per process."""
+    lock = threading.Lock()
+    cache = {}
+
+    def wrapper():
+        if "value" not in cache:
+            with lock:
+                if "value" not in cache:
+                    cache["value"] = fn()
+        return cache["value"]
+
+    wrapper.clear = cache.clear
+    return wrapper
+
+
+def cache_resource(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """st.cache_resource when running inside a Streamlit app, else once per process."""
+    try:
+        import streamlit as st
+        from streamlit.runtime import exists
+    except ImportError:
+        return _once(fn)
+    return st.cache_resource(show_spinner=False)(fn) if exists() else _once(fn)
+
+
+@cache_resource
+def get_resources() -> ResourceManager:
+    """The process's ResourceManager, with its eager resources built."""
+    resources = build_resources()
+    resources.load()
+    return resources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deep", action="store_true", help="load lazy resources and call external services")
+    args = parser.parse_args()
+
+    report = get_resources().health(deep=args.deep)
+    print(json.dumps(report, indent=2, default=str))
+    sys.exit(0 if all(entry["ok"] for entry in report.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bm25 import BM25Index, reciprocal_rank_fusion
+from metrics import histogram
+from semantic_cache import build_semantic_cache_from_env
+
+
+logger = logging.getLogger(__name__)
+
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
+FAQ_COLLECTION = os.getenv("FAQ_COLLECTION", "insurance_FAQ_collection")
+# Load the FAQ index and embedding model in the background at worker start.
+FAQ_WARM_UP = os.getenv("FAQ_WARM_UP", "1") == "1"
+# "hybrid" (BM25 + vector, fused by reciprocal rank) or "vector".
+FAQ_RETRIEVAL_MODE = os.getenv("FAQ_RETRIEVAL_MODE", "hybrid")
+# Candidates taken from each retriever before fusion and re-ranking.
+FAQ_HYBRID_CANDIDATES = int(os.getenv("FAQ_HYBRID_CANDIDATES", "20"))
+FAQ_RRF_K = int(os.getenv("FAQ_RRF_K", "60"))
+# Optional local cross-encoder, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+# (needs sentence-transformers); empty disables re-ranking.
+FAQ_RERANK_MODEL = os.getenv("FAQ_RERANK_MODEL", "")
+
+RETRIEVAL_STAGE_SECONDS = histogram(
+    "faq_retrieval_stage_seconds",
+    "FAQ retrieval latency by stage (embed, vector, bm25, fusion, rerank, total), per call",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+_collection = None
+_collection_lock = threading.Lock()
+_bm25: Optional[BM25Index] = None
+_bm25_lock = threading.Lock()
+_warm_up_thread: Optional[threading.Thread] = None
+_warm_up_lock = threading.Lock()
+
+
+def faq_id(question: str) -> str:
+    """Stable document ID for an FAQ, so re-ingesting the same question is a no-op."""
+    return "faq-" + hashlib.sha1(question.strip().encode("utf-8")).hexdigest()[:20]
+
+
+def content_hash(question: str, answer: str) -> str:
+    """Version of an FAQ document; changes whenever its question or answer does."""
+    return hashlib.sha1(f"{question}\x00{answer}".encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_embedding_function():
+    """The collection's embedding model, loaded once per process."""
+    from chromadb.utils import embedding_functions
+
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def get_collection(path: Optional[str] = None):
+    """
+    The FAQ collection, opened once per process. The dataset is only
+    ingested when the collection does not exist yet (or is empty).
+    """
+    global _collection
+    if _collection is not None:
+        return _collection
+
+    with _collection_lock:
+        if _collection is None:
+            import chromadb
+
+            start = time.perf_counter()
+            client = chromadb.PersistentClient(path=path or CHROMA_PATH)
+            collection = client.get_or_create_collection(
+                name=FAQ_COLLECTION,
+                embedding_function=get_embedding_function(),
+            )
+            if collection.count() == 0:
+                from chroma_setup import setup_chroma_db
+
+                logger.info("📥 FAQ collection is empty, ingesting dataset...")
+                setup_chroma_db(path or CHROMA_PATH, collection=collection)
+            logger.info("📚 FAQ collection ready (%d docs, %.2fs)",
+                        collection.count(), time.perf_counter() - start)
+            _collection = collection
+    return _collection
+
+
+def collection_loaded() -> bool:
+    """Whether get_collection() has already opened the collection in this process."""
+    return _collection is not None
+
+
+def embed_query(query_text: str) -> List[float]:
+    return embed_queries([query_text])[0]
+
+
+def embed_queries(query_texts: Sequence[str]) -> List[List[float]]:
+    """Embed many texts in one model call."""
+    return [list(map(float, v)) for v in get_embedding_function()(list(query_texts))]
+
+
+def query_faqs(
+    query_text: str,
+    n_results: int = 3,
+    query_embedding: Optional[Sequence[float]] = None,
+) -> Dict[str, List]:
+    """Nearest FAQs for one query; pass `query_embedding` to skip re-embedding."""
+    if query_embedding is not None:
+        return get_collection().query(
+            query_embeddings=[list(query_embedding)],
+            n_results=n_results,
+            include=["metadatas", "documents", "distances"],
+        )
+    return get_collection().query(
+        query_texts=[query_text],
+        n_results=n_results,
+        include=["metadatas", "documents", "distances"],
+    )
+
+
+# ---- Hybrid retrieval ----
+
+def _iter_collection(page_size: int = 5000) -> Iterator[Tuple[str, Dict, str]]:
+    collection = get_collection()
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(limit=page_size, offset=offset, include=["metadatas", "documents"])
+        yield from zip(page["ids"], page["metadatas"], page["documents"])
+
+
+def get_bm25_index() -> BM25Index:
+    """Keyword index over the FAQ collection, built once per process."""
+    global _bm25
+    if _bm25 is not None:
+        return _bm25
+    with _bm25_lock:
+        if _bm25 is None:
+            start = time.perf_counter()
+            index = BM25Index()
+            index.add((doc_id, doc or "") for doc_id, _, doc in _iter_collection())
+            _bm25 = index.finalize()
+            logger.info("🔤 BM25 index built over %d FAQs in %.2fs",
+                        len(index), time.perf_counter() - start)
+    return _bm25
+
+
+def refresh_bm25_index() -> None:
+    """Drop the keyword index so the next search rebuilds it from the collection."""
+    global _bm25
+    with _bm25_lock:
+        _bm25 = None
+
+
+@lru_cache(maxsize=1)
+def get_reranker():
+    if not FAQ_RERANK_MODEL:
+        return None
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        logger.warning("⚠️ FAQ_RERANK_MODEL is set but sentence-transformers is not installed; "
+                       "skipping re-ranking")
+        return None
+    return CrossEncoder(FAQ_RERANK_MODEL)
+
+
+@contextmanager
+def _timed(stage: str):
+    start = time.perf_counter()
+    yield
+    RETRIEVAL_STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def search_faqs(
+    query_text: str,
+    n_results: int = 3,
+    query_embedding: Optional[Sequence[float]] = None,
+    mode: Optional[str] = None,
+    rerank: bool = True,
+) -> Dict[str, List]:
+    """Best FAQs for one query; see search_faqs_batch."""
+    embeddings = None if query_embedding is None else [query_embedding]
+    return search_faqs_batch([query_text], n_results, embeddings, mode, rerank)[0]
+
+
+def search_faqs_batch(
+    query_texts: Sequence[str],
+    n_results: int = 3,
+    query_embeddings: Optional[Sequence[Sequence[float]]] = None,
+    mode: Optional[str] = None,
+    rerank: bool = True,
+) -> List[Dict[str, List]]:
+    """
+    Best FAQs for many queries at once, one result per query in the
+    single-query shape of collection.query (ids / metadatas / documents,
+    plus "scores" in hybrid mode).
+
+    All queries are embedded in one call and sent to Chroma in one query;
+    documents found only by BM25 are fetched in one get and re-ranking is
+    one cross-encoder batch. Hybrid mode takes the top
+    FAQ_HYBRID_CANDIDATES from the vector index and from BM25, fuses the
+    rankings with reciprocal rank fusion and, when FAQ_RERANK_MODEL is set,
+    re-orders the fused candidates. Each stage's latency goes to
+    faq_retrieval_stage_seconds.
+    """
+    if not query_texts:
+        return []
+    mode = mode or FAQ_RETRIEVAL_MODE
+    with _timed("total"):
+        if query_embeddings is None:
+            with _timed("embed"):
+                query_embeddings = embed_queries(query_texts)
+
+        candidates = n_results if mode == "vector" else max(FAQ_HYBRID_CANDIDATES, n_results)
+        with _timed("vector"):
+            vector = get_collection().query(
+                query_embeddings=[list(e) for e in query_embeddings],
+                n_results=candidates,
+                include=["metadatas", "documents", "distances"],
+            )
+        if mode == "vector":
+            return [
+                {key: [vector[key][i]] for key in ("ids", "metadatas", "documents", "distances")}
+                for i in range(len(query_texts))
+            ]
+
+        with _timed("bm25"):
+            index = get_bm25_index()
+            keyword = [index.search(q, candidates) for q in query_texts]
+        with _timed("fusion"):
+            fused = [
+                reciprocal_rank_fusion([vector["ids"][i], [doc_id for doc_id, _ in keyword[i]]], FAQ_RRF_K)[:candidates]
+                for i in range(len(query_texts))
+            ]
+
+        docs = {
+            doc_id: (meta, doc)
+            for i in range(len(query_texts))
+            for doc_id, meta, doc in zip(vector["ids"][i], vector["metadatas"][i], vector["documents"][i])
+        }
+        missing = list({doc_id for ranking in fused for doc_id, _ in ranking if doc_id not in docs})
+        if missing:
+            extra = get_collection().get(ids=missing, include=["metadatas", "documents"])
+            docs.update({d: (m, doc) for d, m, doc in zip(extra["ids"], extra["metadatas"], extra["documents"])})
+        fused = [[(doc_id, score) for doc_id, score in ranking if doc_id in docs] for ranking in fused]
+
+        reranker = get_reranker() if rerank else None
+        if reranker is not None:
+            with _timed("rerank"):
+                pairs = [(q, docs[doc_id][1]) for q, ranking in zip(query_texts, fused) for doc_id, _ in ranking]
+                scores = iter(map(float, reranker.predict(pairs))) if pairs else iter(())
+                fused = [
+                    sorted(((doc_id, next(scores)) for doc_id, _ in ranking), key=lambda item: item[1], reverse=True)
+                    for ranking in fused
+                ]
+
+        results = []
+        for ranking in fused:
+            top = ranking[:n_results]
+            results.append({
+                "ids": [[doc_id for doc_id, _ in top]],
+                "metadatas": [[docs[doc_id][0] for doc_id, _ in top]],
+                "documents": [[docs[doc_id][1] for doc_id, _ in top]],
+                "scores": [[score for _, score in top]],
+            })
+        return results
+
+
+def _meta_version(meta: Dict) -> str:
+    return meta.get("content_hash") or content_hash(
+        (meta.get("question") or "").strip(), (meta.get("answer") or "").strip()
+    )
+
+
+def faq_versions(results: Dict[str, List]) -> Dict[str, str]:
+    """FAQ id -> version for the documents in a single-query result."""
+    ids = (results.get("ids") or [[]])[0]
+    metadatas = (results.get("metadatas") or [[]])[0]
+    return {doc_id: _meta_version(meta or {}) for doc_id, meta in zip(ids, metadatas)}
+
+
+def faqs_unchanged(versions: Dict[str, str]) -> bool:
+    """True when every FAQ still exists with the same version (one keyed lookup)."""
+    if not versions:
+        return True
+    stored = get_collection().get(ids=list(versions), include=["metadatas"])
+    current = {doc_id: _meta_version(meta or {}) for doc_id, meta in zip(stored["ids"], stored["metadatas"])}
+    return current == versions
+
+
+# Paraphrase-tolerant cache of general-help answers (SEMANTIC_CACHE_*), built
+# by get_semantic_cache(); assign None to disable it.
+_UNBUILT = object()
+semantic_cache = _UNBUILT
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    global semantic_cache
+    with _semantic_cache_lock:
+        if semantic_cache is _UNBUILT:
+            semantic_cache = build_semantic_cache_from_env(validator=faqs_unchanged)
+    return semantic_cache
+
+
+def warm_up() -> None:
+    """
+    Open the collection, run one embedding so the model is resident, and
+    build the keyword index and re-ranker that hybrid search needs.
+    """
+    start = time.perf_counter()
+    get_embedding_function()(["warm up"])
+    get_collection()
+    if FAQ_RETRIEVAL_MODE == "hybrid":
+        get_bm25_index()
+        get_reranker()
+    logger.info("🔥 FAQ retrieval warmed up in %.2fs", time.perf_counter() - start)
+
+
+def warm_up_in_background() -> Optional[threading.Thread]:
+    """
+    Start warm_up on a daemon thread, once per process; failures are
+    logged, not raised.
+    """
+    global _warm_up_thread
+
+    def run():
+        try:
+            warm_up()
+        except Exception as e:
+            logger.warning("⚠️ FAQ warm-up failed: %s", e)
+
+    with _warm_up_lock:
+        if FAQ_WARM_UP and _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=run, name="faq-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on query embeddings rather than exact text.
+
+    Each entry holds the normalized query vector, the answer, and the
+    version (content hash) of every FAQ document the answer was built from.
+    A lookup hits when the nearest cached vector is within `threshold`
+    cosine distance. Entries are dropped when one of their FAQs changes,
+    either through invalidate_faqs() or, when a `validator` is given, by
+    re-checking the FAQ versions on each hit (which also catches updates
+    made by other processes). Bounded LRU with per-entry TTL.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.08,
+        max_entries: int = 1000,
+        ttl: float = 86400.0,
+        validator: Optional[Callable[[Dict[str, str]], bool]] = None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.validator = validator
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._by_faq: Dict[str, set] = {}
+        self._next_key = 0
+        self._matrix: Optional["np.ndarray"] = None   # rows follow _keys
+        self._keys: List[int] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.latency_saved = 0.0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> "np.ndarray":
+        import numpy as np   # deferred: only needed once there are embeddings
+
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _index(self) -> "np.ndarray":
+        import numpy as np
+
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[k]["vector"] for k in self._keys])
+        return self._matrix
+
+    def _remove(self, key: int) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for faq_id in entry["faq_versions"]:
+            keys = self._by_faq.get(faq_id)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._by_faq[faq_id]
+        self._matrix = None
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Cached entry for the nearest query within the threshold, else None."""
+        vec = self._normalize(embedding)
+        with self._lock:
+            entry = None
+            if self._entries:
+                distances = 1.0 - self._index() @ vec
+                best = int(distances.argmin())
+                key = self._keys[best]
+                candidate = self._entries[key]
+                if distances[best] <= self.threshold:
+                    if candidate["expires_at"] < time.time():
+                        self._remove(key)
+                    else:
+                        entry = candidate
+                        self._entries.move_to_end(key)
+
+        if entry is not None and self.validator is not None and not self.validator(entry["faq_versions"]):
+            with self._lock:
+                self._remove(key)
+                self.invalidations += 1
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.latency_saved += entry["cost_sec"]
+        return entry
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        answer: str,
+        faq_versions: Dict[str, str],
+        cost_sec: float = 0.0,
+        **extra: Any,
+    ) -> None:
+        """Cache `answer`; `cost_sec` is the time a hit will save."""
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = {
+                "vector": self._normalize(embedding),
+                "answer": answer,
+                "faq_versions": dict(faq_versions),
+                "cost_sec": cost_sec,
+                "expires_at": time.time() + self.ttl,
+                **extra,
+            }
+            for faq_id in faq_versions:
+                self._by_faq.setdefault(faq_id, set()).add(key)
+            self._matrix = None
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_faqs(self, faq_ids: Sequence[str]) -> int:
+        """Drop every entry built from any of `faq_ids`; returns how many."""
+        with self._lock:
+            keys = set().union(*(self._by_faq.get(f, set()) for f in faq_ids))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        if keys:
+            logger.info("🧹 Semantic cache dropped %d answers for updated FAQs", len(keys))
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_faq.clear()
+            self._matrix = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "invalidations": self.invalidations,
+            "latency_saved_sec": self.latency_saved,
+        }
+
+
+def build_semantic_cache_from_env(validator=None) -> Optional[SemanticCache]:
+    """Build the cache from SEMANTIC_CACHE_* environment variables (None when disabled)."""
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "0":
+        return None
+    return SemanticCache(
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.08")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+        ttl=float(os.getenv("SEMANTIC_CACHE_TTL_SEC", "86400")),
+        validator=validator,
+    )
@@ -1,4 +1,7 @@
+from langgraph.types import Command
 from agent_app import app   # import your compiled graph
+from checkpointing import new_thread_id, thread_config
+from conversation import user_turn
 
 def run_test_query(query):
     """Test the system with a billing query"""
@@ -17,7 +20,7 @@ def run_test_query(query):
         "payment_method": None,
         "billing_frequency": None,
         "invoice_date": None,
-        "conversation_history": f"User: {query}",
+        "turns": [user_turn(query)],
         "task": "Help user with their query",
         "final_answer": ""
     }
@@ -26,22 +29,15 @@ def run_test_query(query):
     print(f"QUERY: {query}")
     print(f"{'='*50}\n")
 
-    while True:
-        state = app.invoke(state)
+    config = thread_config(new_thread_id())
+    state = app.invoke(state, config)
 
-        if state.get("needs_user_input"):
-            print(f"\n🔹 AGENT ASKS: {state['question']}")
-            user_answer = input("Your answer: ")
+    # The graph pauses at human_input; resume the same thread with the answer
+    while state.get("__interrupt__"):
+        print(f"\n🔹 AGENT ASKS: {state['__interrupt__'][0].value['question']}")
+        user_answer = input("Your answer: ")
+        state = app.invoke(Command(resume=user_answer), config)
 
-            state = {
-                **state,
-                "needs_clarification": True,
-                "clarification_question": state["question"],
-                "user_clarification": user_answer,
-                "user_input": user_answer,
-            }
-            continue
-
-        print("\n---FINAL RESPONSE---")
-        print(state.get("final_answer", "No final answer generated."))
-        return state
+    print("\n---FINAL RESPONSE---")
+    print(state.get("final_answer", "No final answer generated."))
+    return state
@@ -0,0 +1,7 @@
+import os
+
+# Nothing under test talks to OpenAI or a Phoenix collector.
+os.environ.setdefault("OPEN_AI_KEY", "test")
+os.environ.setdefault("TRACING_ENABLED", "0")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+os.environ.setdefault("LOG_FILE", "")
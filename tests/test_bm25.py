@@ -0,0 +1,55 @@
+import pytest
+
+from bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+FAQS = [
+    ("deductible", "Question: What is a deductible? Answer: The amount you pay before coverage starts."),
+    ("claim", "Question: How do I file a claim? Answer: File a claim online or by phone after an accident."),
+    ("premium", "Question: Why did my premium go up? Answer: Premiums change with claims history and coverage."),
+    ("rental", "Question: Does my policy cover a rental car? Answer: Rental car coverage is an optional add-on."),
+]
+
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    index.add(FAQS)
+    return index.finalize()
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("How do I file a Claim?") == ["file", "claim"]
+
+
+def test_best_match_ranks_first(index):
+    assert index.search("file a claim after an accident")[0][0] == "claim"
+    assert index.search("rental car")[0][0] == "rental"
+
+
+def test_scores_are_descending_and_k_is_respected(index):
+    hits = index.search("claim coverage premium", k=2)
+    assert len(hits) == 2
+    assert hits[0][1] >= hits[1][1]
+
+
+def test_rarer_terms_weigh_more(index):
+    # "accident" appears in one FAQ, "coverage" in three.
+    scores = dict(index.search("accident coverage"))
+    assert max(scores, key=scores.get) == "claim"
+
+
+def test_only_documents_sharing_a_term_are_returned(index):
+    assert [doc for doc, _ in index.search("deductible")] == ["deductible"]
+    assert index.search("the what how") == []
+    assert BM25Index().finalize().search("claim") == []
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"], ["b", "a"]])
+    assert [doc for doc, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61 + 1 / 61)
+
+
+def test_rrf_includes_documents_from_either_ranking():
+    fused = dict(reciprocal_rank_fusion([["a"], ["z"]], k=1))
+    assert fused == {"a": 0.5, "z": 0.5}
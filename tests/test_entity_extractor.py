@@ -0,0 +1,50 @@
+import pytest
+
+import entity_extractor
+from conversation import assistant_turn, user_turn
+from entity_extractor import ENTITY_PATTERNS, extract, register_entity, scan_new_turns
+
+
+def test_extracts_each_id_type():
+    text = "Policy POL000123 for CUST00042, about claim CLM000007."
+    assert extract(text) == {"policy_number": "POL000123", "customer_id": "CUST00042", "claim_id": "CLM000007"}
+
+
+def test_keeps_the_first_match_of_each_type():
+    assert extract("POL000001 or maybe POL000002") == {"policy_number": "POL000001"}
+
+
+def test_only_wanted_types_are_returned():
+    assert extract("POL000001 and CLM000002", ["claim_id"]) == {"claim_id": "CLM000002"}
+
+
+@pytest.mark.parametrize("text", ["", "pol000123", "POL12345", "CUST1234", "no ids here"])
+def test_malformed_or_missing_ids_are_ignored(text):
+    assert extract(text) == {}
+
+
+def test_registered_entity_is_extracted(monkeypatch):
+    monkeypatch.setattr(entity_extractor, "ENTITY_PATTERNS", dict(ENTITY_PATTERNS))
+    try:
+        register_entity("vin", r"VIN[A-Z0-9]{5}")
+        assert extract("car VINAB123 on POL000001") == {"vin": "VINAB123", "policy_number": "POL000001"}
+    finally:
+        entity_extractor.ENTITY_PATTERNS = ENTITY_PATTERNS
+        entity_extractor._compile()
+
+
+def test_scan_only_reads_new_turns():
+    state = {"turns": [user_turn("My policy is POL000001"), assistant_turn("Looking it up", "billing_agent")]}
+    state.update(scan_new_turns(state))
+    assert state["entities"] == {"policy_number": "POL000001"}
+    assert state["entity_scan_offset"] == 2
+    assert state["last_specialist_index"] == 1
+
+    # Earlier turns are not rescanned, and the first-seen value is kept.
+    state["turns"][0] = user_turn("CLM999999")
+    state["turns"] = state["turns"] + [user_turn("Actually POL000002, claim CLM000003"),
+                                       assistant_turn("Routing", "supervisor")]
+    state.update(scan_new_turns(state))
+    assert state["entities"] == {"policy_number": "POL000001", "claim_id": "CLM000003"}
+    assert state["entity_scan_offset"] == 4
+    assert state["last_specialist_index"] == 1
@@ -0,0 +1,140 @@
+import pytest
+
+from conversation import assistant_turn, user_turn
+from finalization import Finalizer, render_billing, render_claim_status
+
+BILL = {"policy_number": "POL000002", "premium_amount": 182.4, "billing_frequency": "Monthly",
+        "amount_due": 182.4, "due_date": "2025-02-01"}
+CLAIM = {"claim_id": "CLM000007", "incident_type": "Collision", "claim_date": "2025-01-10",
+         "estimated_loss": 2500, "status": "Approved"}
+
+
+@pytest.fixture
+def finalizer():
+    return Finalizer(max_chars=200, max_lines=3)
+
+
+@pytest.mark.parametrize("reply, ready", [
+    ("Your next payment of $182.40 is due on 2025-02-01.", True),
+    ("Your claim was approved (paid by check)", True),
+    ("Could you share your policy number?", False),
+    ("I will make a tool call for you.", False),
+    ('{"amount_due": 182.4}', False),
+    ("The billing agent found your bill.", False),
+    ("", False),
+    ("A very long answer. " * 20, False),
+    ("One.\nTwo.\nThree.\nFour.", False),
+])
+def test_user_ready(finalizer, reply, ready):
+    assert finalizer.user_ready(reply) is ready
+
+
+def test_choose_prefers_pass_through_then_template_then_llm(finalizer):
+    ready = "Your next payment is due on 2025-02-01."
+    asking = "Which policy do you mean?"
+    assert finalizer.choose("When is my payment due?", ready, "billing_agent") == ("pass_through", None)
+    assert finalizer.choose("When is my payment due?", asking, "billing_agent") == ("template", "billing")
+    assert finalizer.choose("What does my policy cover?", asking, "policy_agent") == ("llm", None)
+
+
+def test_strategies_follow_the_policy_order():
+    reply = "Your next payment is due on 2025-02-01."
+    assert Finalizer(["template", "pass_through"]).choose("When is it due?", reply, "billing_agent") == \
+        ("template", "billing")
+    assert Finalizer(["llm"]).choose("When is it due?", reply, "billing_agent") == ("llm", None)
+    assert Finalizer(["bogus", "pass_through"]).strategies == ("pass_through",)
+
+
+@pytest.mark.parametrize("query, agent, kind", [
+    ("How much is my premium?", "billing_agent", "billing"),
+    ("When is my next payment due?", "billing_agent", "billing"),
+    ("What is the status of my claim?", "claims_agent", "claim_status"),
+    ("Has my claim been approved?", "claims_agent", "claim_status"),
+    ("How much is my premium?", "claims_agent", None),
+    ("How do I file a claim?", "claims_agent", None),
+    ("POL000002", "billing_agent", None),
+])
+def test_template_kind(finalizer, query, agent, kind):
+    assert finalizer.template_kind(query, agent) == kind
+
+
+def test_render_billing():
+    assert render_billing({"billing_info": BILL}) == (
+        "For policy POL000002, your monthly premium is $182.40. "
+        "Your next payment of $182.40 is due on 2025-02-01.")
+    assert render_billing({"billing_info": {"error": "No billing found"}}) is None
+    assert render_billing({}) is None
+
+
+def test_render_claim_status():
+    assert render_claim_status({"claims": [CLAIM]}) == (
+        "Claim CLM000007 (Collision, filed 2025-01-10, estimated loss $2,500.00) is currently approved.")
+    two = render_claim_status({"claims": [CLAIM, {**CLAIM, "claim_id": "CLM000008"}]})
+    assert two.startswith("Here are your most recent claims:\n- Claim CLM000007")
+    assert render_claim_status({"claims": []}) is None
+
+
+def test_record_counts_outcomes(finalizer):
+    for strategy in ("pass_through", "template", "llm", "template"):
+        finalizer.record(strategy)
+    stats = finalizer.get_stats()
+    assert (stats["template"], stats["total"], stats["llm_avoided_rate"]) == (2, 4, 0.75)
+
+
+# ---- Inside the graph ----
+
+def test_template_is_chosen_from_the_question_after_a_clarification(monkeypatch):
+    """After the pause, user_input holds the customer's answer, not the question."""
+    import agent_app
+
+    monkeypatch.setattr(agent_app, "finalizer", Finalizer(["template"]))
+    state = {
+        "user_input": "POL000002",
+        "turns": [
+            user_turn("When is my next payment due?"),
+            assistant_turn("What is your policy number?", "supervisor"),
+            user_turn("POL000002"),
+            assistant_turn("Routing to billing_agent", "supervisor"),
+            assistant_turn("Let me check that for you, which bill do you mean?", "billing_agent"),
+        ],
+        "last_specialist_index": 4,
+    }
+    _, strategy, kind = agent_app._finalize(state)
+    assert (strategy, kind) == ("template", "billing")
+
+
+@pytest.fixture
+def fake_graph(monkeypatch, tmp_path):
+    """The sync graph on a synthetic DB with the fake OpenAI clients installed."""
+    import agent_app
+    import db_access
+    import llm_utils
+    from benchmarks.common import build_synthetic_db
+    from benchmarks.fake_llm import install_fake_clients
+
+    for name in ("client", "async_client", "llm_cache"):
+        monkeypatch.setattr(llm_utils, name, getattr(llm_utils, name))
+    monkeypatch.setattr(agent_app, "SPECIALIST_MODE", "tools")
+    build_synthetic_db(str(tmp_path / "test.db"), n_policies=5)
+    db_access.configure_pool(str(tmp_path / "test.db"))
+    install_fake_clients(0)
+    return agent_app
+
+
+def test_ask_for_id_conversation_is_answered_from_the_template(fake_graph, monkeypatch):
+    from langgraph.types import Command
+    from checkpointing import new_thread_id, thread_config
+
+    finalizer = Finalizer(["template"])
+    monkeypatch.setattr(fake_graph, "finalizer", finalizer)
+    app = fake_graph.get_app()
+    config = thread_config(new_thread_id())
+    query = "When is my next payment due?"
+
+    paused = app.invoke({"user_input": query, "turns": [user_turn(query)], "messages": [], "n_iteration": 0,
+                         "next_agent": "supervisor_agent", "requires_human_escalation": False}, config)
+    assert paused["__interrupt__"][0].value["missing_info"] == "policy number"
+
+    final = app.invoke(Command(resume="POL000002"), config)
+    assert finalizer.get_stats()["template"] == 1
+    assert final["final_answer"].startswith("For policy POL000002, your ")
@@ -0,0 +1,92 @@
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache, MemoryLRUCache, SQLiteCache, build_cache_from_env, make_key
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def test_make_key_ignores_tool_call_ids():
+    def turn(call_id):
+        return [
+            {"role": "assistant", "tool_calls": [
+                {"id": call_id, "type": "function", "function": {"name": "get_billing_info", "arguments": "{}"}}]},
+            {"role": "tool", "tool_call_id": call_id, "content": "{}"},
+        ]
+
+    assert make_key("gpt-4o-mini", turn("call_a")) == make_key("gpt-4o-mini", turn("call_b"))
+    assert make_key("gpt-4o-mini", turn("call_a")) != make_key("gpt-4o", turn("call_a"))
+
+
+def test_memory_tier_expires_entries(clock):
+    tier = MemoryLRUCache(max_entries=10, ttl=60)
+    tier.set("k", {"content": "a"})
+    clock.now += 59
+    assert tier.get("k") == {"content": "a"}
+    clock.now += 2
+    assert tier.get("k") is None
+
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    tier = MemoryLRUCache(max_entries=2, ttl=60)
+    tier.set("a", {"content": "a"})
+    tier.set("b", {"content": "b"})
+    tier.get("a")
+    tier.set("c", {"content": "c"})
+    assert tier.get("b") is None
+    assert tier.get("a") is not None and tier.get("c") is not None
+
+
+def test_disk_tier_expires_entries(clock, tmp_path):
+    tier = SQLiteCache(str(tmp_path / "cache.db"), ttl=60)
+    tier.set("k", {"content": "a"})
+    assert tier.get("k") == {"content": "a"}
+    clock.now += 61
+    assert tier.get("k") is None
+
+
+def test_disk_tier_purges_expired_rows_on_open(clock, tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCache(path, ttl=60).set("k", {"content": "a"})
+    clock.now += 61
+    reopened = SQLiteCache(path, ttl=60)
+    assert reopened._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 0
+
+
+def test_lower_tier_hit_is_promoted(clock, tmp_path):
+    memory = MemoryLRUCache(ttl=60)
+    disk = SQLiteCache(str(tmp_path / "cache.db"), ttl=60)
+    cache = LLMCache([memory, disk])
+    disk.set("k", {"content": "a", "usage": {"total_tokens": 7}})
+
+    assert cache.get("k")["content"] == "a"
+    assert memory.get("k") is not None
+    stats = cache.get_stats()
+    assert stats["hits_by_tier"] == {"MemoryLRUCache": 0, "SQLiteCache": 1}
+    assert stats["tokens_saved"] == 7
+
+
+def test_disk_tier_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    assert [type(t) for t in build_cache_from_env().tiers] == [MemoryLRUCache]
+
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "cache.db"))
+    assert [type(t) for t in build_cache_from_env().tiers] == [MemoryLRUCache, SQLiteCache]
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    assert build_cache_from_env() is None
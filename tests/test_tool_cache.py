@@ -0,0 +1,92 @@
+import pytest
+
+import tool_cache
+from tool_cache import MISSING, ToolCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tool_cache.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def cache():
+    return ToolCache(max_entries=2)
+
+
+def counted(cache, ttl=60, result=None):
+    """A cached lookup tool that records how often it really ran."""
+    calls = []
+
+    @cache.cached(ttl=ttl, name="get_policy")
+    def get_policy(policy_number, customer_id=None):
+        calls.append(policy_number)
+        return result(policy_number) if result else {"policy_number": policy_number, "customer_id": "CUST00001"}
+
+    return get_policy, calls
+
+
+def test_repeat_lookup_is_served_from_cache(clock, cache):
+    get_policy, calls = counted(cache)
+    assert get_policy("POL000001") == get_policy(policy_number="POL000001")
+    assert calls == ["POL000001"]
+    assert cache.get_stats()["get_policy"]["hits"] == 1
+
+
+def test_entries_expire_after_ttl(clock, cache):
+    get_policy, calls = counted(cache, ttl=30)
+    get_policy("POL000001")
+    clock.now += 29
+    get_policy("POL000001")
+    clock.now += 2
+    get_policy("POL000001")
+    assert calls == ["POL000001", "POL000001"]
+
+
+def test_least_recently_used_entry_is_evicted(clock, cache):
+    get_policy, calls = counted(cache)
+    get_policy("POL000001")
+    get_policy("POL000002")
+    get_policy("POL000001")
+    get_policy("POL000003")
+
+    assert get_policy.cache_lookup("POL000002") is MISSING
+    assert get_policy.cache_lookup("POL000001") is not MISSING
+    assert cache.get_stats()["get_policy"]["evictions"] == 1
+
+
+def test_invalidate_by_id_in_arguments_or_results(clock, cache):
+    get_policy, calls = counted(cache)
+    get_policy("POL000001")
+    assert cache.invalidate(customer_id="CUST00001") == 1
+    assert get_policy.cache_lookup("POL000001") is MISSING
+
+
+def test_errors_are_not_cached(clock, cache):
+    get_policy, calls = counted(cache, result=lambda pol: {"error": "not found"})
+    get_policy("POL000001")
+    get_policy("POL000001")
+    assert len(calls) == 2
+
+
+def test_cached_values_are_copies(clock, cache):
+    get_policy, _ = counted(cache)
+    get_policy("POL000001")["customer_id"] = "changed"
+    assert get_policy("POL000001")["customer_id"] == "CUST00001"
+
+
+def test_disabled_cache_calls_through(clock):
+    get_policy, calls = counted(ToolCache(enabled=False))
+    get_policy("POL000001")
+    get_policy("POL000001")
+    assert len(calls) == 2
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace as NS
+
+import pytest
+
+import llm_utils
+from llm_utils import adispatch_tool_calls, dispatch_tool_calls
+
+
+def tool_call(call_id, name, **arguments):
+    return NS(id=call_id, function=NS(name=name, arguments=json.dumps(arguments)))
+
+
+def slow_lookup(policy_number, delay):
+    time.sleep(delay)
+    return {"policy_number": policy_number}
+
+
+async def async_lookup(policy_number, delay):
+    await asyncio.sleep(delay)
+    return {"policy_number": policy_number}
+
+
+TOOLS = {"slow_lookup": slow_lookup, "async_lookup": async_lookup}
+
+
+def results(messages):
+    return [(m["tool_call_id"], json.loads(m["content"])) for m in messages]
+
+
+@pytest.fixture
+def short_timeouts(monkeypatch):
+    monkeypatch.setattr(llm_utils, "TOOL_TIMEOUTS", {"slow_lookup": 0.2, "async_lookup": 0.2})
+
+
+def test_sync_results_keep_tool_call_order():
+    calls = [tool_call("a", "slow_lookup", policy_number="POL000001", delay=0.05),
+             tool_call("b", "slow_lookup", policy_number="POL000002", delay=0.0)]
+    assert results(dispatch_tool_calls(calls, TOOLS)) == [
+        ("a", {"policy_number": "POL000001"}), ("b", {"policy_number": "POL000002"})]
+
+
+def test_async_results_keep_tool_call_order():
+    calls = [tool_call("a", "slow_lookup", policy_number="POL000001", delay=0.05),
+             tool_call("b", "async_lookup", policy_number="POL000002", delay=0.0)]
+    assert results(asyncio.run(adispatch_tool_calls(calls, TOOLS))) == [
+        ("a", {"policy_number": "POL000001"}), ("b", {"policy_number": "POL000002"})]
+
+
+@pytest.mark.parametrize("name", ["slow_lookup", "async_lookup"])
+def test_async_timeout_yields_structured_error(short_timeouts, name):
+    calls = [tool_call("slow", name, policy_number="POL000001", delay=1.0),
+             tool_call("fast", name, policy_number="POL000002", delay=0.0)]
+    start = time.perf_counter()
+    (_, slow), (_, fast) = results(asyncio.run(adispatch_tool_calls(calls, TOOLS)))
+
+    assert time.perf_counter() - start < 0.9
+    assert slow["timeout"] is True and name in slow["error"]
+    assert fast == {"policy_number": "POL000002"}
+
+
+def test_sync_timeout_does_not_hold_up_the_turn(short_timeouts):
+    calls = [tool_call("slow", "slow_lookup", policy_number="POL000001", delay=1.0),
+             tool_call("fast", "slow_lookup", policy_number="POL000002", delay=0.0)]
+    start = time.perf_counter()
+    (_, slow), (_, fast) = results(dispatch_tool_calls(calls, TOOLS))
+
+    assert time.perf_counter() - start < 0.9
+    assert slow["timeout"] is True
+    assert fast == {"policy_number": "POL000002"}
+
+
+def test_unknown_tool_and_bad_arguments_become_errors():
+    calls = [tool_call("x", "no_such_tool"), NS(id="y", function=NS(name="slow_lookup", arguments="{not json"))]
+    (_, unknown), (_, bad) = results(asyncio.run(adispatch_tool_calls(calls, TOOLS)))
+    assert "not implemented" in unknown["error"]
+    assert "error" in bad
+
+
+def test_tool_timeouts_parse_from_env():
+    assert llm_utils._parse_tool_timeouts("get_claim_status=5, get_billing_info=2.5,bad=x,") == {
+        "get_claim_status": 5.0, "get_billing_info": 2.5,
+    }
@@ -0,0 +1,219 @@
+import copy
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+# Argument and result fields that identify the rows a lookup read; writers
+# invalidate by these.
+ENTITY_FIELDS = ("policy_number", "customer_id", "claim_id")
+
+# Returned by cache_lookup when nothing is cached.
+MISSING = object()
+
+
+class ToolCache:
+    """
+    Memoizes tool lookups by tool and arguments, each tool with its own TTL
+    and LRU bound.
+
+    Entries are indexed by the policy, customer and claim IDs that appear in
+    their arguments or results, so a DB writer can drop everything it may
+    have made stale with invalidate(policy_number=...). Error results are
+    not cached. Values are copied in and out, so callers cannot alter a
+    cached entry.
+    """
+
+    def __init__(self, max_entries: int = 1024, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._ttl: Dict[str, float] = {}
+        self._entries: Dict[str, "OrderedDict[Tuple, Tuple[float, Any]]"] = {}
+        self._by_entity: Dict[Tuple[str, str], set] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # Bumped by every invalidation, so a lookup that raced one is not stored.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    # ---- registration ----
+
+    def cached(self, ttl: float, name: Optional[str] = None) -> Callable:
+        """Decorator: cache a tool function's results for `ttl` seconds."""
+
+        def decorator(fn: Callable) -> Callable:
+            tool = name or fn.__name__
+            ttl_sec = float(os.getenv(f"TOOL_CACHE_TTL_{tool.upper()}", ttl))
+            signature = inspect.signature(fn)
+            with self._lock:
+                self._ttl[tool] = ttl_sec
+                self._entries[tool] = OrderedDict()
+                self._stats[tool] = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+            params = [(p.name, p.default) for p in signature.parameters.values()]
+            names = {param for param, _ in params}
+
+            def key_of(args, kwargs) -> Tuple:
+                # (name, value) for every parameter, as signature.bind + apply_defaults would give.
+                if len(args) > len(params) or any(k not in names for k in kwargs):
+                    signature.bind(*args, **kwargs)   # raises the usual TypeError
+                values = dict(zip((param for param, _ in params), args))
+                values.update(kwargs)
+                return tuple((param, values.get(param, default)) for param, default in params)
+
+            def lookup(*args, **kwargs):
+                """The cached result for these arguments, or MISSING; a miss is not counted."""
+                key = key_of(args, kwargs) if self.enabled and ttl_sec > 0 else None
+                if key is None or not _hashable(key):
+                    return MISSING
+                return self._get(tool, key, count_miss=False)
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = key_of(args, kwargs) if self.enabled and ttl_sec > 0 else None
+                if key is None or not _hashable(key):
+                    return fn(*args, **kwargs)
+                value = self._get(tool, key)
+                if value is not MISSING:
+                    return value
+                generation = self._generation
+                value = fn(*args, **kwargs)
+                self._set(tool, key, value, generation)
+                return value
+
+            wrapper.cache_lookup = lookup
+            wrapper.tool_name = tool
+            return wrapper
+
+        return decorator
+
+    # ---- storage ----
+
+    def _get(self, tool: str, key: Tuple, count_miss: bool = True) -> Any:
+        with self._lock:
+            entries = self._entries[tool]
+            item = entries.get(key)
+            if item is not None and item[0] < time.monotonic():
+                self._drop(tool, key)
+                item = None
+            if item is None:
+                if count_miss:
+                    self._stats[tool]["misses"] += 1
+                return MISSING
+            self._stats[tool]["hits"] += 1
+            entries.move_to_end(key)
+            value = item[1]
+        return _copy_rows(value)
+
+    def _set(self, tool: str, key: Tuple, value: Any, generation: int) -> None:
+        if isinstance(value, dict) and "error" in value:
+            return
+        stored = _copy_rows(value)
+        with self._lock:
+            if generation != self._generation:
+                return
+            entries = self._entries[tool]
+            if key in entries:
+                self._drop(tool, key)
+            entries[key] = (time.monotonic() + self._ttl[tool], stored)
+            for entity in _entities(key, stored):
+                self._by_entity.setdefault(entity, set()).add((tool, key))
+            while len(entries) > self.max_entries:
+                self._drop(tool, next(iter(entries)))
+                self._stats[tool]["evictions"] += 1
+
+    def _drop(self, tool: str, key: Tuple) -> None:
+        item = self._entries[tool].pop(key, None)
+        if item is None:
+            return
+        for entity in _entities(key, item[1]):
+            refs = self._by_entity.get(entity)
+            if refs:
+                refs.discard((tool, key))
+                if not refs:
+                    del self._by_entity[entity]
+
+    # ---- invalidation ----
+
+    def invalidate(self, tool: Optional[str] = None, **entities: Optional[str]) -> int:
+        """
+        Drop cached results that involve any of the given IDs, e.g.
+        invalidate(policy_number="POL000123") after updating that policy's
+        rows; restrict to one tool with `tool`. Returns how many were dropped.
+        """
+        wanted = {(field, str(value)) for field, value in entities.items() if value}
+        with self._lock:
+            self._generation += 1
+            refs = set().union(*(self._by_entity.get(entity, set()) for entity in wanted))
+            dropped = 0
+            for ref_tool, key in refs:
+                if tool is None or ref_tool == tool:
+                    self._drop(ref_tool, key)
+                    self._stats[ref_tool]["invalidations"] += 1
+                    dropped += 1
+        if dropped:
+            logger.info("🧹 Tool cache dropped %d results for %s", dropped, entities)
+        return dropped
+
+    def clear(self, tool: Optional[str] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            for name in ([tool] if tool else list(self._entries)):
+                for key in list(self._entries[name]):
+                    self._drop(name, key)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool hits, misses, hit rate, entries, evictions, invalidations and TTL."""
+        with self._lock:
+            stats = {}
+            for tool, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                stats[tool] = {
+                    **counts,
+                    "hit_rate": counts["hits"] / lookups if lookups else 0.0,
+                    "entries": len(self._entries[tool]),
+                    "ttl_sec": self._ttl[tool],
+                }
+            return stats
+
+
+def _copy_rows(value: Any) -> Any:
+    """Copy a row or list of rows (flat dicts of scalars) without a full deepcopy."""
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else copy.deepcopy(row) for row in value]
+    return copy.deepcopy(value)
+
+
+def _hashable(key: Tuple) -> bool:
+    try:
+        hash(key)
+        return True
+    except TypeError:
+        return False
+
+
+def _entities(key: Tuple, value: Any):
+    """(field, id) pairs named in a lookup's arguments or result rows."""
+    found = {(field, str(arg)) for field, arg in key if field in ENTITY_FIELDS and arg}
+    rows = value if isinstance(value, list) else [value]
+    for row in rows:
+        if isinstance(row, dict):
+            found.update((field, str(row[field])) for field in ENTITY_FIELDS if row.get(field))
+    return found
+
+
+def build_tool_cache_from_env() -> ToolCache:
+    """TOOL_CACHE_ENABLED, TOOL_CACHE_MAX_ENTRIES (per tool); TTLs via TOOL_CACHE_TTL_<TOOL>."""
+    return ToolCache(
+        max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+        enabled=os.getenv("TOOL_CACHE_ENABLED", "1") == "1",
+    )
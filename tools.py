@@ -1,27 +1,35 @@
-import sqlite3
+import asyncio
 import logging
 from datetime import datetime
+from functools import wraps
 from typing import Dict, Any, List, Optional
-
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('insurance_agent.log'),
-        logging.StreamHandler()
-    ]
+from tool_cache import MISSING, build_tool_cache_from_env
+from db_access import (
+    POOL_LISTENERS,
+    get_pool,
+    POLICY_DETAILS_SQL,
+    CLAIM_BY_ID_SQL,
+    CLAIMS_BY_POLICY_SQL,
+    BILLING_BY_POLICY_SQL,
+    BILLING_BY_CUSTOMER_SQL,
+    PAYMENT_HISTORY_SQL,
+    AUTO_POLICY_DETAILS_SQL,
 )
 
+
+# Handlers are set up once per process by logging_setup.configure_logging.
 logger = logging.getLogger(__name__)
 
+# Lookup results cached per tool; DB writers call tool_cache.invalidate(policy_number=...).
+tool_cache = build_tool_cache_from_env()
+POOL_LISTENERS.append(tool_cache.clear)   # a different database invalidates everything
+
 def ask_user(question: str, missing_info: str = ""):
     """
     Streamlit-safe version of ask_user.
     Instead of using input(), we return the question so the UI can ask.
     """
-    logger.info(f"🗣️ Asking user for input: {question}")
+    logger.info("🗣️ Asking user for input: %s", question)
 
     return {
         "needs_user_input": True,
@@ -30,131 +38,94 @@ def ask_user(question: str, missing_info: str = ""):
     }
 
 
+# Policy terms change rarely.
+@tool_cache.cached(ttl=600)
 def get_policy_details(policy_number: str) -> Dict[str, Any]:
     """Fetch a customer's policy details by policy number"""
-    logger.info(f"🔍 Fetching policy details for: {policy_number}")
-    conn = sqlite3.connect('insurance_support.db')
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT p.*, c.first_name, c.last_name 
-        FROM policies p 
-        JOIN customers c ON p.customer_id = c.customer_id 
-        WHERE p.policy_number = ?
-    """, (policy_number,))
-    result = cursor.fetchone()
-    conn.close()
+    logger.debug("🔍 Fetching policy details for: %s", policy_number)
+    result = get_pool().fetchone(POLICY_DETAILS_SQL, (policy_number,))
     if result:
-        logger.info(f"✅ Policy found: {policy_number}")
-        columns = [desc[0] for desc in cursor.description]
-        return dict(zip(columns, result))
-    logger.warning(f"❌ Policy not found: {policy_number}")
+        logger.debug("✅ Policy found: %s", policy_number)
+        return result
+    logger.warning("❌ Policy not found: %s", policy_number)
     return {"error": "Policy not found"}
 
+# Claim and billing status move during a conversation.
+@tool_cache.cached(ttl=30)
 def get_claim_status(claim_id: str = None, policy_number: str = None) -> Dict[str, Any]:
     """Get claim status and details"""
-    logger.info(f"🔍 Fetching claim status - Claim ID: {claim_id}, Policy: {policy_number}")
-    conn = sqlite3.connect('insurance_support.db')
-    cursor = conn.cursor()
+    logger.debug("🔍 Fetching claim status - Claim ID: %s, Policy: %s", claim_id, policy_number)
+    result = []
     if claim_id:
-        cursor.execute("""
-            SELECT c.*, p.policy_type 
-            FROM claims c
-            JOIN policies p ON c.policy_number = p.policy_number
-            WHERE c.claim_id = ?
-        """, (claim_id,))
+        result = get_pool().fetchall(CLAIM_BY_ID_SQL, (claim_id,))
     elif policy_number:
-        cursor.execute("""
-            SELECT c.*, p.policy_type 
-            FROM claims c
-            JOIN policies p ON c.policy_number = p.policy_number
-            WHERE c.policy_number = ?
-            ORDER BY c.claim_date DESC LIMIT 3
-        """, (policy_number,))
-    result = cursor.fetchall()
-    conn.close()
+        result = get_pool().fetchall(CLAIMS_BY_POLICY_SQL, (policy_number,))
     if result:
-        logger.info(f"✅ Found {len(result)} claim(s)")
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in result]
+        logger.debug("✅ Found %d claim(s)", len(result))
+        return result
     logger.warning("❌ No claims found")
     return {"error": "Claim not found"}
 
+@tool_cache.cached(ttl=30)
 def get_billing_info(policy_number: str = None, customer_id: str = None) -> Dict[str, Any]:
     """Get billing information including current balance and due dates"""
-    logger.info(f"🔍 Fetching billing info - Policy: {policy_number}, Customer: {customer_id}")
-    conn = sqlite3.connect('insurance_support.db')
-    cursor = conn.cursor()
+    logger.debug("🔍 Fetching billing info - Policy: %s, Customer: %s", policy_number, customer_id)
+    result = None
     if policy_number:
-        cursor.execute("""
-            SELECT b.*, p.premium_amount, p.billing_frequency
-            FROM billing b
-            JOIN policies p ON b.policy_number = p.policy_number
-            WHERE b.policy_number = ? AND b.status = 'pending'
-            ORDER BY b.due_date DESC LIMIT 1
-        """, (policy_number,))
+        result = get_pool().fetchone(BILLING_BY_POLICY_SQL, (policy_number,))
     elif customer_id:
-        cursor.execute("""
-            SELECT b.*, p.premium_amount, p.billing_frequency
-            FROM billing b
-            JOIN policies p ON b.policy_number = p.policy_number
-            WHERE p.customer_id = ? AND b.status = 'pending'
-            ORDER BY b.due_date DESC LIMIT 1
-        """, (customer_id,))
-    result = cursor.fetchone()
-    conn.close()
+        result = get_pool().fetchone(BILLING_BY_CUSTOMER_SQL, (customer_id,))
     if result:
-        logger.info("✅ Billing info found")
-        columns = [desc[0] for desc in cursor.description]
-        return dict(zip(columns, result))
+        logger.debug("✅ Billing info found")
+        return result
     logger.warning("❌ Billing info not found")
     return {"error": "Billing information not found"}
 
+@tool_cache.cached(ttl=60)
 def get_payment_history(policy_number: str) -> List[Dict[str, Any]]:
     """Get payment history for a policy"""
-    logger.info(f"🔍 Fetching payment history for policy: {policy_number}")
-    conn = sqlite3.connect('insurance_support.db')
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT p.payment_date, p.amount, p.status, p.payment_method
-        FROM payments p
-        JOIN billing b ON p.bill_id = b.bill_id
-        WHERE b.policy_number = ?
-        ORDER BY p.payment_date DESC LIMIT 10
-    """, (policy_number,))
-    
-    results = cursor.fetchall()
-    conn.close()
-    
+    logger.debug("🔍 Fetching payment history for policy: %s", policy_number)
+    results = get_pool().fetchall(PAYMENT_HISTORY_SQL, (policy_number,))
+
     if results:
-        logger.info(f"✅ Found {len(results)} payment records")
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in results]
+        logger.debug("✅ Found %d payment records", len(results))
+        return results
     logger.warning("❌ No payment history found")
     return []
 
+# Vehicle and coverage data is near-static.
+@tool_cache.cached(ttl=3600)
 def get_auto_policy_details(policy_number: str) -> Dict[str, Any]:
     """Get auto-specific policy details including vehicle info and deductibles"""
-    logger.info(f"🔍 Fetching auto policy details for: {policy_number}")
-    conn = sqlite3.connect('insurance_support.db')
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT apd.*, p.policy_type, p.premium_amount
-        FROM auto_policy_details apd
-        JOIN policies p ON apd.policy_number = p.policy_number
-        WHERE apd.policy_number = ?
-    """, (policy_number,))
-    
-    result = cursor.fetchone()
-    conn.close()
-    
+    logger.debug("🔍 Fetching auto policy details for: %s", policy_number)
+    result = get_pool().fetchone(AUTO_POLICY_DETAILS_SQL, (policy_number,))
+
     if result:
-        logger.info("✅ Auto policy details found")
-        columns = [desc[0] for desc in cursor.description]
-        return dict(zip(columns, result))
+        logger.debug("✅ Auto policy details found")
+        return result
     logger.warning("❌ Auto policy details not found")
     return {"error": "Auto policy details not found"}
 
 
+# ---- Async variants ----
+# sqlite3 has no native async API; the pooled lookups are run in the default
+# thread-pool executor so async graph nodes never block the event loop.
+
+def _run_in_thread(fn):
+    lookup = getattr(fn, "cache_lookup", None)
+
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        # Cache hits are answered on the event loop without a thread hop.
+        if lookup is not None:
+            cached = lookup(*args, **kwargs)
+            if cached is not MISSING:
+                return cached
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
 
+aget_policy_details = _run_in_thread(get_policy_details)
+aget_claim_status = _run_in_thread(get_claim_status)
+aget_billing_info = _run_in_thread(get_billing_info)
+aget_payment_history = _run_in_thread(get_payment_history)
+aget_auto_policy_details = _run_in_thread(get_auto_policy_details)
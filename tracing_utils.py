@@ -1,45 +1,107 @@
 from functools import wraps
+import inspect
 import time
+from langgraph.errors import GraphInterrupt
 from opentelemetry.trace.status import Status, StatusCode
-from env_loader import tracer
+from env_loader import get_tracer
+from metrics import node_stats
+
+
+def _start_span_attributes(span, agent_name, state):
+    # Standard metadata
+    span.set_attribute("agent.name", agent_name)
+    span.set_attribute("agent.type", agent_name.replace("_node", ""))
+    span.set_attribute("user.id", state.get("customer_id", "unknown"))
+    span.set_attribute("policy.number", state.get("policy_number", "unknown"))
+    span.set_attribute("claim.id", state.get("claim_id", "unknown"))
+    span.set_attribute("task", state.get("task", "none"))
+    span.set_attribute("timestamp", state.get("timestamp", "n/a"))
+
+
+def _finish_span(span, start_time, result):
+    duration = time.time() - start_time
+    span.set_attribute("execution.duration_sec", duration)
+
+    if isinstance(result, dict):
+        span.set_attribute("result.keys", list(result.keys()))
+
+    span.set_status(Status(StatusCode.OK))
+
+
+def _pause_span(span, start_time):
+    """interrupt() pauses the run for the user; it is not a failure."""
+    span.set_attribute("execution.duration_sec", time.time() - start_time)
+    span.set_attribute("agent.interrupted", True)
+    span.set_status(Status(StatusCode.OK))
+
+
+def _node_name(func):
+    """Metrics label shared by a node and its async twin: apolicy_agent_node -> policy_agent."""
+    name = func.__name__
+    if inspect.iscoroutinefunction(func) and name.startswith("a"):
+        name = name[1:]
+    return name[:-len("_node")] if name.endswith("_node") else name
+
 
 def trace_agent(func):
     """
     Decorator to wrap multi-agent functions in a Phoenix span with metadata.
+    Works for both plain and async (coroutine) node functions.
+
+    Per-node wall, LLM, tool and retrieval time, token usage and tool calls
+    (metrics.NodeStats) are set as span attributes and recorded in the
+    in-process histograms, so they are available without a collector.
     """
+    agent_name = func.__name__
+    node = _node_name(func)
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            state = args[0] if args else {}
+
+            with get_tracer().start_as_current_span(agent_name) as span, node_stats(node) as stats:
+                _start_span_attributes(span, agent_name, state)
+                start_time = time.time()
+
+                try:
+                    result = await func(*args, **kwargs)
+                    _finish_span(span, start_time, result)
+                    return result
+
+                except GraphInterrupt:
+                    _pause_span(span, start_time)
+                    raise
+                except Exception as e:
+                    span.record_exception(e)
+                    span.set_status(Status(StatusCode.ERROR, str(e)))
+                    raise
+                finally:
+                    span.set_attributes(stats.as_attributes())
+
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         state = args[0] if args else {}
 
-        agent_name = func.__name__
-
-        with tracer.start_as_current_span(agent_name) as span:
-            # Standard metadata
-            span.set_attribute("agent.name", agent_name)
-            span.set_attribute("agent.type", agent_name.replace("_node", ""))
-            span.set_attribute("user.id", state.get("customer_id", "unknown"))
-            span.set_attribute("policy.number", state.get("policy_number", "unknown"))
-            span.set_attribute("claim.id", state.get("claim_id", "unknown"))
-            span.set_attribute("task", state.get("task", "none"))
-            span.set_attribute("timestamp", state.get("timestamp", "n/a"))
-
+        with get_tracer().start_as_current_span(agent_name) as span, node_stats(node) as stats:
+            _start_span_attributes(span, agent_name, state)
             start_time = time.time()
 
             try:
                 result = func(*args, **kwargs)
-
-                duration = time.time() - start_time
-                span.set_attribute("execution.duration_sec", duration)
-
-                if isinstance(result, dict):
-                    span.set_attribute("result.keys", list(result.keys()))
-
-                span.set_status(Status(StatusCode.OK))
+                _finish_span(span, start_time, result)
                 return result
 
+            except GraphInterrupt:
+                _pause_span(span, start_time)
+                raise
             except Exception as e:
                 span.record_exception(e)
                 span.set_status(Status(StatusCode.ERROR, str(e)))
                 raise
+            finally:
+                span.set_attributes(stats.as_attributes())
 
     return wrapper